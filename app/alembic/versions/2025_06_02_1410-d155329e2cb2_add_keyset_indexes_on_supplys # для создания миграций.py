@@ -0,0 +1,44 @@
+"""add keyset pagination indexes on supplys
+
+Revision ID: d155329e2cb2
+Revises: cf12ce27de19
+Create Date: 2025-06-02 14:10:42.518307
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d155329e2cb2"
+down_revision: Union[str, None] = "cf12ce27de19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_supplys_company_id_created_at_id",
+        "supplys",
+        ["company_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_supplier_id_is_wait_confirm_created_at_id",
+        "supplys",
+        ["supplier_id", "is_wait_confirm", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_supplys_supplier_id_is_wait_confirm_created_at_id",
+        table_name="supplys",
+    )
+    op.drop_index(
+        "ix_supplys_company_id_created_at_id", table_name="supplys"
+    )
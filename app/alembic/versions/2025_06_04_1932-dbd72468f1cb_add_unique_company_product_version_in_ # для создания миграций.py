@@ -0,0 +1,58 @@
+"""add unique constraint company_id, product_version_id in expense_companys
+
+Revision ID: dbd72468f1cb
+Revises: d155329e2cb2
+Create Date: 2025-06-04 19:32:07.913264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "dbd72468f1cb"
+down_revision: Union[str, None] = "d155329e2cb2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # схлопываем дубликаты: количество суммируется в запись с минимальным id
+    op.execute(
+        """
+        UPDATE expense_companys AS e
+        SET quantity = d.total_quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS total_quantity
+            FROM expense_companys
+            GROUP BY company_id, product_version_id
+            HAVING count(*) > 1
+        ) AS d
+        WHERE e.id = d.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM expense_companys AS e
+        USING expense_companys AS k
+        WHERE e.company_id = k.company_id
+            AND e.product_version_id = k.product_version_id
+            AND e.id > k.id
+        """
+    )
+    op.create_unique_constraint(
+        op.f("uq_expense_companys_company_id"),
+        "expense_companys",
+        ["company_id", "product_version_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        op.f("uq_expense_companys_company_id"),
+        "expense_companys",
+        type_="unique",
+    )
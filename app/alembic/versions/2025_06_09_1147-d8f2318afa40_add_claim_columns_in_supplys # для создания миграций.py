@@ -0,0 +1,58 @@
+"""add claimed_by, claimed_until columns in supplys for confirm queue
+
+Revision ID: d8f2318afa40
+Revises: dbd72468f1cb
+Create Date: 2025-06-09 11:47:25.604381
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f2318afa40"
+down_revision: Union[str, None] = "dbd72468f1cb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "supplys", sa.Column("claimed_by", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "supplys", sa.Column("claimed_until", sa.DateTime(), nullable=True)
+    )
+    op.create_foreign_key(
+        op.f("fk_supplys_claimed_by_user_companys"),
+        "supplys",
+        "user_companys",
+        ["claimed_by"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_supplys_supplier_id_created_at_id_wait_confirm",
+        "supplys",
+        ["supplier_id", "created_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_wait_confirm"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_supplys_supplier_id_created_at_id_wait_confirm",
+        table_name="supplys",
+        postgresql_where=sa.text("is_wait_confirm"),
+    )
+    op.drop_constraint(
+        op.f("fk_supplys_claimed_by_user_companys"),
+        "supplys",
+        type_="foreignkey",
+    )
+    op.drop_column("supplys", "claimed_until")
+    op.drop_column("supplys", "claimed_by")
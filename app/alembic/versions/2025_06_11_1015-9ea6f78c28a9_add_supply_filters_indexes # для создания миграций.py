@@ -0,0 +1,97 @@
+"""add indexes for supply list filters
+
+Revision ID: 9ea6f78c28a9
+Revises: d8f2318afa40
+Create Date: 2025-06-11 10:15:38.270914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9ea6f78c28a9"
+down_revision: Union[str, None] = "d8f2318afa40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_supplys_supplier_id_is_wait_confirm_status_created_at_id",
+        "supplys",
+        ["supplier_id", "is_wait_confirm", "status", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_company_id_status_created_at_id",
+        "supplys",
+        ["company_id", "status", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_supplier_id_is_wait_confirm_company_id_created_at_id",
+        "supplys",
+        ["supplier_id", "is_wait_confirm", "company_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_company_id_supplier_id_created_at_id",
+        "supplys",
+        ["company_id", "supplier_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_delivery_address_trgm",
+        "supplys",
+        ["delivery_address"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"delivery_address": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_supply_products_product_version_id_supply_id",
+        "supply_products",
+        ["product_version_id", "supply_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_products_product_version_id"),
+        "products",
+        ["product_version_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_products_product_version_id"), table_name="products"
+    )
+    op.drop_index(
+        "ix_supply_products_product_version_id_supply_id",
+        table_name="supply_products",
+    )
+    op.drop_index(
+        "ix_supplys_delivery_address_trgm",
+        table_name="supplys",
+        postgresql_using="gin",
+    )
+    op.drop_index(
+        "ix_supplys_company_id_supplier_id_created_at_id",
+        table_name="supplys",
+    )
+    op.drop_index(
+        "ix_supplys_supplier_id_is_wait_confirm_company_id_created_at_id",
+        table_name="supplys",
+    )
+    op.drop_index(
+        "ix_supplys_company_id_status_created_at_id", table_name="supplys"
+    )
+    op.drop_index(
+        "ix_supplys_supplier_id_is_wait_confirm_status_created_at_id",
+        table_name="supplys",
+    )
@@ -0,0 +1,139 @@
+"""add supplys_archive, supply_products_archive tables
+
+Revision ID: 82f02d82eb19
+Revises: 9ea6f78c28a9
+Create Date: 2025-06-16 12:32:51.604127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "82f02d82eb19"
+down_revision: Union[str, None] = "9ea6f78c28a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "supplys_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("article", sa.BigInteger(), nullable=False),
+        sa.Column("supplier_id", sa.Integer(), nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("is_wait_confirm", sa.Boolean(), nullable=False),
+        sa.Column("delivery_address", sa.Text(), nullable=False),
+        sa.Column("total_price", sa.Numeric(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["company_id"],
+            ["organizers.id"],
+            name=op.f("fk_supplys_archive_company_id_organizers"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["supplier_id"],
+            ["organizers.id"],
+            name=op.f("fk_supplys_archive_supplier_id_organizers"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_supplys_archive")),
+    )
+    op.create_index(
+        op.f("ix_supplys_archive_article"),
+        "supplys_archive",
+        ["article"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_archive_company_id_created_at_id",
+        "supplys_archive",
+        ["company_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_archive_supplier_id_created_at_id",
+        "supplys_archive",
+        ["supplier_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_table(
+        "supply_products_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("supply_id", sa.Integer(), nullable=False),
+        sa.Column("product_version_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["supply_id"],
+            ["supplys_archive.id"],
+            name=op.f("fk_supply_products_archive_supply_id_supplys_archive"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_version_id"],
+            ["product_versions.id"],
+            name=op.f(
+                "fk_supply_products_archive_product_version_id_product_versions"
+            ),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_supply_products_archive")),
+    )
+    op.create_index(
+        op.f("ix_supply_products_archive_supply_id"),
+        "supply_products_archive",
+        ["supply_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_supply_products_archive_product_version_id"),
+        "supply_products_archive",
+        ["product_version_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_supplys_status_updated_at",
+        "supplys",
+        ["status", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_supplys_status_updated_at", table_name="supplys")
+    op.drop_index(
+        op.f("ix_supply_products_archive_product_version_id"),
+        table_name="supply_products_archive",
+    )
+    op.drop_index(
+        op.f("ix_supply_products_archive_supply_id"),
+        table_name="supply_products_archive",
+    )
+    op.drop_table("supply_products_archive")
+    op.drop_index(
+        "ix_supplys_archive_supplier_id_created_at_id",
+        table_name="supplys_archive",
+    )
+    op.drop_index(
+        "ix_supplys_archive_company_id_created_at_id",
+        table_name="supplys_archive",
+    )
+    op.drop_index(
+        op.f("ix_supplys_archive_article"), table_name="supplys_archive"
+    )
+    op.drop_table("supplys_archive")
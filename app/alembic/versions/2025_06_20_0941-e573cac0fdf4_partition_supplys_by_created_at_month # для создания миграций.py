@@ -0,0 +1,190 @@
+"""partition supplys by created_at month
+
+Revision ID: e573cac0fdf4
+Revises: 82f02d82eb19
+Create Date: 2025-06-20 09:41:16.338207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e573cac0fdf4"
+down_revision: Union[str, None] = "82f02d82eb19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# количество месяцев вперед, для которых секции создаются при миграции
+MONTHS_AHEAD = 3
+
+
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_supplys_partitions(start_month date, months_ahead integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', start_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    -- параллельные вызовы из нескольких воркеров выполняются по очереди
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_supplys_partitions'));
+    WHILE month_start <= last_month LOOP
+        partition_name := format('supplys_p%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF supplys FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start,
+                (month_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$
+"""
+
+DELETE_SUPPLY_PRODUCTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION supplys_delete_supply_products()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM supply_products WHERE supply_id = OLD.id;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def _create_supplys_constraints_and_indexes(primary_key: list[str], article_unique: list[str]) -> None:
+    op.create_primary_key(op.f("pk_supplys"), "supplys", primary_key)
+    op.create_unique_constraint(op.f("uq_supplys_article"), "supplys", article_unique)
+    op.create_foreign_key(
+        op.f("fk_supplys_supplier_id_organizers"),
+        "supplys", "organizers", ["supplier_id"], ["id"], ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        op.f("fk_supplys_company_id_organizers"),
+        "supplys", "organizers", ["company_id"], ["id"], ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        op.f("fk_supplys_claimed_by_user_companys"),
+        "supplys", "user_companys", ["claimed_by"], ["id"], ondelete="SET NULL",
+    )
+    indexes = {
+        "ix_supplys_company_id_created_at_id": ["company_id", "created_at", "id"],
+        "ix_supplys_supplier_id_is_wait_confirm_created_at_id": [
+            "supplier_id", "is_wait_confirm", "created_at", "id"
+        ],
+        "ix_supplys_supplier_id_is_wait_confirm_status_created_at_id": [
+            "supplier_id", "is_wait_confirm", "status", "created_at", "id"
+        ],
+        "ix_supplys_company_id_status_created_at_id": [
+            "company_id", "status", "created_at", "id"
+        ],
+        "ix_supplys_supplier_id_is_wait_confirm_company_id_created_at_id": [
+            "supplier_id", "is_wait_confirm", "company_id", "created_at", "id"
+        ],
+        "ix_supplys_company_id_supplier_id_created_at_id": [
+            "company_id", "supplier_id", "created_at", "id"
+        ],
+        "ix_supplys_status_updated_at": ["status", "updated_at"],
+    }
+    for name, columns in indexes.items():
+        op.create_index(name, "supplys", columns, unique=False)
+    op.create_index(
+        "ix_supplys_supplier_id_created_at_id_wait_confirm",
+        "supplys",
+        ["supplier_id", "created_at", "id"],
+        unique=False,
+        postgresql_where=sa.text("is_wait_confirm"),
+    )
+    op.create_index(
+        "ix_supplys_delivery_address_trgm",
+        "supplys",
+        ["delivery_address"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"delivery_address": "gin_trgm_ops"},
+    )
+
+
+def upgrade() -> None:
+    # внешний ключ на секционированную таблицу должен включать ключ секционирования,
+    # поэтому связь supply_products -> supplys поддерживается триггером
+    op.drop_constraint(
+        op.f("fk_supply_products_supply_id_supplys"),
+        "supply_products",
+        type_="foreignkey",
+    )
+    op.execute("ALTER TABLE supplys RENAME TO supplys_old")
+    op.execute(
+        "CREATE TABLE supplys (LIKE supplys_old INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+    # секции под все месяцы с данными и на несколько месяцев вперед
+    op.execute(
+        "SELECT ensure_supplys_partitions("
+        "COALESCE((SELECT min(created_at) FROM supplys_old), now())::date, "
+        f"{MONTHS_AHEAD})"
+    )
+    op.execute("CREATE TABLE supplys_default PARTITION OF supplys DEFAULT")
+    op.execute("INSERT INTO supplys SELECT * FROM supplys_old")
+    op.execute("ALTER SEQUENCE supplys_id_seq OWNED BY supplys.id")
+    op.execute("DROP TABLE supplys_old")
+
+    _create_supplys_constraints_and_indexes(
+        primary_key=["id", "created_at"],
+        article_unique=["article", "created_at"],
+    )
+
+    op.execute(DELETE_SUPPLY_PRODUCTS_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER trg_supplys_delete_supply_products "
+        "AFTER DELETE ON supplys FOR EACH ROW "
+        "EXECUTE FUNCTION supplys_delete_supply_products()"
+    )
+    op.create_index(
+        "ix_supply_products_supply_id",
+        "supply_products",
+        ["supply_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_supply_products_supply_id", table_name="supply_products")
+    op.execute("DROP TRIGGER trg_supplys_delete_supply_products ON supplys")
+    op.execute("DROP FUNCTION supplys_delete_supply_products()")
+
+    op.execute("ALTER TABLE supplys RENAME TO supplys_partitioned")
+    op.execute("CREATE TABLE supplys (LIKE supplys_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO supplys SELECT * FROM supplys_partitioned")
+    op.execute("ALTER SEQUENCE supplys_id_seq OWNED BY supplys.id")
+    op.execute("DROP TABLE supplys_partitioned")
+    op.execute("DROP FUNCTION ensure_supplys_partitions(date, integer)")
+
+    _create_supplys_constraints_and_indexes(
+        primary_key=["id"],
+        article_unique=["article"],
+    )
+    op.create_foreign_key(
+        op.f("fk_supply_products_supply_id_supplys"),
+        "supply_products",
+        "supplys",
+        ["supply_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
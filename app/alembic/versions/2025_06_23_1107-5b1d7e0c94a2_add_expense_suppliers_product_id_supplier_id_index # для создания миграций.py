@@ -0,0 +1,35 @@
+"""add expense_suppliers product_id, supplier_id index
+
+Revision ID: 5b1d7e0c94a2
+Revises: e573cac0fdf4
+Create Date: 2025-06-23 11:07:42.518630
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1d7e0c94a2"
+down_revision: Union[str, None] = "e573cac0fdf4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_expense_suppliers_product_id_supplier_id",
+        "expense_suppliers",
+        ["product_id", "supplier_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_expense_suppliers_product_id_supplier_id",
+        table_name="expense_suppliers",
+    )
@@ -0,0 +1,65 @@
+"""add product_versions search_vector and search indexes
+
+Revision ID: c41a9e27d3b8
+Revises: 5b1d7e0c94a2
+Create Date: 2025-06-25 15:32:09.114527
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41a9e27d3b8"
+down_revision: Union[str, None] = "5b1d7e0c94a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product_versions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_product_versions_search_vector",
+        "product_versions",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_product_versions_name_trgm",
+        "product_versions",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_product_versions_name_trgm",
+        table_name="product_versions",
+        postgresql_using="gin",
+    )
+    op.drop_index(
+        "ix_product_versions_search_vector",
+        table_name="product_versions",
+        postgresql_using="gin",
+    )
+    op.drop_column("product_versions", "search_vector")
@@ -0,0 +1,51 @@
+"""add product_versions content_hash
+
+Revision ID: 7e3f0b6a2d15
+Revises: c41a9e27d3b8
+Create Date: 2025-06-27 10:18:53.640291
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7e3f0b6a2d15"
+down_revision: Union[str, None] = "c41a9e27d3b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # у существующих версий хэш пустой - приложение считает его по содержимому
+    op.add_column(
+        "product_versions",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_product_versions_content_hash"),
+        "product_versions",
+        ["content_hash"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_expense_companys_product_version_id",
+        "expense_companys",
+        ["product_version_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_expense_companys_product_version_id",
+        table_name="expense_companys",
+    )
+    op.drop_index(
+        op.f("ix_product_versions_content_hash"),
+        table_name="product_versions",
+    )
+    op.drop_column("product_versions", "content_hash")
@@ -0,0 +1,59 @@
+"""add supply_products product_id
+
+Revision ID: 1ef604e0b25b
+Revises: 7e3f0b6a2d15
+Create Date: 2025-06-30 11:12:40.205318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1ef604e0b25b"
+down_revision: Union[str, None] = "7e3f0b6a2d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # версия продукта не хранит ссылку на продукт, после обновления продукта
+    # строку поставки можно связать с ним только по сохраненному product_id
+    op.add_column(
+        "supply_products",
+        sa.Column("product_id", sa.Integer(), nullable=True),
+    )
+    op.create_foreign_key(
+        op.f("fk_supply_products_product_id_products"),
+        "supply_products", "products", ["product_id"], ["id"], ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_supply_products_product_id",
+        "supply_products",
+        ["product_id"],
+        unique=False,
+    )
+    op.add_column(
+        "supply_products_archive",
+        sa.Column("product_id", sa.Integer(), nullable=True),
+    )
+    # у строк, версия которых уже не текущая, продукт не восстановить - остается NULL
+    for table in ("supply_products", "supply_products_archive"):
+        op.execute(
+            f"UPDATE {table} SET product_id = products.id "
+            f"FROM products WHERE products.product_version_id = {table}.product_version_id"
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("supply_products_archive", "product_id")
+    op.drop_index("ix_supply_products_product_id", table_name="supply_products")
+    op.drop_constraint(
+        op.f("fk_supply_products_product_id_products"),
+        "supply_products",
+        type_="foreignkey",
+    )
+    op.drop_column("supply_products", "product_id")
@@ -0,0 +1,129 @@
+"""add supply_articles and supply_products supply check
+
+Revision ID: 714a26ded0e1
+Revises: 1ef604e0b25b
+Create Date: 2025-07-02 09:30:12.417964
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "714a26ded0e1"
+down_revision: Union[str, None] = "1ef604e0b25b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# уникальный индекс секционированной supplys включает created_at,
+# глобальная уникальность артикула поддерживается отдельной таблицей
+RESERVE_ARTICLE_FUNCTION = """
+CREATE OR REPLACE FUNCTION supplys_reserve_article()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO supply_articles (article) VALUES (NEW.article);
+    RETURN NULL;
+END;
+$$
+"""
+
+# замена внешнего ключа supply_products -> supplys при вставке,
+# FOR KEY SHARE не дает удалить поставку до конца транзакции, как и внешний ключ
+CHECK_SUPPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION supply_products_check_supply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM 1 FROM supplys WHERE id = NEW.supply_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'supply % does not exist', NEW.supply_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$
+"""
+
+
+# перенос строк месяца из supplys_default в новую секцию этого месяца.
+# Удаление из supplys_default удаляет продукты поставок триггером, поэтому они
+# сохраняются и вставляются заново вместе с поставками, артикулы освобождаются и
+# занимаются повторно триггером вставки
+MOVE_DEFAULT_MONTH_FUNCTION = """
+CREATE OR REPLACE FUNCTION supplys_move_default_month(month_start date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_from date := date_trunc('month', month_start)::date;
+    month_to date := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name text := format('supplys_p%s', to_char(month_from, 'YYYY_MM'));
+    moved integer;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_supplys_partitions'));
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN 0;
+    END IF;
+    DROP TABLE IF EXISTS moved_supplys, moved_supply_products;
+    CREATE TEMP TABLE moved_supplys ON COMMIT DROP AS
+        SELECT * FROM supplys_default WHERE created_at >= month_from AND created_at < month_to;
+    CREATE TEMP TABLE moved_supply_products ON COMMIT DROP AS
+        SELECT * FROM supply_products WHERE supply_id IN (SELECT id FROM moved_supplys);
+
+    DELETE FROM supplys_default WHERE created_at >= month_from AND created_at < month_to;
+    DELETE FROM supply_articles WHERE article IN (SELECT article FROM moved_supplys);
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF supplys FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_from, month_to
+    );
+    INSERT INTO supplys SELECT * FROM moved_supplys;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    INSERT INTO supply_products SELECT * FROM moved_supply_products;
+    RETURN moved;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "supply_articles",
+        sa.Column("article", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("article", name=op.f("pk_supply_articles")),
+    )
+    # артикулы архивных поставок тоже заняты, совпавшие в разных месяцах учитываются один раз
+    op.execute(
+        "INSERT INTO supply_articles (article) "
+        "SELECT article FROM supplys UNION SELECT article FROM supplys_archive "
+        "ON CONFLICT DO NOTHING"
+    )
+    op.execute(RESERVE_ARTICLE_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER trg_supplys_reserve_article "
+        "AFTER INSERT ON supplys FOR EACH ROW "
+        "EXECUTE FUNCTION supplys_reserve_article()"
+    )
+
+    op.execute(CHECK_SUPPLY_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER trg_supply_products_check_supply "
+        "BEFORE INSERT ON supply_products FOR EACH ROW "
+        "EXECUTE FUNCTION supply_products_check_supply()"
+    )
+    op.execute(MOVE_DEFAULT_MONTH_FUNCTION)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION supplys_move_default_month(date)")
+    op.execute("DROP TRIGGER trg_supply_products_check_supply ON supply_products")
+    op.execute("DROP FUNCTION supply_products_check_supply()")
+    op.execute("DROP TRIGGER trg_supplys_reserve_article ON supplys")
+    op.execute("DROP FUNCTION supplys_reserve_article()")
+    op.drop_table("supply_articles")
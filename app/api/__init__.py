@@ -8,6 +8,7 @@ from .supplier_api import router as router_supplier
 from .expense_api import router as router_expense
 from .linkcode_api import router as router_linkcode
 from .statistic_api import router as router_statistic
+from .metrics_api import router as router_metrics
 
 router = APIRouter()
 
@@ -35,3 +36,6 @@ router.include_router(
 router.include_router(
     router=router_statistic
 )
+router.include_router(
+    router=router_metrics
+)
@@ -1,14 +1,21 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from enum import Enum
-from fastapi import Request, Depends
+from typing import Optional
+import ipaddress
+from fastapi import Request, Response, Depends, status
 
+from core import settings
+from core.db import db_core
 from service.redis_service import redis_user, UserDataRedis
 
 from exceptions.exceptions import ForbidenError
 
 from exceptions.exceptions import ForbidenError
 
+from utils import is_etag_matched
+from utils.metrics import metrics
+
 
 
 class UserRoleType(str, Enum):
@@ -22,8 +29,16 @@ class OrganizerRole(str, Enum):
 
 
 def get_session(request: Request) -> AsyncSession:
-    """Получить объект сессии из запроса"""
-    return request.state.session
+    """
+    Получить сессию запроса.
+    Сессия создается при первом обращении и закрывается FullAuthMiddleware в конце запроса,
+    запросы без обращения к БД не берут соединение из пула
+    """
+    if (session := getattr(request.state, "session", None)) is None:
+        session = db_core.get_session()
+        request.state.session = session
+        metrics.inc("db_request_sessions")
+    return session
 
 
 async def get_user_from_redis(request: Request) -> UserDataRedis:
@@ -53,3 +68,34 @@ async def check_is_company(
     if user_data.organizer_role != OrganizerRole.company:
         raise ForbidenError("You don't have permission to access")
     return user_data
+
+
+async def check_is_internal_network(request: Request) -> None:
+    """Проверить, что запрос пришел из сети settings.metrics.allowed_networks"""
+    try:
+        address = ipaddress.ip_address(request.client.host if request.client else "")
+    except ValueError:
+        raise ForbidenError("You don't have permission to access")
+    if not any(
+        address in ipaddress.ip_network(network)
+        for network in settings.metrics.allowed_networks
+    ):
+        raise ForbidenError("You don't have permission to access")
+
+
+def get_not_modified_response(
+        response: Response,
+        etag: str,
+        if_none_match: Optional[str]
+) -> Optional[Response]:
+    """
+    Получить ответ 304, если у клиента актуальная версия данных,
+    иначе добавить ETag к заголовкам ответа
+    """
+    # private - ответ зависит от организации пользователя
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_etag_matched(if_none_match, etag):
+        metrics.inc("conditional_get_not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
     Depends, 
+    Header,
+    Response,
     status
 )
 
@@ -12,6 +14,7 @@ from core import settings
 from api.dependencies import (
     get_user_from_redis,
     get_session, 
+    get_not_modified_response,
     OrganizerRole
 )
 
@@ -30,6 +33,8 @@ from service.items_services.expense import (
 )
 from service.bussines_services.product import ProductService
 from service.redis_service import UserDataRedis
+from service.product_catalog_cache import product_catalog_cache
+from utils import make_etag
 
 
 router = APIRouter(
@@ -40,15 +45,24 @@ router = APIRouter(
 
 @router.get("", response_model=ExpensesResponse)
 async def get_expenses(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_session),
     user_data: UserDataRedis = Depends(get_user_from_redis),
 ):
     """Получить все расходы"""
-
-  expense_service: ExpenseInterface = ExpenseFactory.make_expense_service(
+    expense_service: ExpenseInterface = ExpenseFactory.make_expense_service(
         session=session,
         organizer_role=user_data.organizer_role
     )
+    validator = await expense_service.get_expenses_validator_by_organizer(
+        organizer_id=user_data.organizer_id
+    )
+    if validator.count:
+        etag = make_etag(validator, "expenses", user_data.organizer_role, user_data.organizer_id)
+        if (not_modified := get_not_modified_response(response, etag, if_none_match)) is not None:
+            return not_modified
+
     expenses: List[ExpenseWithInfoProductItem] = await expense_service.get_expenses_by_organizer(
         organizer_id=user_data.organizer_id
     )
@@ -122,5 +136,6 @@ async def delete_expense(
         await product_service.delete_product(product_id=expense.product_id)
             
     await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
     return {"detail": "No content"}
 
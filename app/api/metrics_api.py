@@ -0,0 +1,28 @@
+from typing import Dict, Union
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    status,
+)
+
+from core import settings
+from utils.metrics import metrics
+
+from api.dependencies import check_is_internal_network
+
+
+router = APIRouter(
+    prefix=settings.api.metrics.prefix,
+    tags=settings.api.metrics.tags,
+)
+
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_is_internal_network)]
+)
+async def get_metrics() -> Dict[str, Union[int, float]]:
+    """Получить счетчики воркера приложения"""
+    return metrics.snapshot()
@@ -4,7 +4,10 @@ from typing import Optional
 from fastapi import (
     APIRouter, 
     Depends,
+    Header,
     Query, 
+    Request,
+    Response,
     status
 )
 
@@ -22,20 +25,33 @@ from api.dependencies import (
 from api.dependencies import (
     check_is_supplier, 
     get_user_from_redis,
-    get_session
+    get_session,
+    get_not_modified_response
 )
 
 from schemas.product import (
     ProductRequestCreate,
     ProductRequestUpdate,
     ProductResponse,
-    ProductsResponse
+    ProductsResponse,
+    ProductCategory,
+    ProductSortOrder,
+    ProductSearchResult,
+    ProductSearchResponse,
+    ProductFacetsResponse,
+    ProductCategoryFacetResponse,
+    ProductSupplierFacetResponse,
+    ProductImportFormat,
+    ProductImportResponse,
+    ProductImportErrorResponse
 )
 from schemas.expense import ExpenseResponse
 
 from service.bussines_services.product import ProductService
-from service.items_services.product import ProductVersionItem, ProductCreate
+from service.items_services.product import ProductVersionItem, ProductCreate, ProductCatalogFilter
 from service.redis_service import UserDataRedis
+from service.product_catalog_cache import product_catalog_cache
+from utils import make_etag, make_versions_etag
 
 
 router = APIRouter(
@@ -58,34 +74,156 @@ async def create_product(
     )
 
     await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
     return ExpenseResponse(**expense.dict)
 
 
+@router.post("/import", response_model=ProductImportResponse)
+async def import_products(
+    request: Request,
+    import_format: ProductImportFormat = Query(ProductImportFormat.csv, alias="format"),
+    user_data: UserDataRedis = Depends(check_is_supplier),
+    session: AsyncSession = Depends(get_session)
+):
+    """Import products from CSV or NDJSON request body"""
+    service = ProductService(session=session)
+    result = await service.import_products(
+        user_data=user_data,
+        chunks=request.stream(),
+        import_format=import_format
+    )
+
+    await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
+    return ProductImportResponse(
+        created=result.created,
+        errors_total=result.errors_total,
+        errors=[ProductImportErrorResponse(row=error.row, message=error.message) for error in result.errors]
+    )
+
+
 @router.get("", response_model=ProductsResponse)
 async def get_products(
+    response: Response,
     supplier_id: Optional[int] = Query(None),
+    category: Optional[ProductCategory] = Query(None),
+    sort: ProductSortOrder = Query(ProductSortOrder.name_asc),
+    limit: int = Query(settings.catalog.default_limit),
+    cursor: Optional[str] = Query(None),
     add_quantity: Optional[bool] = Query(False),
+    in_stock: Optional[bool] = Query(False),
+    if_none_match: Optional[str] = Header(None),
     user_data: UserDataRedis = Depends(get_user_from_redis),
     session: AsyncSession = Depends(get_session),
 ):
     """Get products"""
     service = ProductService(session=session)
-    products = await service.get_available_products_for_company(
-        company_id=user_data.organizer_id,
+    filters = ProductCatalogFilter(
         supplier_id=supplier_id,
-        add_quantity=add_quantity
+        category=category.value if category else None,
+        sort=sort,
+        in_stock_only=in_stock
+    )
+    etag_parts = (
+        "products", user_data.organizer_id, supplier_id, filters.category,
+        sort.value, limit, cursor, add_quantity, in_stock
+    )
+    page = None
+    if service.is_catalog_page_cached(filters, add_quantity):
+        # страница из кэша каталога, ETag по его версиям - попадание в кэш не обращается к БД
+        page = await service.get_available_products_for_company(
+            company_id=user_data.organizer_id,
+            limit=limit,
+            cursor=cursor,
+            filters=filters
+        )
+    if page is not None and page.versions is not None:
+        etag = make_versions_etag(page.versions, *etag_parts)
+    else:
+        validator = await service.get_available_products_validator(
+            company_id=user_data.organizer_id,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            add_quantity=add_quantity
+        )
+        etag = make_etag(validator, *etag_parts)
+    if (not_modified := get_not_modified_response(response, etag, if_none_match)) is not None:
+        return not_modified
+
+    if page is None:
+        page = await service.get_available_products_for_company(
+            company_id=user_data.organizer_id,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            add_quantity=add_quantity
+        )
+    return ProductsResponse(
+        products=[ProductResponse(id=product.id, **product.dict) for product in page.products],
+        next_cursor=page.next_cursor
     )
-    return ProductsResponse(products=[ProductResponse(id=product.id, **product.dict) for product in products])
     
 
+@router.get("/search", response_model=ProductSearchResponse)
+async def search_products(
+    q: str = Query(...),
+    limit: int = Query(settings.catalog.search_default_limit),
+    user_data: UserDataRedis = Depends(get_user_from_redis),
+    session: AsyncSession = Depends(get_session),
+):
+    """Search products"""
+    service = ProductService(session=session)
+    products = await service.search_products_for_company(
+        company_id=user_data.organizer_id,
+        query=q,
+        limit=limit
+    )
+    return ProductSearchResponse(
+        products=[ProductSearchResult(id=product.id, **product.dict) for product in products]
+    )
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+async def get_product_facets(
+    user_data: UserDataRedis = Depends(get_user_from_redis),
+    session: AsyncSession = Depends(get_session),
+):
+    """Get product counts by category and supplier"""
+    service = ProductService(session=session)
+    facets = await service.get_product_facets_for_company(company_id=user_data.organizer_id)
+    return ProductFacetsResponse(
+        categories=[
+            ProductCategoryFacetResponse(category=facet.category, count=facet.count)
+            for facet in facets.categories
+        ],
+        suppliers=[
+            ProductSupplierFacetResponse(
+                supplier_id=facet.supplier_id,
+                supplier_name=facet.supplier_name,
+                count=facet.count
+            )
+            for facet in facets.suppliers
+        ]
+    )
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product_by_id(
     product_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     user_data: UserDataRedis = Depends(get_user_from_redis),
     session: AsyncSession = Depends(get_session)
 ):
     """Get product by id"""
     service = ProductService(session)
+    validator = await service.get_product_validator_by_id(product_id)
+    if validator.count:
+        etag = make_etag(validator, "product", product_id)
+        if (not_modified := get_not_modified_response(response, etag, if_none_match)) is not None:
+            return not_modified
+
     product = await service.get_product_by_id(product_id)
 
     return ProductResponse(id=product.id, **product.dict)
@@ -106,4 +244,5 @@ async def update_product(
         ProductVersionItem(**product_in.model_dump())
     )
     await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
     return ExpenseResponse(**product.dict)
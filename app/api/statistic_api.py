@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import (
     APIRouter,
     Depends, 
+    Query,
     status,
 )
 
@@ -27,25 +28,29 @@ router = APIRouter(
 
 @router.get("/company", response_model=StatisticCompany, status_code=status.HTTP_200_OK)
 async def get_company_statistic(
+    include_archive: bool = Query(False),
     user_data: UserDataRedis = Depends(get_user_from_redis),
     session: AsyncSession = Depends(get_session)
 ):
     """Get statistic dashboard for company"""
     statistic_service = StaticticService(session)
     result: dict = await statistic_service.get_statistics_by_company(
-        organizer=user_data
+        organizer=user_data,
+        include_archive=include_archive
     )
     return StatisticCompany(**result)
 
 
 @router.get("/supplier", status_code=status.HTTP_200_OK, response_model=StatisticSupplier)
 async def get_supplier_statistic(
+    include_archive: bool = Query(False),
     user_data: UserDataRedis = Depends(get_user_from_redis),
     session: AsyncSession = Depends(get_session)
 ):
     """Get statistic dashboard for supplier"""
     statistic_service = StaticticService(session)
     result: dict = await statistic_service.get_statistics_by_supplier(
-        organizer=user_data
+        organizer=user_data,
+        include_archive=include_archive
     )
     return StatisticSupplier(**result)
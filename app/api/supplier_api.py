@@ -24,6 +24,7 @@ from service.bussines_services.organizer import OrganizerService
 from service.bussines_services.supplier import SupplierService
 
 from service.redis_service import UserDataRedis
+from service.product_catalog_cache import product_catalog_cache
 
 
 router = APIRouter(
@@ -77,6 +78,7 @@ async def add_supplier(
     )
 
     await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
     return {"detail": "No content"}
     
 
@@ -94,4 +96,5 @@ async def delete_supplier(
     )
     
     await session.commit()
+    await product_catalog_cache.bump_committed_versions(session)
     return {"detail": "No content"}
@@ -1,13 +1,19 @@
+from typing import Optional, List
+from datetime import datetime
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import (
     APIRouter,
     Depends, 
     Query, 
+    Response,
     status
 )
+from fastapi.responses import StreamingResponse
 
 from core import settings
+from core.db import db_core
 
 from api.dependencies import (
     get_user_from_redis,
@@ -17,13 +23,16 @@ from api.dependencies import (
 )
 
 from service.redis_service import UserDataRedis
-from service.items_services.supply import SupplyCreateItem, SupplyStatus
+from service.items_services.supply import SupplyCreateItem, SupplyStatus, SupplyFilter
 from service.bussines_services.supply import SupplyService
+from service.supply_events import supply_events
 
 from schemas.supply import (
     SupplyCreateRequest,
     SuppliesCancelledAssembleStatus,
-    SupplyStatusUpdate
+    SupplyStatusUpdate,
+    SupplyStatusName,
+    SupplyExportFormat
 )
 
 
@@ -33,22 +42,135 @@ router = APIRouter(
 )
 
 
+def get_supply_filter(
+    statuses: Optional[List[SupplyStatusName]] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    counterparty_id: Optional[int] = Query(None),
+    product_id: Optional[int] = Query(None),
+    article: Optional[int] = Query(None),
+    delivery_address: Optional[str] = Query(None, max_length=255),
+) -> SupplyFilter:
+    """Фильтры списка поставок из query-параметров"""
+    return SupplyFilter(
+        statuses=[s.value for s in statuses] if statuses else None,
+        created_from=created_from,
+        created_to=created_to,
+        counterparty_id=counterparty_id,
+        product_id=product_id,
+        article=article,
+        delivery_address=delivery_address,
+    )
+
+
 @router.get("") #response_model=SuppliesResponse)
 async def get_supplies(
     is_wait_confirm: bool = Query(False),
     limit: int = Query(100),
+    cursor: Optional[str] = Query(None),
+    include_archive: bool = Query(False),
+    filters: SupplyFilter = Depends(get_supply_filter),
     user_data: UserDataRedis = Depends(get_user_from_redis),
     session: AsyncSession = Depends(get_session)
 ):
-    """Get list all supplies"""
+    """Get page of supplies"""
     supply_service = SupplyService(session=session)
-    supplies = await supply_service.get_all_supplies_by_user_data(
+    # JSON поставок собирается в БД и отдается без промежуточных объектов
+    page = await supply_service.get_supplies_json_by_user_data(
         limit=limit,
         user_data=user_data,
         is_wait_confirm=is_wait_confirm,
+        cursor=cursor,
+        filters=filters,
+        include_archive=include_archive,
     )
          
-    return {"supplies": [supply.dict for supply in supplies]}
+    return Response(content=page.content, media_type="application/json")
+
+
+@router.get("/events")
+async def get_supply_events(
+    user_data: UserDataRedis = Depends(get_user_from_redis),
+):
+    """Stream of supply events (SSE)"""
+    # соединение с БД из пула не занимается - события приходят
+    # через общее для воркера соединение-слушатель
+    return StreamingResponse(
+        supply_events.stream(organizer_id=user_data.organizer_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_supplies(
+    export_format: SupplyExportFormat = Query(SupplyExportFormat.csv, alias="format"),
+    is_wait_confirm: bool = Query(False),
+    include_archive: bool = Query(False),
+    filters: SupplyFilter = Depends(get_supply_filter),
+    user_data: UserDataRedis = Depends(get_user_from_redis),
+):
+    """Export supplies history (CSV or NDJSON stream)"""
+    # у выгрузки своя сессия: соединение из пула занимается только
+    # на время чтения серверного курсора и возвращается сразу после последней строки
+    session = db_core.session_maker()
+    stream = SupplyService(session=session).export_supplies(
+        user_data=user_data,
+        export_format=export_format,
+        is_wait_confirm=is_wait_confirm,
+        filters=filters,
+        include_archive=include_archive,
+    )
+
+    async def content():
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await session.close()
+
+    media_type = "text/csv" if export_format == SupplyExportFormat.csv else "application/x-ndjson"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="supplies.{export_format.value}"'
+        },
+    )
+
+
+@router.post("/queue/claim")
+async def claim_supplies(
+    limit: int = Query(10),
+    user_data: UserDataRedis = Depends(check_is_supplier),
+    session: AsyncSession = Depends(get_session)
+):
+    """Claim next supplies waiting for confirm"""
+    supply_service = SupplyService(session=session)
+    page = await supply_service.claim_wait_confirm_supplies(
+        user_data=user_data,
+        limit=limit
+    )
+
+    await session.commit()
+    return Response(content=page.content, media_type="application/json")
+
+
+@router.delete("/queue/{supply_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_supply(
+    supply_id: int,
+    user_data: UserDataRedis = Depends(check_is_supplier),
+    session: AsyncSession = Depends(get_session)
+):
+    """Return claimed supply to confirm queue"""
+    supply_service = SupplyService(session=session)
+    await supply_service.release_supply_claim(
+        user_data=user_data,
+        supply_id=supply_id
+    )
+
+    await session.commit()
+    return {"details": "No content"}
 
 
 @router.post("", status_code=status.HTTP_204_NO_CONTENT)
@@ -88,7 +210,8 @@ async def assemble_or_cancel_supply(
             id=supply_id,
             status=status_data.status
         ),
-        supplier_id=user_data.organizer_id
+        supplier_id=user_data.organizer_id,
+        user_company_id=user_data.user_company_id
     )
     
     await session.commit()
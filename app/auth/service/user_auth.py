@@ -19,7 +19,7 @@ class UserAuthService:
         """Получить пользователя по email"""
         if (user := await self.user_repo.get_by_email(email)) is None:
             raise NotFoundError("User not found")
-        if not hashing_password.check_password(password=password, hash=user.password):
+        if not await hashing_password.check_password(password=password, hash=user.password):
             raise NotFoundError("User not found")
         return user
     
@@ -28,7 +28,7 @@ class UserAuthService:
         # проверка на существование пользователя в БД
         if await self.user_repo.get_by_email(email=email):
             raise BadRequestError("User already exists")
-        hashed_password = hashing_password.create_hash(password)
+        hashed_password = await hashing_password.create_hash(password)
         user = UserItem(
             name=name, 
             email=email, 
@@ -1,24 +1,74 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 from bcrypt import hashpw, gensalt, checkpw
 
+from core import settings
+from utils.metrics import metrics
+
+
+Result = TypeVar("Result")
+
 
 class HashPassword:
-    """Класс для хэширования пользовательского пароля, 
-    а также его проверка на совпадение с хэшем"""
-    def create_hash(
+    """Класс для хэширования пользовательского пароля,
+    а также его проверка на совпадение с хэшем.
+    bcrypt выполняется в отдельном пуле потоков и не блокирует цикл событий,
+    число одновременных операций ограничено числом потоков пула,
+    остальные ждут в очереди пула"""
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="bcrypt"
+        )
+        self._pending = 0 # изменяется только из цикла событий
+
+        metrics.register_gauge("bcrypt_pending", lambda: self._pending)
+        metrics.register_gauge("bcrypt_queued", lambda: max(self._pending - self.max_workers, 0))
+
+    async def create_hash(
             self,
             password: str
     ) -> bytes:
-        return hashpw(password.encode(), gensalt())
+        return await self._run(hashpw, password.encode(), gensalt())
 
-    def check_password(
+    async def check_password(
             self,
             password: str,
             hash: bytes
     ) -> bool:
-        return checkpw(password.encode(), hash) # True если совпадает
+        return await self._run(checkpw, password.encode(), hash) # True если совпадает
+
+    def shutdown(self) -> None:
+        """Остановить пул потоков, не дожидаясь операций в очереди"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func: Callable[..., Result], *args) -> Result:
+        """Выполнить операцию bcrypt в пуле и учесть время ожидания в очереди"""
+        queued_at = time.perf_counter()
+
+        def run() -> Result:
+            started_at = time.perf_counter()
+            metrics.inc("bcrypt_queue_wait_seconds", started_at - queued_at)
+            try:
+                return func(*args)
+            finally:
+                metrics.inc("bcrypt_run_seconds", time.perf_counter() - started_at)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+        finally:
+            self._pending -= 1
+            metrics.inc("bcrypt_operations")
 
 
-hashing_password = HashPassword()
+hashing_password = HashPassword(
+    max_workers=settings.auth.password_hashing_workers
+)
 
 
 __all__ = ['hashing_password']
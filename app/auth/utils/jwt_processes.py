@@ -1,24 +1,64 @@
 from typing import Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta, datetime, timezone
+from pathlib import Path
 import uuid
 
 import jwt
 
 from core import settings
+from core.config import AuthSettings
+from auth.utils.token_cache import verified_token_cache
 
 
 ACCESS_TOKEN_TYPE = 'access'
 REFRESH_TOKEN_TYPE = 'refresh'
 TOKEN_TYPE_FIELD = 'type'
 
+# kid токенов, выпущенных до появления kid в заголовке
+DEFAULT_KEY_ID = 'default'
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """Ключ JWT, загруженный из PEM один раз при старте"""
+    kid: str
+    algorithm: str
+    key: Any # объект ключа cryptography
+
+
+def load_jwt_key(kid: str, path: Path, algorithm: str) -> JWTKey:
+    """Загрузить ключ и проверить, что он подходит алгоритму"""
+    key = jwt.get_algorithm_by_name(algorithm).prepare_key(path.read_text())
+    return JWTKey(kid=kid, algorithm=algorithm, key=key)
+
+
+def load_verification_keys(auth: AuthSettings) -> Dict[str, JWTKey]:
+    """Открытые ключи по kid: текущий и прежние, подписи которых еще принимаются"""
+    keys = {
+        key.kid: load_jwt_key(key.kid, key.public_key, key.algorithm)
+        for key in auth.verification_keys
+    }
+    keys[auth.key_id] = load_jwt_key(auth.key_id, auth.public_key, auth.algorithm)
+    return keys
+
 
 @dataclass(frozen=True)
 class JWT:
-    """Класс для создания JWT токена, а также его декодирование"""
-    private_key: str = settings.auth.private_key.read_text()
-    public_key: str = settings.auth.public_key.read_text()
-    algorithm: str = settings.auth.algorithm
+    """
+    Класс для создания JWT токена, а также его декодирование.
+    Токены подписываются текущим ключом с его kid в заголовке,
+    проверяются ключом с kid из заголовка - после ротации ключа
+    ранее выданные токены действуют, пока прежний ключ есть в verification_keys
+    """
+    signing_key: JWTKey = field(default_factory=lambda: load_jwt_key(
+        settings.auth.key_id,
+        settings.auth.private_key,
+        settings.auth.algorithm
+    ))
+    verification_keys: Dict[str, JWTKey] = field(
+        default_factory=lambda: load_verification_keys(settings.auth)
+    )
 
     def encode_jwt(
         self,
@@ -42,8 +82,9 @@ class JWT:
 
         encoded = jwt.encode(
             to_encode,
-            self.private_key,
-            algorithm=self.algorithm
+            self.signing_key.key,
+            algorithm=self.signing_key.algorithm,
+            headers={"kid": self.signing_key.kid}
         )
         return encoded
 
@@ -51,12 +92,19 @@ class JWT:
         self,
         token: str | bytes,
     ) -> Dict[str, Any]:
-        """JWT декодирование"""
+        """JWT декодирование, уже проверенные токены берутся из кэша до истечения exp"""
+        if (decoded := verified_token_cache.get(token)) is not None:
+            return decoded
+        kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KEY_ID)
+        if (key := self.verification_keys.get(kid)) is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        # алгоритм берется из настроек ключа, а не из заголовка токена
         decoded = jwt.decode(
             token,
-            self.public_key,
-            algorithms=[self.algorithm]
+            key.key,
+            algorithms=[key.algorithm]
         )
+        verified_token_cache.put(token, decoded)
         return decoded
 
     def create_token(
@@ -0,0 +1,68 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core import settings
+from utils.metrics import metrics
+
+
+class VerifiedTokenCache:
+    """
+    LRU кэш уже проверенных JWT в памяти воркера.
+    Ключ - sha256 токена, запись действительна до exp токена,
+    поэтому повторные запросы с тем же токеном не проверяют подпись
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._tokens: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        metrics.register_gauge("jwt_cache_entries", lambda: len(self._tokens))
+
+    def get(self, token: str | bytes) -> Optional[Dict[str, Any]]:
+        """Получить данные проверенного токена, если срок его действия не истек"""
+        if self.max_entries <= 0:
+            return None
+        key = self._get_key(token)
+        entry = self._tokens.get(key)
+        if entry is None:
+            metrics.inc("jwt_cache_misses")
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            # истекший токен проверяется заново, чтобы получить ExpiredSignatureError
+            del self._tokens[key]
+            metrics.inc("jwt_cache_misses")
+            return None
+        self._tokens.move_to_end(key)
+        metrics.inc("jwt_cache_hits")
+        # копия, чтобы изменения вызывающего кода не попали в кэш
+        return dict(payload)
+
+    def put(self, token: str | bytes, payload: Dict[str, Any]) -> None:
+        """Добавить проверенный токен, токены без exp не кэшируются"""
+        if self.max_entries <= 0 or "exp" not in payload:
+            return
+        key = self._get_key(token)
+        self._tokens[key] = (float(payload["exp"]), dict(payload))
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.max_entries:
+            self._tokens.popitem(last=False)
+            metrics.inc("jwt_cache_evictions")
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    @staticmethod
+    def _get_key(token: str | bytes) -> bytes:
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
+
+
+verified_token_cache = VerifiedTokenCache(
+    max_entries=settings.auth.token_cache_max_entries
+)
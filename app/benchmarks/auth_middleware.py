@@ -0,0 +1,162 @@
+"""
+Замер накладных расходов FullAuthMiddleware на запрос.
+Сравнивает приложение без middleware, прежнюю реализацию через BaseHTTPMiddleware
+и текущую ASGI реализацию на JSON и потоковом ответе.
+Запросы отправляются напрямую в ASGI приложение, без сети и сервера:
+python -m benchmarks.auth_middleware --requests 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from jwt import ExpiredSignatureError
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import ASGIApp
+
+from auth.utils.jwt_processes import jwt_processes as _jwt
+from core.db import db_core
+
+from middlewares import FullAuthMiddleware
+
+
+STREAM_CHUNKS = 100
+STREAM_CHUNK = b"x" * 1024
+
+
+class BaseHTTPFullAuthMiddleware(BaseHTTPMiddleware):
+    """
+    Прежняя реализация FullAuthMiddleware для запроса с действующим токеном:
+    сессия создавалась на каждый запрос, даже если эндпоинт не обращается к БД
+    """
+    async def dispatch(
+            self,
+            request: Request,
+            call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        request.state.session = db_core.get_session()
+        access_token = request.cookies.get('Bearer-token')
+        refresh_token = request.cookies.get('Refresh-token')
+        new_access_token = False
+        try:
+            current_user_id = _jwt.decode_jwt(access_token).get('sub')
+        except ExpiredSignatureError:
+            current_user_id = _jwt.decode_jwt(refresh_token).get('sub')
+            new_access_token = True
+
+        request.state.user_id = current_user_id
+        response = await call_next(request)
+        if new_access_token:
+            response.set_cookie('Bearer-token', access_token)
+        return response
+
+
+async def json_endpoint(request: Request) -> Response:
+    return JSONResponse({"user_id": request.state.user_id})
+
+
+async def stream_endpoint(request: Request) -> Response:
+    async def chunks():
+        for _ in range(STREAM_CHUNKS):
+            yield STREAM_CHUNK
+    return StreamingResponse(chunks())
+
+
+class StubUserMiddleware:
+    """Пользователь для приложения без аутентификации"""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        scope.setdefault("state", {})["user_id"] = "1"
+        await self.app(scope, receive, send)
+
+
+def make_app(middleware: type) -> Starlette:
+    app = Starlette(routes=[
+        Route("/json", json_endpoint),
+        Route("/stream", stream_endpoint),
+    ])
+    app.add_middleware(middleware)
+    return app
+
+
+async def request_app(app: ASGIApp, path: str, cookie: bytes) -> int:
+    """Выполнить GET запрос к ASGI приложению, вернуть размер тела ответа"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"cookie", cookie)],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+        "state": {},
+    }
+    body_size = 0
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # как сервер: отключение клиента приходит только после завершения ответа
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal body_size
+        if message["type"] == "http.response.body":
+            body_size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    await app(scope, receive, send)
+    return body_size
+
+
+async def measure(app: ASGIApp, path: str, cookie: bytes, requests: int) -> float:
+    """Среднее время запроса в микросекундах"""
+    for _ in range(min(requests, 200)):
+        await request_app(app, path, cookie)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request_app(app, path, cookie)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    cookie = f"Bearer-token={_jwt.create_access_token(1)}".encode()
+    apps: Dict[str, ASGIApp] = {
+        "no auth middleware": make_app(StubUserMiddleware),
+        "BaseHTTPMiddleware": make_app(BaseHTTPFullAuthMiddleware),
+        "pure ASGI": make_app(FullAuthMiddleware),
+    }
+    try:
+        for path in ("/json", "/stream"):
+            results: List[float] = []
+            print(f"GET {path}, {requests} requests")
+            for name, app in apps.items():
+                results.append(await measure(app, path, cookie, requests))
+                overhead = results[-1] - results[0]
+                print(f"  {name:<20} {results[-1]:8.1f} us/request  overhead {overhead:+8.1f} us")
+    finally:
+        await db_core.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().requests))
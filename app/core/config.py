@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List, Literal
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -42,6 +43,10 @@ class ApiDashboardPrefix:
     prefix: str = "/dashboard"
     tags: list[str] = ["Dashboard"]
 
+class ApiMetricsPrefix:
+    prefix: str = "/metrics"
+    tags: list[str] = ["Metrics"]
+
 class ApiSetting:
     users: ApiUsersPrefix = ApiUsersPrefix()
     organizers: ApiOrganizersPrefix = ApiOrganizersPrefix()
@@ -52,14 +57,107 @@ class ApiSetting:
     suppliers: ApiSuppliersPrefix = ApiSuppliersPrefix()
     linkcode: ApiLinkCodePrefix = ApiLinkCodePrefix()
     dashboard: ApiDashboardPrefix = ApiDashboardPrefix()
+    metrics: ApiMetricsPrefix = ApiMetricsPrefix()
+
+
+JWTAlgorithm = Literal['RS256', 'ES256', 'EdDSA']
+
+
+class JWTVerificationKey(BaseModel):
+    """Открытый ключ, подписи которого еще принимаются после ротации"""
+    kid: str
+    public_key: Path
+    algorithm: JWTAlgorithm = 'RS256'
 
 
 class AuthSettings(BaseSettings):
+    # текущая пара ключей: ей подписываются новые токены, kid - в заголовке токена
     private_key: Path = CORE_DIR / 'certs' / 'private.pem'
     public_key: Path = CORE_DIR / 'certs' / 'public.pem'
-    algorithm: str = 'RS256'
+    algorithm: JWTAlgorithm = 'RS256'
+    key_id: str = 'default' # токены без kid (выпущенные до ротации) проверяются ключом 'default'
+    verification_keys: List[JWTVerificationKey] = [] # прежние ключи на время жизни их токенов
     access_token_expire_minutes: int = 720 # 12 hrs -> 720 minutes
     refresh_token_expire_minutes: int = 4320 # 24 hrs
+    token_cache_max_entries: int = 10_000 # проверенных токенов в памяти воркера, 0 - без кэша
+    password_hashing_workers: int = 2 # потоков bcrypt - одновременных хэширований и проверок паролей
+
+
+class SupplyQueueConfig(BaseModel):
+    """Класс настроек очереди подтверждения поставок"""
+    lease_seconds: int = 300 # время, на которое поставка закрепляется за сотрудником
+    max_claim: int = 50 # максимум поставок, забираемых за один запрос
+
+
+class SupplyEventsConfig(BaseModel):
+    """Класс настроек потока событий поставок"""
+    channel: str = "supply_events" # канал LISTEN/NOTIFY
+    keepalive_seconds: int = 15 # интервал keepalive-комментариев в SSE
+    queue_size: int = 100 # размер очереди событий одного клиента
+    reconnect_delay_seconds: float = 1.0 # первая задержка переподключения слушателя
+    reconnect_max_delay_seconds: float = 30.0
+
+
+class SupplyExportConfig(BaseModel):
+    """Класс настроек выгрузки истории поставок"""
+    batch_size: int = 1000 # строк, читаемых из серверного курсора за раз
+
+
+class SupplyArchiveConfig(BaseModel):
+    """Класс настроек архивации закрытых поставок"""
+    enabled: bool = False # периодический запуск архивации в воркере приложения
+    older_than_days: int = 90 # возраст закрытой поставки с последнего изменения
+    batch_size: int = 500 # поставок, переносимых за одну транзакцию
+    interval_seconds: int = 3600
+    # отмененные поставки встречаются в обоих написаниях статуса
+    closed_statuses: list[str] = ["adopted", "canceled", "cancelled"]
+
+
+class SupplyPartitionsConfig(BaseModel):
+    """Класс настроек месячных секций таблицы поставок"""
+    enabled: bool = True # создание будущих секций в воркере приложения
+    months_ahead: int = 3 # на сколько месяцев вперед держать секции
+    interval_seconds: int = 86400
+
+
+class CatalogConfig(BaseModel):
+    """Класс настроек каталога товаров"""
+    default_limit: int = 50
+    max_limit: int = 100
+    cache_enabled: bool = True # кэш страниц каталога в Redis
+    cache_ttl_seconds: int = 300 # время жизни страницы, если версии не изменились
+    facets_cache_ttl_seconds: int = 60 # время жизни количества товаров по категориям и поставщикам
+    search_default_limit: int = 20
+    search_max_limit: int = 50
+    search_min_query_length: int = 2
+    search_similarity_threshold: float = 0.4 # порог word_similarity для поиска с опечатками
+
+
+class ProductImportConfig(BaseModel):
+    """Класс настроек массового импорта товаров"""
+    batch_size: int = 5000 # строк, загружаемых одним COPY
+    max_rows: int = 100_000 # максимум строк в одном файле
+    max_errors: int = 100 # ошибок строк, возвращаемых подробно
+
+
+class ProductVersionsCompactionConfig(BaseModel):
+    """Класс настроек удаления неиспользуемых версий продуктов"""
+    enabled: bool = False # периодический запуск в воркере приложения
+    batch_size: int = 1000 # версий, удаляемых за одну транзакцию
+    interval_seconds: int = 86400
+
+
+class ProductVersionCacheConfig(BaseModel):
+    """Класс настроек кэша версий продуктов в памяти воркера"""
+    max_entries: int = 50_000
+    warm_up_entries: int = 10_000 # версий, загружаемых при старте, 0 - без прогрева
+
+
+class MetricsConfig(BaseModel):
+    """Класс настроек счетчиков воркера"""
+    # сети, из которых доступен /metrics, адрес клиента - request.client,
+    # за прокси uvicorn должен получать его из X-Forwarded-For (--proxy-headers)
+    allowed_networks: list[str] = ["127.0.0.1/32", "::1/128"]
 
 
 class RunConfig:
@@ -100,6 +198,16 @@ class Settings(BaseSettings):
     api: ApiSetting = ApiSetting()
     database: DataBaseConfig
     auth: AuthSettings = AuthSettings()
+    supply_queue: SupplyQueueConfig = SupplyQueueConfig()
+    supply_events: SupplyEventsConfig = SupplyEventsConfig()
+    supply_export: SupplyExportConfig = SupplyExportConfig()
+    supply_archive: SupplyArchiveConfig = SupplyArchiveConfig()
+    supply_partitions: SupplyPartitionsConfig = SupplyPartitionsConfig()
+    catalog: CatalogConfig = CatalogConfig()
+    product_import: ProductImportConfig = ProductImportConfig()
+    product_versions_compaction: ProductVersionsCompactionConfig = ProductVersionsCompactionConfig()
+    product_version_cache: ProductVersionCacheConfig = ProductVersionCacheConfig()
+    metrics: MetricsConfig = MetricsConfig()
 
 
 settings = Settings()
@@ -1,13 +1,13 @@
 from typing import AsyncGenerator
-from asyncio import current_task
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
     async_sessionmaker,
-    async_scoped_session
 )
 from core import settings
+from utils.metrics import metrics
 
 
 class DBCore:
@@ -34,6 +34,7 @@ class DBCore:
             autocommit=False,
             expire_on_commit=False, # сами следим за актуальностью данных, при обращении
         )
+        self._register_pool_metrics()
 
     # Оставляем callable объектом для возможности вызова через Dependes()
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
@@ -41,11 +42,22 @@ class DBCore:
         async with self.session_maker() as session:
             yield session
 
-    @property
-    async def get_async_session(self) -> AsyncSession:
-        """Создание и возврат объекта асинхронной сессии"""
-        session = async_scoped_session(self.session_maker, scopefunc=current_task)
-        return session()
+    def get_session(self) -> AsyncSession:
+        """
+        Создание объекта асинхронной сессии.
+        Соединение берется из пула при первом запросе к БД и возвращается при закрытии сессии
+        """
+        return self.session_maker()
+
+    def _register_pool_metrics(self) -> None:
+        """Счетчики выдачи соединений из пула и показатели его заполненности"""
+        sync_engine = self.engine.sync_engine
+        # события пула, подписанные через engine, сохраняются после dispose
+        event.listen(sync_engine, "connect", lambda *args: metrics.inc("db_pool_connects"))
+        event.listen(sync_engine, "checkout", lambda *args: metrics.inc("db_pool_checkouts"))
+        event.listen(sync_engine, "checkin", lambda *args: metrics.inc("db_pool_checkins"))
+        metrics.register_gauge("db_pool_checked_out", lambda: sync_engine.pool.checkedout())
+        metrics.register_gauge("db_pool_size", lambda: sync_engine.pool.size())
 
     async def dispose(self) -> None:
         """Выключение и закрытие конекта с БД"""
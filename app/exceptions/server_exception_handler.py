@@ -5,7 +5,7 @@ from fastapi.responses import ORJSONResponse
 from sqlalchemy.exc import DataError, IntegrityError, OperationalError, SQLAlchemyError
 from redis.exceptions import RedisError
 
-from exceptions.utils import ROLLBACK_SESSION_METHODS
+from exceptions.utils import rollback_request_session
 
 from logger import logger
 
@@ -19,7 +19,7 @@ def server_error_handlers(app: FastAPI) -> None:
             exc: SQLAlchemyError
     ):
         """"Обработчик ошибок базы данных"""
-        await request.state.session.rollback() if request.method in ROLLBACK_SESSION_METHODS else None
+        await rollback_request_session(request)
 
         logger.critical(
             msg="Internal database error",
@@ -53,7 +53,7 @@ def server_error_handlers(app: FastAPI) -> None:
             exc: RedisError
     ):
         """Обработчик ошибок redis"""
-        await request.state.session.rollback() if request.method in ROLLBACK_SESSION_METHODS else None
+        await rollback_request_session(request)
 
         logger.critical(
             msg="Redis service error",
@@ -74,7 +74,7 @@ def server_error_handlers(app: FastAPI) -> None:
             exc: Exception
     ):
         """Обработчик необработанных (неизвестных) исключений"""
-        await request.state.session.rollback() if request.method in ROLLBACK_SESSION_METHODS else None
+        await rollback_request_session(request)
 
         logger.critical(
             msg="Internal unhandled server error",
@@ -5,7 +5,7 @@ from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError
 from exceptions.exceptions import NotFoundError, BadRequestError, ForbidenError
 
-from exceptions.utils import ROLLBACK_SESSION_METHODS
+from exceptions.utils import rollback_request_session
 
 
 def user_error_handlers(app: FastAPI) -> None:
@@ -31,7 +31,7 @@ def user_error_handlers(app: FastAPI) -> None:
             exc: BadRequestError
     ):
         """Обработчик ошибок 400"""
-        await request.state.session.rollback() if request.method in ROLLBACK_SESSION_METHODS else None
+        await rollback_request_session(request)
 
         return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,7 +62,7 @@ def user_error_handlers(app: FastAPI) -> None:
             exc: NotFoundError
     ):
         """Обработчик ошибок 404"""
-        await request.state.session.rollback() if request.method in ROLLBACK_SESSION_METHODS else None
+        await rollback_request_session(request)
 
         return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,3 +1,6 @@
+from fastapi import Request
+
+
 
 
 ROLLBACK_SESSION_METHODS = [
@@ -5,4 +8,11 @@ ROLLBACK_SESSION_METHODS = [
     "PUT",
     "PATCH",
     "DELETE"
-]
\ No newline at end of file
+]
+
+
+async def rollback_request_session(request: Request) -> None:
+    """Откатить транзакцию сессии запроса, если сессия была создана"""
+    session = getattr(request.state, "session", None)
+    if session is not None and request.method in ROLLBACK_SESSION_METHODS:
+        await session.rollback()
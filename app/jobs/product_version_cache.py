@@ -0,0 +1,26 @@
+"""
+Прогрев кэша версий продуктов в памяти воркера.
+Запускается один раз при старте приложения из lifespan
+"""
+from core import settings
+from core.db import db_core
+
+from service.repositories import ProductVersionRepository
+from service.product_version_cache import product_version_cache
+
+from logger import logger
+
+
+async def warm_up_product_version_cache() -> int:
+    """Загрузить в кэш версии, на которые недавно ссылались товары и поставки"""
+    limit = settings.product_version_cache.warm_up_entries
+    if limit <= 0:
+        return 0
+    async with db_core.session_maker() as session:
+        versions = await ProductVersionRepository(session).get_recently_referenced(limit)
+    product_version_cache.put_many(versions)
+    logger.info(
+        f"product version cache warmed up: {len(product_version_cache)} versions, "
+        f"~{product_version_cache.size_bytes // 1024} KiB"
+    )
+    return len(versions)
@@ -0,0 +1,48 @@
+"""
+Фоновое удаление неиспользуемых версий продуктов.
+Запускается периодически из lifespan приложения (settings.product_versions_compaction.enabled)
+или разово командой: python -m jobs.product_versions_compaction
+"""
+import asyncio
+
+from core import settings
+from core.db import db_core
+
+from service.bussines_services.product_version_compaction import ProductVersionCompactionService
+
+from logger import logger
+
+
+async def compact_product_versions() -> int:
+    """Удалить все неиспользуемые версии, каждая пачка в своей транзакции"""
+    total = 0
+    while True:
+        async with db_core.session_maker() as session:
+            deleted = await ProductVersionCompactionService(session).delete_orphaned_versions_batch()
+            await session.commit()
+        total += deleted
+        if deleted < settings.product_versions_compaction.batch_size:
+            return total
+
+
+async def run_product_versions_compaction_job() -> None:
+    """Периодический запуск удаления версий до отмены задачи"""
+    while True:
+        try:
+            deleted = await compact_product_versions()
+            logger.info(f"deleted orphaned product versions: {deleted}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("product versions compaction job failed")
+        await asyncio.sleep(settings.product_versions_compaction.interval_seconds)
+
+
+if __name__ == "__main__":
+    async def main():
+        try:
+            print(f"deleted orphaned product versions: {await compact_product_versions()}")
+        finally:
+            await db_core.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+Фоновая архивация закрытых поставок.
+Запускается периодически из lifespan приложения (settings.supply_archive.enabled)
+или разово командой: python -m jobs.supply_archive
+"""
+import asyncio
+
+from core import settings
+from core.db import db_core
+
+from service.bussines_services.supply_archive import SupplyArchiveService
+
+from logger import logger
+
+
+async def archive_closed_supplies() -> int:
+    """Перенести в архив все подходящие поставки, каждая пачка в своей транзакции"""
+    total = 0
+    while True:
+        async with db_core.session_maker() as session:
+            archived = await SupplyArchiveService(session).archive_closed_supplies_batch()
+            await session.commit()
+        total += archived
+        if archived < settings.supply_archive.batch_size:
+            return total
+
+
+async def run_supply_archive_job() -> None:
+    """Периодический запуск архивации до отмены задачи"""
+    while True:
+        try:
+            archived = await archive_closed_supplies()
+            logger.info(f"archived supplies: {archived}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("supply archive job failed")
+        await asyncio.sleep(settings.supply_archive.interval_seconds)
+
+
+if __name__ == "__main__":
+    async def main():
+        try:
+            print(f"archived supplies: {await archive_closed_supplies()}")
+        finally:
+            await db_core.dispose()
+
+    asyncio.run(main())
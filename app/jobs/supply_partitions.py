@@ -0,0 +1,76 @@
+"""
+Создание будущих месячных секций таблицы поставок.
+Запускается периодически из lifespan приложения (settings.supply_partitions.enabled)
+или разово командой: python -m jobs.supply_partitions
+
+Поставки, для месяца которых нет секции, попадают в supplys_default,
+после этого ensure_supplys_partitions не может создать секцию их месяца.
+Задача пишет ошибку в лог и показатель supplys_default_months в /metrics.
+Строки месяца переносятся в его секцию в отдельной транзакции:
+SELECT supplys_move_default_month('2025-08-01')
+"""
+import asyncio
+from datetime import datetime
+from typing import List
+
+from core import settings
+from core.db import db_core
+
+from service.repositories import SupplyRepository
+from utils.metrics import metrics
+
+from logger import logger
+
+
+# месяцы в supplys_default по последней проверке
+_default_partition_months: List[datetime] = []
+metrics.register_gauge("supplys_default_months", lambda: len(_default_partition_months))
+
+
+async def check_default_partition() -> List[datetime]:
+    """Найти месяцы поставок в секции по умолчанию и сообщить о них в лог"""
+    global _default_partition_months
+    async with db_core.session_maker() as session:
+        _default_partition_months = await SupplyRepository(session).get_default_partition_months()
+    if _default_partition_months:
+        logger.error(
+            "supplys_default holds supplies for months "
+            f"{', '.join(month.strftime('%Y-%m') for month in _default_partition_months)}, "
+            "partitions for these months cannot be created until the rows are moved"
+        )
+    return _default_partition_months
+
+
+async def ensure_supply_partitions() -> int:
+    """Создать недостающие секции на settings.supply_partitions.months_ahead месяцев вперед"""
+    async with db_core.session_maker() as session:
+        created = await SupplyRepository(session).ensure_partitions(
+            months_ahead=settings.supply_partitions.months_ahead
+        )
+        await session.commit()
+    return created
+
+
+async def run_supply_partitions_job() -> None:
+    """Периодическое создание секций до отмены задачи"""
+    while True:
+        try:
+            await check_default_partition()
+            created = await ensure_supply_partitions()
+            logger.info(f"created supply partitions: {created}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("supply partitions job failed")
+        await asyncio.sleep(settings.supply_partitions.interval_seconds)
+
+
+if __name__ == "__main__":
+    async def main():
+        try:
+            await check_default_partition()
+            print(f"created supply partitions: {await ensure_supply_partitions()}")
+        finally:
+            await db_core.dispose()
+
+    asyncio.run(main())
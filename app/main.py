@@ -1,8 +1,15 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 import uvicorn
 
 from core import settings
 from core.db import db_core
+from service.supply_events import supply_events
+from jobs.supply_archive import run_supply_archive_job
+from jobs.supply_partitions import run_supply_partitions_job
+from jobs.product_versions_compaction import run_product_versions_compaction_job
+from jobs.product_version_cache import warm_up_product_version_cache
+from auth.utils.hashing_password import hashing_password
 
 from api import router as api_router
 from auth import router as auth_router
@@ -16,6 +23,7 @@ from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from middlewares import FullAuthMiddleware
+from logger import logger
 
 
 from exceptions.server_exception_handler import server_error_handlers
@@ -25,8 +33,26 @@ from exceptions.user_exception_handlers import user_error_handlers
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    try:
+        await warm_up_product_version_cache()
+    except Exception:
+        # без прогрева кэш заполнится по мере запросов
+        logger.exception("product version cache warm up failed")
+    background_tasks = []
+    if settings.supply_partitions.enabled:
+        background_tasks.append(asyncio.create_task(run_supply_partitions_job()))
+    if settings.supply_archive.enabled:
+        background_tasks.append(asyncio.create_task(run_supply_archive_job()))
+    if settings.product_versions_compaction.enabled:
+        background_tasks.append(asyncio.create_task(run_product_versions_compaction_job()))
     yield
     # shutdown
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await supply_events.stop()
+    hashing_password.shutdown()
     print("dispose engine")
     await db_core.dispose()
     
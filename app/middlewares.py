@@ -1,20 +1,15 @@
-from typing import Awaitable, Callable
-
-
-from fastapi import FastAPI
+from typing import Callable, List, Optional, Tuple
 
 from jwt import ExpiredSignatureError
 
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from auth.utils.jwt_processes import jwt_processes as _jwt
 
 from core import settings
-from core.db import db_core
-from auth.utils.jwt_processes import jwt_processes as jwt
 
 
 # Включение/выключение аутентификации. Используется False при дебаге
@@ -32,29 +27,55 @@ PUBLIC_PATHS: set[str] = {
     "/redoc"
 }
 
+LOGOUT_PATH = "/auth/logout"
 
-class FullAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-            self,
-            request: Request,
-            call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
 
-        path = request.url.path
-        new_access_token = False
+class FullAuthMiddleware:
+    """
+    Аутентификация по JWT в cookie Bearer-token/Refresh-token.
+    Чистый ASGI middleware: приложение вызывается в той же задаче, тело ответа
+    не буферизуется, cookie добавляются в заголовки при начале ответа.
+    Сессию БД создает зависимость get_session при первом обращении,
+    middleware закрывает её после отправки ответа, в том числе потокового
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        request.state.session = await db_core.get_async_session
+        request = Request(scope)
+        try:
+            await self._authenticate(request, scope, receive, send)
+        finally:
+            if (session := getattr(request.state, "session", None)) is not None:
+                # незафиксированная транзакция откатывается, соединение возвращается в пул
+                await session.close()
 
+    async def _authenticate(
+            self,
+            request: Request,
+            scope: Scope,
+            receive: Receive,
+            send: Send
+    ) -> None:
+        path = scope["path"]
+        new_access_token = False
 
         if not AUTH_ON:
             request.state.user_id = "test"
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         elif path in PUBLIC_PATHS:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        elif request.method == "OPTIONS":
-            return await call_next(request)
+        elif scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
 
         access_token = request.cookies.get('Bearer-token')
         refresh_token = request.cookies.get('Refresh-token')
@@ -66,51 +87,75 @@ class FullAuthMiddleware(BaseHTTPMiddleware):
 
         current_user_id = None
         try:
-            current_user_id = _jwt.decode_jwt(access_token).get('sub')
+            # без cookie пользователь не аутентифицирован, а не ошибка декодирования
+            if access_token:
+                current_user_id = _jwt.decode_jwt(access_token).get('sub')
         except ExpiredSignatureError as e:
             current_user_id = _jwt.decode_jwt(refresh_token).get('sub')
             new_access_token = True
 
-        # get db session
-        request.state.session = db_core.get_session()
-
-        # current_user = await UserService().get_by_id(uow, current_user_id) # can be used for request.state.current_user
-        if not current_user_id:  # before current_user
+        if not current_user_id:
             if path in UNAUTHENTICATED_ONLY_PATHS:
-                response = await call_next(request)
-                refresh_token = _jwt.create_refresh_token(request.state.user_id)
-                access_token = _jwt.create_access_token(request.state.user_id)
-                response.set_cookie('Refresh-token', refresh_token)
-                response.set_cookie('Bearer-token', access_token)
-                return response
+                # user_id выставляет эндпоинт входа/регистрации до начала ответа
+                def get_login_cookies() -> List[Tuple[bytes, bytes]]:
+                    user_id = getattr(request.state, "user_id", None)
+                    if user_id is None:
+                        return []
+                    return _get_cookie_headers(set_cookies={
+                        'Refresh-token': _jwt.create_refresh_token(user_id),
+                        'Bearer-token': _jwt.create_access_token(user_id),
+                    })
+                await self.app(scope, receive, _with_cookies(send, get_login_cookies))
+                return
             else:
                 # raise UnauthenticatedError
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": 'Unauthenticated'}
                 )
+                await response(scope, receive, send)
+                return
 
         if path in UNAUTHENTICATED_ONLY_PATHS:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
                 content={"detail": "This path is only for unauthenticated users"}
             )
-
-        elif path not in UNAUTHENTICATED_ONLY_PATHS and path not in PUBLIC_PATHS:
-            if path == "/auth/logout":
-                response = await call_next(request)
-                response.delete_cookie('Bearer-token')
-                response.delete_cookie('Refresh-token')
-                return response
-
-            request.state.user_id = current_user_id
-            response = await call_next(request)
-            if new_access_token:
-                response.set_cookie('Bearer-token', access_token)
-            return response
-
-        else:
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={"detail": "Forbidden"}
-            )
+            await response(scope, receive, send)
+            return
+
+        if path == LOGOUT_PATH:
+            logout_cookies = _get_cookie_headers(delete_cookies=('Bearer-token', 'Refresh-token'))
+            await self.app(scope, receive, _with_cookies(send, lambda: logout_cookies))
+            return
+
+        request.state.user_id = current_user_id
+        if new_access_token:
+            access_cookies = _get_cookie_headers(set_cookies={'Bearer-token': access_token})
+            send = _with_cookies(send, lambda: access_cookies)
+        await self.app(scope, receive, send)
+
+
+def _with_cookies(
+        send: Send,
+        get_cookies: Callable[[], List[Tuple[bytes, bytes]]]
+) -> Send:
+    """Обернуть send, добавляя заголовки Set-Cookie в начало ответа"""
+    async def send_with_cookies(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            message["headers"] = [*message.get("headers", []), *get_cookies()]
+        await send(message)
+    return send_with_cookies
+
+
+def _get_cookie_headers(
+        set_cookies: Optional[dict] = None,
+        delete_cookies: Tuple[str, ...] = ()
+) -> List[Tuple[bytes, bytes]]:
+    """Заголовки Set-Cookie с теми же атрибутами, что у Response.set_cookie/delete_cookie"""
+    response = Response()
+    for key, value in (set_cookies or {}).items():
+        response.set_cookie(key, value)
+    for key in delete_cookies:
+        response.delete_cookie(key)
+    return [header for header in response.raw_headers if header[0] == b"set-cookie"]
@@ -4,9 +4,10 @@ from .contracts import Contract
 from .user_companys import UserCompany
 from .link_codes import LinkCode
 
-from .supplys import Supply
+from .supplys import Supply, SupplyArticle
 from .products import Product
 from .product_versions import ProductVersion
 from .supply_products import SupplyProduct
 from .expense_companys import ExpenseCompany
 from .expense_supplier import ExpenseSupplier
+from .supplys_archive import SupplyArchive, SupplyProductArchive
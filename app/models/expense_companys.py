@@ -1,5 +1,5 @@
 from typing import TypedDict
-from sqlalchemy import ForeignKey, Integer, String, Enum
+from sqlalchemy import ForeignKey, Integer, String, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.db import Base
@@ -15,6 +15,16 @@ class ExpenseDict(TypedDict):
 class ExpenseCompany(Base):
     """Товары на складе компании"""
 
+    # одна запись склада на версию продукта у компании - ключ для upsert
+    __table_args__ = (
+        UniqueConstraint("company_id", "product_version_id"),
+        # проверка ссылок при удалении неиспользуемых версий продуктов
+        Index(
+            "ix_expense_companys_product_version_id",
+            "product_version_id"
+        ),
+    )
+
     company_id: Mapped[int] = mapped_column(
         ForeignKey("organizers.id"),
         nullable=False
@@ -1,5 +1,5 @@
 from typing import TypedDict
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.db import Base
@@ -15,6 +15,13 @@ class ExpenseDict(TypedDict):
 
 class ExpenseSupplier(Base):
     """Товары на складе компании"""
+    __table_args__ = (
+        # остатки товаров в каталоге компании
+        Index(
+            "ix_expense_suppliers_product_id_supplier_id",
+            "product_id", "supplier_id"
+        ),
+    )
 
     supplier_id: Mapped[int] = mapped_column(
         ForeignKey("organizers.id"),
@@ -3,8 +3,11 @@ from sqlalchemy import (
     String,
     Float,
     Enum,
-    Text
+    Text,
+    Computed,
+    Index
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.db import Base
@@ -17,10 +20,25 @@ class ProductVersionDict(TypedDict):
     price: float
     img_path: str
     description: str 
+    content_hash: str
 
 
 class ProductVersion(Base):
     """Версия товара"""
+    __table_args__ = (
+        # поиск товаров
+        Index(
+            "ix_product_versions_search_vector",
+            "search_vector",
+            postgresql_using="gin"
+        ),
+        Index(
+            "ix_product_versions_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
 
     name: Mapped[str] = mapped_column(
         String(255), 
@@ -52,6 +70,21 @@ class ProductVersion(Base):
         Text,
         nullable=True
     )
+    # хэш содержимого версии - одинаковые изменения не создают новую версию
+    content_hash: Mapped[str] = mapped_column(
+        String(64),
+        nullable=True,
+        index=True
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
 
     product = relationship(
         "Product", 
@@ -77,6 +110,7 @@ class ProductVersion(Base):
             category=self.category,
             price=self.price,
             img_path=self.img_path,
-            description=self.description
+            description=self.description,
+            content_hash=self.content_hash
         )
     
\ No newline at end of file
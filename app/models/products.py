@@ -25,7 +25,8 @@ class Product(Base):
     )
     product_version_id: Mapped[int] = mapped_column(
         ForeignKey("product_versions.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False,
+        index=True
     )
     supplier_id: Mapped[int] = mapped_column(
         ForeignKey("organizers.id", ondelete="CASCADE"),
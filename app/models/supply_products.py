@@ -1,7 +1,8 @@
 from typing import TypedDict
 from sqlalchemy import (
     Integer,
-    ForeignKey
+    ForeignKey,
+    Index
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -11,6 +12,7 @@ from core.db import Base
 class SuppliesProductDict(TypedDict):
     id: int
     supply_id: int
+    product_version_id: int
     product_id: int
     quantity: int
 
@@ -18,14 +20,39 @@ class SuppliesProductDict(TypedDict):
 class SupplyProduct(Base):
     """Объект поставки"""
 
+    __table_args__ = (
+        Index(
+            "ix_supply_products_supply_id",
+            "supply_id"
+        ),
+        # фильтр поставок по продукту
+        Index(
+            "ix_supply_products_product_version_id_supply_id",
+            "product_version_id", "supply_id"
+        ),
+        Index(
+            "ix_supply_products_product_id",
+            "product_id"
+        ),
+    )
+
+    # supplys секционирована по created_at, поэтому вместо внешнего ключа
+    # удаление продуктов вместе с поставкой выполняет триггер на supplys,
+    # а существование поставки при вставке проверяет триггер trg_supply_products_check_supply
     supply_id: Mapped[int] = mapped_column(
-        ForeignKey("supplys.id", ondelete="CASCADE"),
+        Integer,
         nullable=False
     )
     product_version_id: Mapped[int] = mapped_column(
         ForeignKey("product_versions.id", ondelete="CASCADE"),
         nullable=False
     )
+    # продукт, версия которого попала в поставку, - версия не ссылается на продукт,
+    # а текущая версия продукта меняется при его обновлении
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="SET NULL"),
+        nullable=True
+    )
     quantity: Mapped[int] = mapped_column(
         Integer,
         nullable=False
@@ -34,7 +61,7 @@ class SupplyProduct(Base):
     supply = relationship(
         "Supply", 
         back_populates="supply_products",
-        foreign_keys=[supply_id]
+        primaryjoin="foreign(SupplyProduct.supply_id) == Supply.id"
     )
     product_version = relationship(
         "ProductVersion", 
@@ -48,6 +75,7 @@ class SupplyProduct(Base):
             id=self.id,
             supply_id=self.supply_id,
             product_version_id=self.product_version_id,
+            product_id=self.product_id,
             quantity=self.quantity
         )
     
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import TypedDict
+from typing import TypedDict, Optional
+from datetime import datetime
 from sqlalchemy import (
     String,
     Enum,
@@ -7,9 +8,15 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Numeric,
-    Boolean
+    Boolean,
+    DateTime,
+    Index,
+    PrimaryKeyConstraint,
+    UniqueConstraint,
+    func
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import text
 
 from core.db import Base
 
@@ -23,16 +30,95 @@ class SupplyDict(TypedDict):
     is_wait_confirm: bool
     delivery_address: str
     total_price: float
+    claimed_by: Optional[int]
+    claimed_until: Optional[datetime]
+
+
+class SupplyArticle(Base):
+    """
+    Артикулы поставок, включая архивные.
+    Уникальность артикула в секционированной supplys ограничена месяцем,
+    строку при вставке поставки добавляет триггер trg_supplys_reserve_article
+    """
+    __tablename__ = "supply_articles"
+
+    id = None
+    created_at = None
+    updated_at = None
+
+    article: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=False
+    )
 
 
 class Supply(Base):
     """Поставки"""
 
+    # таблица секционирована по месяцам created_at (RANGE), поэтому
+    # первичный ключ и уникальность артикула включают ключ секционирования,
+    # глобальная уникальность артикула - в supply_articles
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        UniqueConstraint("article", "created_at"),
+        # индексы под keyset-пагинацию списка поставок по (created_at, id)
+        Index(
+            "ix_supplys_company_id_created_at_id",
+            "company_id", "created_at", "id"
+        ),
+        Index(
+            "ix_supplys_supplier_id_is_wait_confirm_created_at_id",
+            "supplier_id", "is_wait_confirm", "created_at", "id"
+        ),
+        # очередь ожидающих подтверждения поставок поставщика
+        Index(
+            "ix_supplys_supplier_id_created_at_id_wait_confirm",
+            "supplier_id", "created_at", "id",
+            postgresql_where=text("is_wait_confirm")
+        ),
+        # фильтры списка поставок по статусу и контрагенту
+        Index(
+            "ix_supplys_supplier_id_is_wait_confirm_status_created_at_id",
+            "supplier_id", "is_wait_confirm", "status", "created_at", "id"
+        ),
+        Index(
+            "ix_supplys_company_id_status_created_at_id",
+            "company_id", "status", "created_at", "id"
+        ),
+        Index(
+            "ix_supplys_supplier_id_is_wait_confirm_company_id_created_at_id",
+            "supplier_id", "is_wait_confirm", "company_id", "created_at", "id"
+        ),
+        Index(
+            "ix_supplys_company_id_supplier_id_created_at_id",
+            "company_id", "supplier_id", "created_at", "id"
+        ),
+        # выбор закрытых поставок для архивации
+        Index(
+            "ix_supplys_status_updated_at",
+            "status", "updated_at"
+        ),
+        # поиск по подстроке адреса доставки
+        Index(
+            "ix_supplys_delivery_address_trgm",
+            "delivery_address",
+            postgresql_using="gin",
+            postgresql_ops={"delivery_address": "gin_trgm_ops"}
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        primary_key=True
+    )
+
     # Уникальный артикул поставки
     article: Mapped[int] = mapped_column(
         BigInteger,
-        nullable=False,
-        unique=True
+        nullable=False
     )
     supplier_id: Mapped[int] = mapped_column(
         Integer,
@@ -69,6 +155,15 @@ class Supply(Base):
         Numeric,
         nullable=False
     )
+    # сотрудник поставщика, забравший поставку из очереди подтверждения, и срок аренды
+    claimed_by: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("user_companys.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    claimed_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime,
+        nullable=True
+    )
 
     #relationship
     supplier = relationship(
@@ -81,10 +176,12 @@ class Supply(Base):
         back_populates="supplies_as_company", 
         foreign_keys=[company_id]
     )
+    # внешнего ключа на секционированную таблицу по одному id нет,
+    # связь задается условием соединения
     supply_products = relationship(
         "SupplyProduct", 
         back_populates="supply",
-        foreign_keys="[SupplyProduct.supply_id]"
+        primaryjoin="Supply.id == foreign(SupplyProduct.supply_id)"
     )
 
     @property
@@ -97,6 +194,8 @@ class Supply(Base):
             status=self.status,
             is_wait_confirm=self.is_wait_confirm,
             delivery_address=self.delivery_address,
-            total_price=self.total_price
+            total_price=self.total_price,
+            claimed_by=self.claimed_by,
+            claimed_until=self.claimed_until
         )
     
\ No newline at end of file
@@ -0,0 +1,97 @@
+from datetime import datetime
+from sqlalchemy import (
+    String,
+    BigInteger,
+    Integer,
+    ForeignKey,
+    Text,
+    Numeric,
+    Boolean,
+    DateTime,
+    Index,
+    func
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.db import Base
+
+
+class SupplyArchive(Base):
+    """Архив закрытых поставок"""
+    __tablename__ = "supplys_archive"
+
+    __table_args__ = (
+        Index(
+            "ix_supplys_archive_company_id_created_at_id",
+            "company_id", "created_at", "id"
+        ),
+        Index(
+            "ix_supplys_archive_supplier_id_created_at_id",
+            "supplier_id", "created_at", "id"
+        ),
+    )
+
+    # id сохраняется из горячей таблицы
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    article: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        index=True
+    )
+    supplier_id: Mapped[int] = mapped_column(
+        ForeignKey("organizers.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    company_id: Mapped[int] = mapped_column(
+        ForeignKey("organizers.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    status: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+    )
+    is_wait_confirm: Mapped[bool] = mapped_column(
+        Boolean,
+        nullable=False
+    )
+    delivery_address: Mapped[str] = mapped_column(
+        Text,
+        nullable=False
+    )
+    total_price: Mapped[float] = mapped_column(
+        Numeric,
+        nullable=False
+    )
+
+
+class SupplyProductArchive(Base):
+    """Архив продуктов закрытых поставок"""
+    __tablename__ = "supply_products_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    supply_id: Mapped[int] = mapped_column(
+        ForeignKey("supplys_archive.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    product_version_id: Mapped[int] = mapped_column(
+        ForeignKey("product_versions.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    # без внешнего ключа: удаление продукта не должно сканировать архив
+    product_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=True
+    )
+    quantity: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False
+    )
@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ProductCategory(str, Enum):
@@ -14,6 +14,20 @@ class ProductCategory(str, Enum):
     tools_and_equipment = "tools_and_equipment"
 
 
+class ProductSortOrder(str, Enum):
+    """Порядок сортировки каталога товаров"""
+    name_asc = "name_asc"
+    name_desc = "name_desc"
+    price_asc = "price_asc"
+    price_desc = "price_desc"
+
+
+class ProductImportFormat(str, Enum):
+    """Формат файла импорта товаров"""
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class ProductBase(BaseModel):
     name: str
     category: ProductCategory
@@ -27,6 +41,13 @@ class ProductRequestCreate(ProductRequestUpdate):
     quantity: int
 
 
+class ProductImportRow(ProductBase):
+    """Строка файла импорта товаров"""
+    price: float = Field(ge=0)
+    quantity: int = Field(ge=0)
+    description: Optional[str] = None
+
+
 class ProductResponse(ProductBase):
     id: int
     article: int
@@ -36,6 +57,11 @@ class ProductResponse(ProductBase):
     description: Optional[str] = None
 
 
+class ProductSearchResult(ProductResponse):
+    """Найденный товар с оценкой релевантности"""
+    score: float
+
+
 class ProductResponseSupply(ProductBase):
     """Неполная информация о товаре для отображения на странице поставщика"""
     id: int
@@ -43,4 +69,35 @@ class ProductResponseSupply(ProductBase):
 
 class ProductsResponse(BaseModel):
     products: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+
+class ProductSearchResponse(BaseModel):
+    products: List[ProductSearchResult]
+
+
+class ProductCategoryFacetResponse(BaseModel):
+    category: ProductCategory
+    count: int
+
+
+class ProductSupplierFacetResponse(BaseModel):
+    supplier_id: int
+    supplier_name: str
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    categories: List[ProductCategoryFacetResponse]
+    suppliers: List[ProductSupplierFacetResponse]
+
+
+class ProductImportErrorResponse(BaseModel):
+    row: int
+    message: str
+
 
+class ProductImportResponse(BaseModel):
+    created: int
+    errors_total: int
+    errors: List[ProductImportErrorResponse]
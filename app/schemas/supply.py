@@ -17,6 +17,27 @@ class StatusForUpdate(str, Enum):
     delivery = "delivered"
 
 
+class SupplyStatusName(str, Enum):
+    """
+    Статусы поставки для фильтрации списка.
+    Написания одного статуса равнозначны, фильтр находит их все
+    """
+    in_processing = "in_processing"
+    assembled = "assembled"
+    assemble = "assemble"
+    in_delivery = "in_delivery"
+    delivered = "delivered"
+    adopted = "adopted"
+    canceled = "canceled"
+    cancelled = "cancelled"
+
+
+class SupplyExportFormat(str, Enum):
+    """Формат выгрузки истории поставок"""
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class SupplyBase(BaseModel):
     supplier_id: int
     delivery_address: str
@@ -19,30 +19,40 @@ class StaticticService:
             session=session, 
         )
 
-    async def get_statistics_by_company(self, organizer: UserDataRedis) -> dict:
+    async def get_statistics_by_company(
+            self,
+            organizer: UserDataRedis,
+            include_archive: bool = False
+    ) -> dict:
         """Получение всей статистики компании"""
         if (general_statistic := await self.statistic_repo.get_general_statistics_by_company_id(
-                company_id=organizer.organizer_id
+                company_id=organizer.organizer_id,
+                include_archive=include_archive
             )
         ) is None:
             raise NotFoundError("Общая статистика компании не найдена")
         
-        graph_statistics = await self.get_graph_supplies_statistics(organizer)
+        graph_statistics = await self.get_graph_supplies_statistics(organizer, include_archive)
         
         return StatisticResponseItem.get_response_schema_statistic(
             general_statistic=general_statistic,
             supplies_statistic_of_month=graph_statistics,
         )
     
-    async def get_statistics_by_supplier(self, organizer: UserDataRedis) -> dict:
+    async def get_statistics_by_supplier(
+            self,
+            organizer: UserDataRedis,
+            include_archive: bool = False
+    ) -> dict:
         """Получение всей статистики поставщика"""
         if (general_statistic := await self.statistic_repo.get_general_statistics_by_supplier_id(
-                supplier_id=organizer.organizer_id
+                supplier_id=organizer.organizer_id,
+                include_archive=include_archive
             )
         ) is None:
             raise NotFoundError("Общая статистика поставщика не найдена")
         
-        graph_statistics = await self.get_graph_supplies_statistics(organizer)
+        graph_statistics = await self.get_graph_supplies_statistics(organizer, include_archive)
 
         return StatisticResponseItem.get_response_schema_statistic(
             general_statistic=general_statistic,
@@ -51,13 +61,15 @@ class StaticticService:
     
     async def get_graph_supplies_statistics(
             self, 
-            organizer: UserDataRedis
+            organizer: UserDataRedis,
+            include_archive: bool = False
     ) -> List[dict]:
         """Получение статистики поставок по месяцам"""
         if (result := await self.statistic_repo.get_graph_supplies_statistics_by_organizer(
             FilterForGettingGraphStatistic(
                 organization_id=organizer.organizer_id,
-                organizer_role=organizer.organizer_role
+                organizer_role=organizer.organizer_role,
+                include_archive=include_archive
             )
         )) is None:
             return []
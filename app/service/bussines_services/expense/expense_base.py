@@ -9,6 +9,7 @@ from service.items_services.expense import (
     ExpenseCompanyItem,
     ExpenseUpdateQuantityItem
 )
+from utils import ResultSetValidator
 
 
 class ExpenseInterface(ABC):
@@ -21,6 +22,11 @@ class ExpenseInterface(ABC):
         """Получить все расходы"""
         pass
     
+    @abstractmethod
+    async def get_expenses_validator_by_organizer(self, organizer_id: int) -> ResultSetValidator:
+        """Получить валидатор всех расходов для условного GET"""
+        pass
+    
     @abstractmethod
     async def get_expense(
         self, 
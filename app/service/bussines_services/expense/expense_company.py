@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from typing import List, Optional
+from typing import List, Optional, Iterable, Dict, Tuple
 
 from service.repositories import (
     ExpenseCompanyRepository,
@@ -11,6 +11,7 @@ from service.items_services.expense import (
     ExpenseUpdateQuantityItem
 )
 from .expense_base import ExpenseInterface
+from utils import ResultSetValidator
 from exceptions.exceptions import NotFoundError
 
 
@@ -26,6 +27,10 @@ class ExpenseCompanyService(ExpenseInterface):
             raise NotFoundError("Expenses not found")
         return expenses
     
+    async def get_expenses_validator_by_organizer(self, organizer_id: int) -> ResultSetValidator:
+        """Получить валидатор всех расходов"""
+        return await self.expense_repo.get_all_expense_response_items_validator(organizer_id)
+
     async def get_expense(
             self,
             expense_id: int,
@@ -78,37 +83,25 @@ class ExpenseCompanyService(ExpenseInterface):
 class AddingExpenseCompany:
     """Класс для реализации логики добавления товара на склад компании"""
     def __init__(self, session: AsyncSession) -> None:
-        self._expense_service = ExpenseCompanyService(session)
+        self._expense_repo = ExpenseCompanyRepository(session)
 
-    async def adding_expense_process(
+    async def adding_expenses_process(
         self,
-        expense_item: ExpenseCompanyItem
-    ) -> ExpenseCompanyItem:
-        """Логика добавление продукта на склад компании"""
-        if (exists_expense := await self._expense_service.get_expense_by_product_and_organizer_id(
-                product_verison_id=expense_item.product_version_id,
-                organizer_id=expense_item.company_id
-            )
-        ) is None:
-            return await self._expense_service.add_expense(expense_item)
-        else:
-            return await self._updating_quantity_exists_expense(
-                exists_expense=exists_expense,
-                added_quantity=expense_item.quantity
+        expense_items: Iterable[ExpenseCompanyItem]
+    ) -> List[ExpenseCompanyItem]:
+        """Логика добавления продуктов на склад компании одним запросом"""
+        # одинаковые версии продукта складываются заранее - upsert
+        # не может изменить одну строку дважды в рамках одного запроса
+        quantities: Dict[Tuple[int, int], int] = dict()
+        for expense_item in expense_items:
+            key = (expense_item.company_id, expense_item.product_version_id)
+            quantities[key] = quantities.get(key, 0) + expense_item.quantity
+
+        return await self._expense_repo.add_quantities(
+            ExpenseCompanyItem(
+                company_id=company_id,
+                product_version_id=product_version_id,
+                quantity=quantity
             )
-    
-    async def _updating_quantity_exists_expense(
-            self, 
-            exists_expense: ExpenseCompanyItem,
-            added_quantity: int
-    ) -> ExpenseCompanyItem:
-        """Обновление кол-ва существующего продукта на складе"""
-        updating_quantity_expense = ExpenseUpdateQuantityItem(
-            organizer_id=exists_expense.company_id,
-            expense_id=exists_expense.id,
-            quantity=exists_expense.quantity + added_quantity
-        )
-        return await self._expense_service.update_quantity_expense(
-            updating_quantity_expense
+            for (company_id, product_version_id), quantity in quantities.items()
         )
-    
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from typing import List
+from typing import List, Dict, Iterable
 
 from service.repositories import (
     ExpenseSupplierRepository
@@ -12,7 +12,8 @@ from service.items_services.expense import (
     ExpenseUpdateQuantityItem,
 )
 from .expense_base import ExpenseInterface
-from exceptions.exceptions import NotFoundError
+from utils import ResultSetValidator
+from exceptions.exceptions import NotFoundError, BadRequestError
 
 
 class ExpenseSupplierService(ExpenseInterface):
@@ -29,6 +30,11 @@ class ExpenseSupplierService(ExpenseInterface):
         return expenses
     
 
+    async def get_expenses_validator_by_organizer(self, organizer_id: int) -> ResultSetValidator:
+        """Получить валидатор всех расходов"""
+        return await self.expense_repo.get_all_expense_response_items_validator(organizer_id)
+    
+
     async def get_expense(
         self, 
         expense_id: int,
@@ -88,18 +94,52 @@ class ExpenseSupplierService(ExpenseInterface):
         return expense
 
 
-    async def add_reserved_expense(
+    async def add_reserved_expenses(
         self, 
-        add_reverved_expense: ExpenseAddReservedItem
-    ) -> ExpenseSupplierItem:
-        """Добавить новый резерв расхода"""
-        expense: ExpenseSupplierItem = await self.get_expense_by_id_supplier_and_product(
-            supplier_id=add_reverved_expense.supplier_id,
-            product_id=add_reverved_expense.product_id
+        add_reserved_expenses: Iterable[ExpenseAddReservedItem]
+    ) -> List[ExpenseSupplierItem]:
+        """Добавить резерв сразу нескольким расходам поставщика"""
+        reserved_by_product_id: Dict[int, int] = dict()
+        supplier_ids = set()
+        for add_reserved_expense in add_reserved_expenses:
+            supplier_ids.add(add_reserved_expense.supplier_id)
+            reserved_by_product_id[add_reserved_expense.product_id] = (
+                reserved_by_product_id.get(add_reserved_expense.product_id, 0)
+                + add_reserved_expense.reserved
+            )
+        if not reserved_by_product_id:
+            return []
+        if len(supplier_ids) != 1:
+            raise BadRequestError("Expenses of different suppliers")
+
+        expenses = await self.expense_repo.add_reserved_by_products_ids(
+            supplier_id=supplier_ids.pop(),
+            reserved_by_product_id=reserved_by_product_id
         )
-        expense.reserved += add_reverved_expense.reserved
-        expense = await self.expense_repo.update(expense)
-        return expense    
+        # расход не обновлен - его нет на складе или резерв превышает количество
+        if len(expenses) != len(reserved_by_product_id):
+            raise BadRequestError("Oversupply of reserved")
+        return expenses
+
+
+    async def release_reserved_expenses_by_supply(
+        self,
+        supplier_id: int,
+        supply_id: int,
+        write_off_quantity: bool
+    ) -> List[ExpenseSupplierItem]:
+        """Снять резерв поставки со склада поставщика, при сборке - списать и количество"""
+        expenses, products_count = await self.expense_repo.release_reserved_by_supply_id(
+            supplier_id=supplier_id,
+            supply_id=supply_id,
+            write_off_quantity=write_off_quantity
+        )
+        if not expenses:
+            raise NotFoundError("Supplies products is not in supply")
+        # продукт не найден, его нет на складе или резерв меньше количества в поставке
+        if len(expenses) != products_count:
+            raise BadRequestError("Reserved of supply products is not released")
+        return expenses
 
 
     async def delete_expense(self, expense_id: int) -> ExpenseSupplierItem:
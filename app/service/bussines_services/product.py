@@ -1,26 +1,44 @@
-from typing import Optional, Iterable, List
+from typing import Optional, Iterable, List, AsyncIterator
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core import settings
+
 from service.items_services.items import SupplyProductItem
 
 from service.repositories import (
     ProductRepository,
     ProductVersionRepository,
+    ContactRepository,
+    ProductImportRepository,
 )
 from service.items_services.product import (
     ProductVersionItem,
     ProductCreate,
     ProductItem,
     ProductFullItem,
-    AvailableProductForCompany
+    ProductSearchItem,
+    ProductCatalogFilter,
+    ProductCursor,
+    ProductsPage,
+    ProductFacets,
+    ProductImportResult,
+    iter_product_import_batches,
+    get_product_version_content_hash
 )
 from service.items_services.expense import ExpenseSupplierItem, ExpenseWithInfoProductItem
 from service.bussines_services.expense.expense_supplier import ExpenseSupplierService
 from service.redis_service import UserDataRedis
+from schemas.product import ProductImportFormat, ProductImportRow
+from service.product_catalog_cache import (
+    product_catalog_cache,
+    get_catalog_cache_params,
+    get_catalog_versions
+)
 
-from exceptions.exceptions import NotFoundError
+from exceptions.exceptions import NotFoundError, BadRequestError
 
-from utils import generate_unique_code
+from utils import generate_unique_code, ResultSetValidator
 
 
 class ProductService:
@@ -29,6 +47,7 @@ class ProductService:
         self.session = session
         self.product_repo = ProductRepository(session=session)
         self.version_repo = ProductVersionRepository(session=session)
+        self.contract_repo = ContactRepository(session=session)
 
 
     async def create_product(
@@ -57,6 +76,7 @@ class ProductService:
             product_id=product.id,
             quantity=product_new.quantity
         )
+        product_catalog_cache.mark_supplier_changed(self.session, product.supplier_id)
         return ExpenseWithInfoProductItem(
             article=product.article,
             product_id=product.id,
@@ -67,6 +87,67 @@ class ProductService:
             id=new_expense.id
         )
     
+    async def import_products(
+            self,
+            user_data: UserDataRedis,
+            chunks: AsyncIterator[bytes],
+            import_format: ProductImportFormat
+    ) -> ProductImportResult:
+        """
+        Массовый импорт товаров поставщика из CSV или NDJSON.
+        Корректные строки загружаются через COPY во временную таблицу
+        и создаются одним набором запросов, строки с ошибками пропускаются
+        """
+        config = settings.product_import
+        result = ProductImportResult()
+        import_repo = ProductImportRepository(session=self.session)
+        await import_repo.create_staging()
+
+        async for batch in iter_product_import_batches(
+                chunks, import_format, config.batch_size, config.max_rows
+        ):
+            rows = list()
+            for record in batch:
+                if record.error is not None:
+                    result.add_error(record.row, record.error, config.max_errors)
+                    continue
+                try:
+                    product = ProductImportRow.model_validate(record.data)
+                except ValidationError as e:
+                    result.add_error(
+                        record.row,
+                        "; ".join(
+                            f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                            for error in e.errors()
+                        ),
+                        config.max_errors
+                    )
+                    continue
+                rows.append((
+                    record.row,
+                    product.name,
+                    product.category.value,
+                    product.price,
+                    product.quantity,
+                    product.description,
+                    generate_unique_code(),
+                    get_product_version_content_hash(
+                        name=product.name,
+                        category=product.category,
+                        price=product.price,
+                        description=product.description,
+                        img_path=None
+                    ),
+                ))
+            await import_repo.copy_to_staging(rows)
+
+        result.created = await import_repo.create_products_from_staging(
+            supplier_id=user_data.organizer_id
+        )
+        if result.created:
+            product_catalog_cache.mark_supplier_changed(self.session, user_data.organizer_id)
+        return result
+
     async def _create_version_product_and_flush_session(
             self, 
             data: ProductVersionItem
@@ -104,34 +185,130 @@ class ProductService:
     async def get_available_products_for_company(
             self, 
             company_id: int,
-            supplier_id: Optional[int] = None,
+            limit: int = 50,
+            cursor: Optional[str] = None,
+            filters: Optional[ProductCatalogFilter] = None,
             add_quantity: bool = False
-    ) -> List[AvailableProductForCompany]:
-        """Получить все продукты поставщиков для компании"""
-        products: List[AvailableProductForCompany] = await self.product_repo.get_available_products_for_company(
+    ) -> ProductsPage:
+        """
+        Получить страницу продуктов поставщиков для компании.
+        Страницы без остатков на складе читаются через кэш каталога,
+        остатки меняются с каждой поставкой и не кэшируются.
+        У страницы из кэша заполнены версии, из которых она собрана
+        """
+        filters = filters or ProductCatalogFilter()
+        limit = self._validate_limit(limit)
+        product_cursor = ProductCursor.decode(cursor, filters.sort) if cursor else None
+
+        company_version = None
+        if self.is_catalog_page_cached(filters, add_quantity):
+            company_version = await product_catalog_cache.get_company_version(company_id)
+        if company_version is None:
+            return await self.product_repo.get_available_products_for_company(
                 company_id=company_id,
-                supplier_id=supplier_id,
+                limit=limit,
+                filters=filters,
+                cursor=product_cursor,
+                with_quantity=add_quantity
             )
-        if products is None:
-            raise NotFoundError("products not found")
-        if add_quantity:
-            products = await self._get_quantity_for_products(products)
-        return products
-    
-    async def _get_quantity_for_products(
+
+        params = get_catalog_cache_params(filters=filters, limit=limit, cursor=cursor)
+        if (page := await product_catalog_cache.get_page(company_id, company_version, params)) is not None:
+            return page
+
+        supplier_ids = (
+            [filters.supplier_id] if filters.supplier_id
+            else await self.contract_repo.get_supplier_ids_by_company_id(company_id)
+        )
+        supplier_versions = await product_catalog_cache.get_supplier_versions(supplier_ids)
+        page = await self.product_repo.get_available_products_for_company(
+            company_id=company_id,
+            limit=limit,
+            filters=filters,
+            cursor=product_cursor
+        )
+        await product_catalog_cache.set_page(
+            company_id=company_id,
+            company_version=company_version,
+            params=params,
+            supplier_versions=supplier_versions,
+            page=page
+        )
+        page.versions = get_catalog_versions(company_version, supplier_versions)
+        return page
+
+    @staticmethod
+    def is_catalog_page_cached(filters: ProductCatalogFilter, add_quantity: bool = False) -> bool:
+        """Проходит ли страница каталога через кэш"""
+        return settings.catalog.cache_enabled and not (add_quantity or filters.in_stock_only)
+
+    async def get_available_products_validator(
             self,
-            products: List[AvailableProductForCompany],
-    ) -> List[AvailableProductForCompany]:
-        """Получить количество для продуктов"""
-        expense_service = ExpenseSupplierService(self.session)
-        for product in products:
-            expense = await expense_service.get_expense_by_id_supplier_and_product(
-                supplier_id=product.supplier_id,
-                product_id=product.id
-            )
-            product.quantity = expense.get_quantity_subtract_reserve  
-        return products  
+            company_id: int,
+            limit: int = 50,
+            cursor: Optional[str] = None,
+            filters: Optional[ProductCatalogFilter] = None,
+            add_quantity: bool = False
+    ) -> ResultSetValidator:
+        """Получить валидатор страницы продуктов для условного GET"""
+        filters = filters or ProductCatalogFilter()
+        limit = self._validate_limit(limit)
+        product_cursor = ProductCursor.decode(cursor, filters.sort) if cursor else None
+        return await self.product_repo.get_available_products_validator(
+            company_id=company_id,
+            limit=limit,
+            filters=filters,
+            cursor=product_cursor,
+            with_quantity=add_quantity
+        )
+
+    async def get_product_facets_for_company(self, company_id: int) -> ProductFacets:
+        """Получить количество продуктов каталога компании по категориям и поставщикам"""
+        company_version = None
+        if settings.catalog.cache_enabled:
+            company_version = await product_catalog_cache.get_company_version(company_id)
+        if company_version is None:
+            return await self.product_repo.get_product_facets_for_company(company_id)
+
+        if (facets := await product_catalog_cache.get_facets(company_id, company_version)) is not None:
+            return facets
+
+        supplier_ids = await self.contract_repo.get_supplier_ids_by_company_id(company_id)
+        supplier_versions = await product_catalog_cache.get_supplier_versions(supplier_ids)
+        facets = await self.product_repo.get_product_facets_for_company(company_id)
+        await product_catalog_cache.set_facets(
+            company_id=company_id,
+            company_version=company_version,
+            supplier_versions=supplier_versions,
+            facets=facets
+        )
+        return facets
 
+    async def search_products_for_company(
+            self,
+            company_id: int,
+            query: str,
+            limit: int = 20
+    ) -> List[ProductSearchItem]:
+        """Поиск продуктов поставщиков, с которыми у компании есть контракт"""
+        query = query.strip()
+        if len(query) < settings.catalog.search_min_query_length:
+            raise BadRequestError("search query is too short")
+        if limit > settings.catalog.search_max_limit or limit < 1:
+            raise BadRequestError("value limit is incorrect")
+        return await self.product_repo.search_available_products_for_company(
+            company_id=company_id,
+            query=query,
+            limit=limit,
+            similarity_threshold=settings.catalog.search_similarity_threshold
+        )
+
+    @staticmethod
+    def _validate_limit(limit: int) -> int:
+        """Проверить размер страницы каталога"""
+        if limit > settings.catalog.max_limit or limit < 1:
+            raise BadRequestError("value limit is incorrect")
+        return limit
 
     async def get_product_by_id(self, product_id: int) -> Optional[ProductFullItem]:
         """Получить продукт по id"""
@@ -140,19 +317,27 @@ class ProductService:
         return product
     
 
-    async def get_products_version_by_product_ids(
+    async def get_product_validator_by_id(self, product_id: int) -> ResultSetValidator:
+        """Получить валидатор продукта для условного GET"""
+        return await self.product_repo.get_by_id_full_product_validator(product_id)
+
+    async def get_products_version_ids_by_product_ids(
             self, 
+            supplier_id: int,
             product_ids: Iterable[int]
-    ) -> Iterable[ProductVersionItem]:
-        """Получить все версии продуктов по id"""
-        products_version_list = list()
+    ) -> List[int]:
+        """Получить id версий продуктов поставщика в порядке переданных id продуктов"""
+        versions_ids = await self.product_repo.get_versions_ids_by_products_ids(
+            supplier_id=supplier_id,
+            products_ids=set(product_ids)
+        )
+        products_version_ids = list()
         for product_id in product_ids:
-            products_version = await self.version_repo.get_by_product_id(product_id)
-            if products_version is None:
+            if (product_version_id := versions_ids.get(product_id)) is None:
                 raise NotFoundError(f"product with id {product_id} not found")
-            products_version_list.append(products_version)
+            products_version_ids.append(product_version_id)
 
-        return products_version_list
+        return products_version_ids
     
     async def get_products_by_supplies_products(
             self,
@@ -177,11 +362,15 @@ class ProductService:
         if product is None:
             raise NotFoundError("products not found")
         
-        new_product_version = await self._create_version_product_and_flush_session(
-            product_version
-        )
-        product.product_version_id = new_product_version.id
-        product = await self.product_repo.update(product)
+        current_version = await self.version_repo.get_by_id(product.product_version_id)
+        # повторная отправка тех же данных не создает новую версию
+        if current_version is None or current_version.content_hash != product_version.content_hash:
+            new_product_version = await self._create_version_product_and_flush_session(
+                product_version
+            )
+            product.product_version_id = new_product_version.id
+            product = await self.product_repo.update(product)
+            product_catalog_cache.mark_supplier_changed(self.session, product.supplier_id)
 
         expense_service = ExpenseSupplierService(self.session)
         expense = await expense_service.get_expense_by_id_supplier_and_product(
@@ -210,4 +399,5 @@ class ProductService:
         
         await self.product_repo.delete(product.id)
         await self.session.flush()
+        product_catalog_cache.mark_supplier_changed(self.session, product.supplier_id)
         
\ No newline at end of file
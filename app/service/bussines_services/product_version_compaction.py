@@ -0,0 +1,17 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import settings
+
+from service.repositories import ProductVersionRepository
+
+
+class ProductVersionCompactionService:
+    """Бизнес логика удаления неиспользуемых версий продуктов"""
+    def __init__(self, session: AsyncSession):
+        self.version_repo = ProductVersionRepository(session=session)
+
+    async def delete_orphaned_versions_batch(self) -> int:
+        """Удалить пачку версий продуктов, на которые ничего не ссылается"""
+        return await self.version_repo.delete_orphaned_batch(
+            batch_size=settings.product_versions_compaction.batch_size
+        )
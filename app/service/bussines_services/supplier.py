@@ -6,6 +6,7 @@ from service.items_services.organizer import OrganizerItem
 from service.items_services.contract import ContractItem
 
 from service.bussines_services.contract import ContractService
+from service.product_catalog_cache import product_catalog_cache
 
 from exceptions.exceptions import BadRequestError, NotFoundError
 
@@ -25,7 +26,10 @@ class SupplierService:
             company_id=contract_item.company_id, 
             supplier_id=contract_item.supplier_id
         )
-        return await self.contract_repo.create(contract_item)
+        contract = await self.contract_repo.create(contract_item)
+        # в каталог компании добавляются товары нового поставщика
+        product_catalog_cache.mark_company_changed(self.session, contract_item.company_id)
+        return contract
     
     async def _check_exists_contract(self, company_id: int, supplier_id: int) -> None:
         """Проверка на существование контракта между компанией и поставщиком"""
@@ -59,4 +63,5 @@ class SupplierService:
                 raise BadRequestError("Suppliers not found")
         except Exception as e:
             pass
+        product_catalog_cache.mark_company_changed(self.session, company_id)
         
\ No newline at end of file
@@ -1,8 +1,10 @@
-from typing import List, Optional, Iterable
+from typing import List, Optional, Iterable, Dict, Any, AsyncIterator
 from enum import Enum
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core import settings
+
 from service.repositories import (
     SupplyProductRepository,
     SupplyRepository,
@@ -13,14 +15,24 @@ from service.items_services.supply import (
     SupplyItem, 
     SupplyProductItem,
     SupplyStatus,
+    SupplyCursor,
+    SupplyFilter,
+    SuppliesPage,
+    SuppliesPageJson,
+    SupplyEvent,
     get_supply_item_by_supply_create_item,
-    get_supply_product_items
+    get_supply_product_items,
+    get_supply_export_csv_header,
+    supply_export_rows_to_csv,
+    supply_export_rows_to_ndjson
 )
-from service.items_services.product import get_ids_from_products_version
 from service.items_services.expense import ExpenseAddReservedItem, ExpenseSupplierItem
 
 from service.redis_service import UserDataRedis
 
+from schemas.supply import SupplyExportFormat
+from service.supply_events import supply_events
+
 from service.bussines_services.contract import ContractService
 from service.bussines_services.product import ProductService
 from service.bussines_services.expense.expense_supplier import ExpenseSupplierService
@@ -76,22 +88,20 @@ class SupplyService:
             supply: SupplyCreateItem,
     ) -> None:
         """Создать поставку"""
-        # TODO! 
-        # ПЕРЕРАБОТАТЬ ЛОГИКУ СОЗДАНИЯ ПОСТАВКИ
-        # КАК МИНИМУМ НАЧАТЬ С ПРОВЕРКИ МУЩЕСТВОВАНИЯ ПРОДУКТОВ ПО ИХ ID,
-        # ПОЛУЧАЕМЫХ ИЗ СХЕМЫ SUPPLY
-        supply_item = await self._create_supply_and_flush_session(
-            supply=get_supply_item_by_supply_create_item(supply)
-        )
+        # каждый этап выполняется одним запросом к БД вне зависимости
+        # от количества продуктов в поставке
         products_ids = supply.get_products_ids
-        # проблемное место - ids версии продуктов находятся в порядке, отличающийся от
-        # продуктов
         products_version_ids = await self._get_products_version_ids_by_products_ids(
+            supplier_id=supply.supplier_id,
             products_ids=products_ids
         )
+        supply_item = await self._create_supply_and_flush_session(
+            supply=get_supply_item_by_supply_create_item(supply)
+        )
         supply_products_item = get_supply_product_items(
             supply_id=supply_item.id,
             quantities=supply.get_quantities,
+            products_ids=products_ids,
             products_version_ids=products_version_ids
         )
         await self._create_supplies_products_and_flush_session(
@@ -102,41 +112,39 @@ class SupplyService:
             supply=supply_products_item,
             products_ids=products_ids
         )
+        await self._publish_supply_event(event="supply_created", supply=supply_item)
         return
     
     async def _get_products_version_ids_by_products_ids(
             self,
+            supplier_id: int,
             products_ids: Iterable[int]
-    ) -> Iterable[int]:
-        """Получить список версий продуктов"""
+    ) -> List[int]:
+        """Получить список id версий продуктов в порядке id продуктов"""
         product_service = ProductService(self.session)
-        product_versions = await product_service.get_products_version_by_product_ids(
+        return await product_service.get_products_version_ids_by_product_ids(
+            supplier_id=supplier_id,
             product_ids=products_ids
         )
-        return get_ids_from_products_version(product_versions)
     
     async def _update_reversed_in_expense_and_flush_session(
             self, 
             supplier_id: int,
             supply: Iterable[SupplyProductItem],
             products_ids: Iterable[int]
-    ) -> Iterable[ExpenseSupplierItem]:
+    ) -> List[ExpenseSupplierItem]:
         """Обновить расход с зарезервированным количеством"""
         expense_service = ExpenseSupplierService(self.session)
-        # Инкапсулировать данную логику в ExpenseService или объекте ExpenseSupplierItem
-        expense_list = []
-        # TODO: извлечь продукты спомощью сервиса продуктов по объектам SupplyProductItem
-        for supply_product, product_id in zip(supply, products_ids):
-            expense = ExpenseAddReservedItem(
-                supplier_id=supplier_id,
-                product_id=product_id,
-                reserved=supply_product.quantity
-            )
-            expense_update = await expense_service.add_reserved_expense(
-                add_reverved_expense=expense
-            )
-            expense_list.append(expense_update)
-
+        expense_list = await expense_service.add_reserved_expenses(
+            add_reserved_expenses=[
+                ExpenseAddReservedItem(
+                    supplier_id=supplier_id,
+                    product_id=product_id,
+                    reserved=supply_product.quantity
+                )
+                for supply_product, product_id in zip(supply, products_ids)
+            ]
+        )
         await self.session.flush()
         return expense_list
         
@@ -166,54 +174,134 @@ class SupplyService:
             user_data: UserDataRedis,
             limit: int = 100,
             is_wait_confirm: bool = False,
-    ) -> List[SupplyResponseItem]:
-        """Получить все доступные поставки пользователя по его данным"""
-        if limit > 100:
-            raise BadRequestError("value limit is incorrect")
-
-        if user_data.organizer_role == OrganizerRole.supplier:
-            supplies = await self._get_supplies_by_organizer_id(
-                supplier_id=user_data.organizer_id,
-                is_wait_confirm=is_wait_confirm,
-                limit=limit
-            )
-        elif user_data.organizer_role == OrganizerRole.company:
-            supplies = await self._get_supplies_by_organizer_id(
-                company_id=user_data.organizer_id,
-                limit=limit
-            )
-        else:
-            raise BadRequestError("not found organizer role")
-        return supplies
-    
-    async def _get_supplies_by_organizer_id(
-            self,
-            limit: int,
-            company_id: Optional[int] = None,
-            supplier_id: Optional[int] = None,
-            is_wait_confirm: bool = False
-    ) -> List[SupplyResponseItem]:
-        """Получить все поставки"""
+            cursor: Optional[str] = None,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False,
+    ) -> SuppliesPage:
+        """Получить страницу доступных поставок пользователя по его данным"""
         supplies = await self.supply_repo.get_all_by_organizer_id(
-            company_id=company_id,
-            supplier_id=supplier_id,
-            is_wait_confirm=is_wait_confirm,
-            limit=limit
+            limit=self._validate_limit(limit),
+            cursor=SupplyCursor.decode(cursor) if cursor else None,
+            filters=filters,
+            include_archive=include_archive,
+            **self._get_organizer_filter(user_data, is_wait_confirm)
+        )
+        # пустая страница по курсору - конец списка, а не отсутствие поставок
+        if not supplies.supplies and cursor is None:
+            raise NotFoundError("not found supplies")
+        return supplies
+
+    async def get_supplies_json_by_user_data(
+            self, 
+            user_data: UserDataRedis,
+            limit: int = 100,
+            is_wait_confirm: bool = False,
+            cursor: Optional[str] = None,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False,
+    ) -> SuppliesPageJson:
+        """Получить страницу поставок пользователя, собранную в JSON на стороне БД"""
+        supplies = await self.supply_repo.get_all_json_by_organizer_id(
+            limit=self._validate_limit(limit),
+            cursor=SupplyCursor.decode(cursor) if cursor else None,
+            filters=filters,
+            include_archive=include_archive,
+            **self._get_organizer_filter(user_data, is_wait_confirm)
         )
-        if not supplies:
+        if supplies.count == 0 and cursor is None:
             raise NotFoundError("not found supplies")
         return supplies
 
+    def export_supplies(
+            self,
+            user_data: UserDataRedis,
+            export_format: SupplyExportFormat,
+            is_wait_confirm: bool = False,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        Получить поток выгрузки истории поставок пользователя.
+        Роль проверяется сразу - до того, как ответ начнет отправляться
+        """
+        organizer_filter = self._get_organizer_filter(user_data, is_wait_confirm)
+        return self._stream_export(
+            export_format=export_format,
+            filters=filters,
+            include_archive=include_archive,
+            **organizer_filter
+        )
 
-    async def assemble_or_cancel_supply(self, supplier_id: int, status: SupplyStatus) -> None:
-        """Принять или отменить поставку"""
+    async def _stream_export(
+            self,
+            export_format: SupplyExportFormat,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False,
+            **organizer_filter: Any
+    ) -> AsyncIterator[bytes]:
+        """Поток пачек выгрузки поставок в выбранном формате"""
+        if export_format == SupplyExportFormat.csv:
+            yield get_supply_export_csv_header()
+            serialize = supply_export_rows_to_csv
+        else:
+            serialize = supply_export_rows_to_ndjson
+
+        async for rows in self.supply_repo.stream_export_rows(
+            filters=filters,
+            batch_size=settings.supply_export.batch_size,
+            include_archive=include_archive,
+            **organizer_filter
+        ):
+            yield serialize(rows)
+
+    @staticmethod
+    def _validate_limit(limit: int) -> int:
+        """Проверить размер страницы поставок"""
+        if limit > 100 or limit < 1:
+            raise BadRequestError("value limit is incorrect")
+        return limit
 
-        supply: SupplyItem = await self.supply_repo.get_by_id(status.id)
+    @staticmethod
+    def _get_organizer_filter(
+            user_data: UserDataRedis,
+            is_wait_confirm: bool = False
+    ) -> Dict[str, Any]:
+        """Получить фильтр поставок по роли организации пользователя"""
+        if user_data.organizer_role == OrganizerRole.supplier:
+            return {
+                "supplier_id": user_data.organizer_id,
+                "is_wait_confirm": is_wait_confirm
+            }
+        elif user_data.organizer_role == OrganizerRole.company:
+            return {"company_id": user_data.organizer_id}
+        raise BadRequestError("not found organizer role")
+
+
+    async def assemble_or_cancel_supply(
+            self,
+            supplier_id: int,
+            status: SupplyStatus,
+            user_company_id: Optional[int] = None
+    ) -> None:
+        """Принять или отменить поставку"""
+        # строка поставки блокируется до конца транзакции - параллельное
+        # подтверждение той же поставки дождется и увидит ее уже подтвержденной
+        supply, is_claimed_by_other = await self.supply_repo.get_by_id_for_confirm(
+            supply_id=status.id,
+            supplier_id=supplier_id,
+            user_company_id=user_company_id
+        )
         if not supply:
             raise NotFoundError("not found supply")
+        if not supply.is_wait_confirm:
+            raise BadRequestError("Supply is already confirmed")
+        if is_claimed_by_other:
+            raise BadRequestError("Supply is claimed by another employee")
         
         supply.is_wait_confirm = False
         supply.status = status.status
+        supply.claimed_by = None
+        supply.claimed_until = None
         await self._update_supply_by_supplier_id_and_flush_session(
             supplier_id=supplier_id,
             supply=supply
@@ -224,8 +312,49 @@ class SupplyService:
             supply=supply,
             status=status,
         )
+        await self._publish_supply_event(event="supply_confirmed", supply=supply)
         return
 
+    async def claim_wait_confirm_supplies(
+            self,
+            user_data: UserDataRedis,
+            limit: int = 10
+    ) -> SuppliesPageJson:
+        """Забрать следующие ожидающие подтверждения поставки в работу сотрудника"""
+        if limit > settings.supply_queue.max_claim or limit < 1:
+            raise BadRequestError("value limit is incorrect")
+
+        supplies_ids = await self.supply_repo.claim_wait_confirm(
+            supplier_id=user_data.organizer_id,
+            user_company_id=user_data.user_company_id,
+            limit=limit,
+            lease_seconds=settings.supply_queue.lease_seconds
+        )
+        if not supplies_ids:
+            raise NotFoundError("not found supplies")
+        await self.session.flush()
+
+        return await self.supply_repo.get_all_json_by_organizer_id(
+            limit=limit,
+            supplier_id=user_data.organizer_id,
+            is_wait_confirm=True,
+            supplies_ids=supplies_ids
+        )
+
+    async def release_supply_claim(
+            self,
+            user_data: UserDataRedis,
+            supply_id: int
+    ) -> None:
+        """Вернуть поставку в очередь подтверждения"""
+        if not await self.supply_repo.release_claim(
+            supply_id=supply_id,
+            supplier_id=user_data.organizer_id,
+            user_company_id=user_data.user_company_id
+        ):
+            raise NotFoundError("not found claimed supply")
+        await self.session.flush()
+
 
     async def update_supply_status(self, supplier_id: int, status: SupplyStatus) -> SupplyItem:
         """Обновить статус поставки"""
@@ -254,8 +383,23 @@ class SupplyService:
         if status.status == StatusForUpdate.adopted:
             await self._create_expenses_company_by_supply(supply)
 
+        await self._publish_supply_event(event="supply_status_changed", supply=supply)
         return supply
 
+    async def _publish_supply_event(self, event: str, supply: SupplyItem) -> None:
+        """Отправить событие поставки поставщику и компании после commit"""
+        await supply_events.publish(
+            session=self.session,
+            event=SupplyEvent(
+                event=event,
+                supply_id=supply.id,
+                supplier_id=supply.supplier_id,
+                company_id=supply.company_id,
+                status=supply.status,
+                is_wait_confirm=supply.is_wait_confirm,
+            )
+        )
+
 
     async def _create_expenses_company_by_supply(self, supply: SupplyItem) -> Iterable[ExpenseCompanyItem]:
         """Создать расходы компании на поставку"""
@@ -280,18 +424,17 @@ class SupplyService:
             adding_expense_service: AddingExpenseCompany,
             supply: SupplyItem,
             supply_products: Iterable[SupplyProductItem]
-    ) -> Iterable[ExpenseCompanyItem]:
+    ) -> List[ExpenseCompanyItem]:
         """Создать расходы компании на поставку и зафиксировать изменения в сессии"""
-        expenses_list = []
-        for supply_product in supply_products:
-            expense_item = ExpenseCompanyItem(
+        expenses_list = await adding_expense_service.adding_expenses_process(
+            ExpenseCompanyItem(
                 company_id=supply.company_id,
                 product_version_id=supply_product.product_version_id,
                 quantity=supply_product.quantity
             )
-            expense = await adding_expense_service.adding_expense_process(expense_item)
-            expenses_list.append(expense)
-            await self.session.flush()
+            for supply_product in supply_products
+        )
+        await self.session.flush()
         return expenses_list
 
     
@@ -314,46 +457,19 @@ class SupplyService:
             supplier_id: int,
             supply: SupplyItem,
             status: SupplyStatus
-    ) -> Iterable[ExpenseSupplierItem]:
+    ) -> List[ExpenseSupplierItem]:
         """Обновить расходы по сущности поставки взависимости от статуса"""
-        # TODO: реализация работы со складом. 
-        # Если поставка принимается: 
+        # Если поставка собирается: 
         #   - списать у резерва кол-во каждого товара в поставке
         #   - списать у кол-ва товара на складе кол-во товара в поставке
         # Если поставка отклоняется: 
         #   - списать у резерва кол-во каждого товара в поставке
-        supply_products: Optional[List[SupplyProductItem]] = await self.supply_product_repo.get_by_supply_id(
-            supply_id=supply.id
-        )
-        if supply_products is None:
-            raise NotFoundError("Supplies products is not in supply")
-        product_service = ProductService(self.session)
-        # Вынести получение продукта по продукту в поставке в цикл
-        # products: Iterable[ProductItem] = await product_service.get_products_by_supplies_products(
-        #     supplies_products=supply_products
-        # )
-        # products_ids = [p.id for p in products]
-
-        expenses_list = list()
         expense_service = ExpenseSupplierService(self.session)
-
-        for supply_product in supply_products:
-            product = await product_service.get_product_by_product_version_id(
-                product_version_id=supply_product.product_version_id
-            )
-            expense = await expense_service.get_expense_by_id_supplier_and_product(
-                supplier_id=supplier_id,
-                product_id=product.id
-            )
-
-            expense.reserved -= supply_product.quantity
-            if status.status == CancelledAssembleStatus.assemble:
-                expense.quantity -= supply_product.quantity
-
-            expense_update = await expense_service.update_expense(expense)
-            expenses_list.append(expense_update)
-
-        return expenses_list
+        return await expense_service.release_reserved_expenses_by_supply(
+            supplier_id=supplier_id,
+            supply_id=supply.id,
+            write_off_quantity=status.status == CancelledAssembleStatus.assemble
+        )
     
 
     async def delete_supply(
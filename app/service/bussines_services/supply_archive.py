@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import settings
+
+from service.repositories import SupplyArchiveRepository
+
+
+class SupplyArchiveService:
+    """Бизнес логика архивации закрытых поставок"""
+    def __init__(self, session: AsyncSession):
+        self.archive_repo = SupplyArchiveRepository(session=session)
+
+    async def archive_closed_supplies_batch(self) -> int:
+        """Перенести в архив пачку закрытых поставок старше заданного возраста"""
+        return await self.archive_repo.archive_closed_batch(
+            closed_statuses=settings.supply_archive.closed_statuses,
+            older_than=timedelta(days=settings.supply_archive.older_than_days),
+            batch_size=settings.supply_archive.batch_size
+        )
@@ -105,4 +105,5 @@ class SuppliesStatisticOfMonthItem:
 class FilterForGettingGraphStatistic:
     organization_id: int
     organizer_role: str
+    include_archive: bool = False
     
\ No newline at end of file
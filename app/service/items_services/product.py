@@ -1,8 +1,19 @@
-from dataclasses import dataclass
-from typing import Optional, Type, Iterable
+from dataclasses import dataclass, field
+from typing import Optional, Type, Iterable, List, Any, AsyncIterator, Mapping, Dict
+from enum import Enum
+import codecs
+import csv
+import hashlib
+import orjson
 
 from .base import Model, BaseItem
 
+from schemas.product import ProductSortOrder, ProductImportFormat
+
+from exceptions.exceptions import BadRequestError
+
+from utils import encode_cursor, decode_cursor
+
 
 class ProductVersionItem(BaseItem):
     """Бизнес-объект сущности версии продукта"""
@@ -13,6 +24,7 @@ class ProductVersionItem(BaseItem):
         price: float,
         description: str = None,
         img_path: str = None,
+        content_hash: Optional[str] = None,
         id: Optional[int] = None,
         model: Optional[Type[Model]] = None
     ):
@@ -23,6 +35,28 @@ class ProductVersionItem(BaseItem):
         self.description = description
         self.price = price
         self.img_path = img_path
+        # у версий, созданных до появления хэша, он считается по содержимому
+        self.content_hash = content_hash or get_product_version_content_hash(
+            name=name,
+            category=category,
+            price=price,
+            description=description,
+            img_path=img_path
+        )
+
+
+def get_product_version_content_hash(
+        name: str,
+        category: str,
+        price: float,
+        description: Optional[str],
+        img_path: Optional[str]
+) -> str:
+    """Хэш содержимого версии продукта"""
+    if isinstance(category, Enum):
+        category = category.value
+    content = orjson.dumps([name, category, float(price), description, img_path])
+    return hashlib.sha256(content).hexdigest()
 
 
 @dataclass
@@ -82,6 +116,13 @@ class AvailableProductForCompany(BaseItem):
         self.img_path = img_path
 
 
+class ProductSearchItem(AvailableProductForCompany):
+    """Найденный продукт с оценкой релевантности запросу"""
+    def __init__(self, score: float, **kwargs):
+        super().__init__(**kwargs)
+        self.score = score
+
+
 class ProductFullItem(BaseItem):
     """Представление полной версии продукта с свойствами версии продукта"""
     def __init__(
@@ -106,8 +147,242 @@ class ProductFullItem(BaseItem):
         self.img_path = img_path
 
 
+def with_product_version_fields(
+        row: Mapping[str, Any],
+        version: ProductVersionItem,
+        **fields: str
+) -> Dict[str, Any]:
+    """
+    Дополнить строку запроса полями версии продукта из кэша.
+    fields - имя ключа в строке: имя поля версии
+    """
+    return {**row, **{key: getattr(version, name) for key, name in fields.items()}}
+
+
 def get_ids_from_products_version(
         products: Iterable[ProductVersionItem]
 ) -> Iterable[int]:
     """Получить список id продуктов из списка версий продуктов"""
-    return [product.id for product in products]
\ No newline at end of file
+    return [product.id for product in products]
+
+
+@dataclass
+class ProductCatalogFilter:
+    """Фильтры и сортировка каталога товаров компании"""
+    supplier_id: Optional[int] = None
+    category: Optional[str] = None
+    sort: ProductSortOrder = ProductSortOrder.name_asc
+    in_stock_only: bool = False
+
+
+@dataclass
+class ProductCursor:
+    """Курсор keyset-пагинации каталога по паре (значение сортировки, id)"""
+    sort: ProductSortOrder
+    value: Any
+    id: int
+
+    def encode(self) -> str:
+        """Получить непрозрачную строку курсора"""
+        return encode_cursor(self.sort.value, self.value, self.id)
+
+    @classmethod
+    def decode(cls, cursor: str, sort: ProductSortOrder) -> "ProductCursor":
+        """Получить курсор из непрозрачной строки для заданной сортировки"""
+        values = decode_cursor(cursor)
+        try:
+            cursor_sort, value, product_id = values
+            # курсор действителен только для той сортировки, с которой получен
+            if cursor_sort != sort.value:
+                raise ValueError
+            if sort in (ProductSortOrder.price_asc, ProductSortOrder.price_desc):
+                value = float(value)
+            else:
+                value = str(value)
+            return cls(sort=sort, value=value, id=int(product_id))
+        except (ValueError, TypeError):
+            raise BadRequestError("Invalid cursor")
+
+
+@dataclass
+class ProductsPage:
+    """Страница каталога товаров с курсором на следующую страницу"""
+    products: List[AvailableProductForCompany] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    # версии компании и поставщиков в кэше каталога, из которых собрана страница,
+    # None - страница не проходит через кэш
+    versions: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class ProductCategoryFacet:
+    """Количество товаров каталога в категории"""
+    category: str
+    count: int
+
+
+@dataclass
+class ProductSupplierFacet:
+    """Количество товаров каталога у поставщика"""
+    supplier_id: int
+    supplier_name: str
+    count: int
+
+
+@dataclass
+class ProductFacets:
+    """Количество товаров каталога компании по категориям и поставщикам"""
+    categories: List[ProductCategoryFacet] = field(default_factory=list)
+    suppliers: List[ProductSupplierFacet] = field(default_factory=list)
+
+
+# колонки файла импорта товаров, в порядке CSV заголовка по умолчанию
+PRODUCT_IMPORT_COLUMNS = ("name", "category", "price", "quantity", "description")
+
+
+@dataclass
+class ProductImportRecord:
+    """Запись файла импорта: номер строки данных и значения или ошибка разбора"""
+    row: int
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ProductImportError:
+    """Ошибка в строке файла импорта"""
+    row: int
+    message: str
+
+
+@dataclass
+class ProductImportResult:
+    """Итог импорта товаров"""
+    created: int = 0
+    errors_total: int = 0
+    errors: List[ProductImportError] = field(default_factory=list)
+
+    def add_error(self, row: int, message: str, max_errors: int) -> None:
+        """Учесть ошибку строки, подробно сохраняются только первые max_errors"""
+        self.errors_total += 1
+        if len(self.errors) < max_errors:
+            self.errors.append(ProductImportError(row=row, message=message))
+
+
+async def iter_product_import_batches(
+        chunks: AsyncIterator[bytes],
+        import_format: ProductImportFormat,
+        batch_size: int,
+        max_rows: Optional[int] = None
+) -> AsyncIterator[List[ProductImportRecord]]:
+    """
+    Разобрать поток файла импорта в пачки записей, не читая файл целиком.
+    Пачка CSV закрывается только на границе записи - вне значения в кавычках,
+    чтобы многострочные значения не разрывались между пачками.
+    Файл длиннее max_rows строк данных отклоняется, не дочитываясь
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    parse = _parse_csv_lines if import_format == ProductImportFormat.csv else _parse_ndjson_lines
+    state = {"header": None, "row": 0, "max_rows": max_rows}
+    pending: List[str] = []
+    in_quotes = False
+    tail = ""
+
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            pending.append(line + "\n")
+            if import_format == ProductImportFormat.csv:
+                in_quotes = _csv_line_ends_in_quotes(line, in_quotes)
+            if len(pending) >= batch_size and not in_quotes:
+                yield parse(pending, state)
+                pending = []
+
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        pending.append(tail)
+    if pending:
+        yield parse(pending, state)
+
+
+def _csv_line_ends_in_quotes(line: str, in_quotes: bool) -> bool:
+    """
+    Определить, продолжается ли после строки файла значение в кавычках.
+    Разбор повторяет csv.reader: кавычка открывает значение только в начале поля,
+    удвоенная кавычка внутри значения экранирована
+    """
+    if not in_quotes and '"' not in line:
+        return False
+    field_start = not in_quotes
+    after_quote = False
+    for char in line:
+        if in_quotes:
+            if char == '"':
+                in_quotes = False
+                after_quote = True
+            continue
+        if char == '"' and (field_start or after_quote):
+            # кавычка в начале поля открывает значение, сразу после закрывающей - экранирована
+            in_quotes = True
+        field_start = char == ","
+        after_quote = False
+    return in_quotes
+
+
+def _next_import_row(state: dict) -> int:
+    """Получить номер следующей строки данных файла импорта"""
+    state["row"] += 1
+    if state["max_rows"] is not None and state["row"] > state["max_rows"]:
+        raise BadRequestError(f"too many rows, max {state['max_rows']}")
+    return state["row"]
+
+
+def _parse_csv_lines(lines: List[str], state: dict) -> List[ProductImportRecord]:
+    """Разобрать строки CSV, первая строка файла - заголовок с именами колонок"""
+    records = list()
+    for values in csv.reader(lines):
+        if not any(value.strip() for value in values):
+            continue
+        if state["header"] is None:
+            state["header"] = [value.strip().lower() for value in values]
+            missing = [
+                column for column in PRODUCT_IMPORT_COLUMNS
+                if column != "description" and column not in state["header"]
+            ]
+            if missing:
+                raise BadRequestError(f"missing columns: {', '.join(missing)}")
+            continue
+        row = _next_import_row(state)
+        if len(values) != len(state["header"]):
+            records.append(ProductImportRecord(
+                row=row,
+                error=f"expected {len(state['header'])} columns, got {len(values)}"
+            ))
+            continue
+        data = {
+            key: value for key, value in zip(state["header"], values)
+            # пустое описание в CSV - отсутствие описания
+            if not (key == "description" and value == "")
+        }
+        records.append(ProductImportRecord(row=row, data=data))
+    return records
+
+
+def _parse_ndjson_lines(lines: List[str], state: dict) -> List[ProductImportRecord]:
+    """Разобрать строки NDJSON, по одному объекту товара в строке"""
+    records = list()
+    for line in lines:
+        if not line.strip():
+            continue
+        row = _next_import_row(state)
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            records.append(ProductImportRecord(row=row, error="invalid json"))
+            continue
+        if not isinstance(data, dict):
+            records.append(ProductImportRecord(row=row, error="expected json object"))
+            continue
+        records.append(ProductImportRecord(row=row, data=data))
+    return records
@@ -1,10 +1,39 @@
-from typing import Optional, Type, Iterable, List, Dict
-from dataclasses import dataclass
+from typing import Optional, Type, Iterable, List, Dict, Mapping, Any, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import csv
+import io
+
+import orjson
 
 from service.items_services.base import Model, BaseItem
 
 from schemas.supply import SupplyCreateRequest
 
+from exceptions.exceptions import BadRequestError
+
+from utils import encode_cursor, decode_cursor
+
+
+# колонка status - строка, эндпоинты записывают один статус в разном написании,
+# фильтр по статусу ищет все написания
+SUPPLY_STATUS_SPELLINGS: Dict[str, Tuple[str, ...]] = {
+    "canceled": ("canceled", "cancelled"),
+    "cancelled": ("canceled", "cancelled"),
+    "assembled": ("assembled", "assemble"),
+    "assemble": ("assembled", "assemble"),
+    "delivered": ("delivered", "delivery"),
+}
+
+
+def get_supply_status_spellings(statuses: Iterable[str]) -> List[str]:
+    """Получить все написания статусов поставки в порядке первого появления"""
+    spellings = dict()
+    for status in statuses:
+        for spelling in SUPPLY_STATUS_SPELLINGS.get(status, (status,)):
+            spellings[spelling] = None
+    return list(spellings)
+
 
 @dataclass
 class SupplyStatus:
@@ -74,6 +103,8 @@ class SupplyItem(BaseItem):
         is_wait_confirm: bool = False,
         status: str = 'in_processing',
         article: Optional[int] = None,
+        claimed_by: Optional[int] = None,
+        claimed_until: Optional[datetime] = None,
         id: Optional[int] = None,
         model: Optional[Type[Model]] = None
     ):
@@ -86,6 +117,8 @@ class SupplyItem(BaseItem):
         self.total_price = total_price
         self.is_wait_confirm = is_wait_confirm
         self.article = article
+        self.claimed_by = claimed_by
+        self.claimed_until = claimed_until
 
 
 class SupplyCreateItem(SupplyItem):
@@ -215,6 +248,111 @@ class SupplyResponseItem(BaseItem):
       
 
 
+@dataclass
+class SupplyCursor:
+    """Курсор keyset-пагинации поставок по паре (created_at, id)"""
+    created_at: datetime
+    id: int
+
+    def encode(self) -> str:
+        """Получить непрозрачную строку курсора"""
+        return encode_cursor(self.created_at.isoformat(), self.id)
+
+    @classmethod
+    def decode(cls, cursor: str) -> "SupplyCursor":
+        """Получить курсор из непрозрачной строки"""
+        values = decode_cursor(cursor)
+        try:
+            created_at, supply_id = values
+            return cls(
+                created_at=datetime.fromisoformat(created_at),
+                id=int(supply_id)
+            )
+        except (ValueError, TypeError):
+            raise BadRequestError("Invalid cursor")
+
+
+@dataclass
+class SupplyFilter:
+    """Фильтры списка поставок"""
+    statuses: Optional[List[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    counterparty_id: Optional[int] = None # id компании для поставщика и id поставщика для компании
+    product_id: Optional[int] = None
+    article: Optional[int] = None
+    delivery_address: Optional[str] = None
+
+    def __post_init__(self):
+        if self.statuses:
+            self.statuses = get_supply_status_spellings(self.statuses)
+        # created_at хранится без часового пояса
+        self.created_from = self._to_naive_utc(self.created_from)
+        self.created_to = self._to_naive_utc(self.created_to)
+        if self.created_from and self.created_to and self.created_from > self.created_to:
+            raise BadRequestError("created_from must be less than created_to")
+        if self.delivery_address is not None:
+            self.delivery_address = self.delivery_address.strip() or None
+
+    @staticmethod
+    def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class SuppliesPage:
+    """Страница поставок с курсором на следующую страницу"""
+    supplies: List[SupplyResponseItem] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class SuppliesPageJson:
+    """Страница поставок, собранная в JSON на стороне БД"""
+    supplies: bytes = b"[]"
+    count: int = 0
+    next_cursor: Optional[str] = None
+
+    @property
+    def content(self) -> bytes:
+        """Тело ответа без промежуточных python-объектов поставок"""
+        return (
+            b'{"supplies":' + self.supplies
+            + b',"next_cursor":' + orjson.dumps(self.next_cursor) + b'}'
+        )
+
+
+@dataclass
+class SupplyEvent:
+    """Событие изменения поставки для рассылки через LISTEN/NOTIFY"""
+    event: str
+    supply_id: int
+    supplier_id: int
+    company_id: int
+    status: Optional[str] = None
+    is_wait_confirm: Optional[bool] = None
+
+    @property
+    def payload(self) -> str:
+        """Полезная нагрузка NOTIFY"""
+        return orjson.dumps(self.__dict__).decode()
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "SupplyEvent":
+        """Получить событие из полезной нагрузки NOTIFY"""
+        return cls(**orjson.loads(payload))
+
+    @property
+    def sse(self) -> bytes:
+        """Сообщение в формате text/event-stream"""
+        return (
+            b"event: " + self.event.encode()
+            + b"\ndata: " + self.payload.encode() + b"\n\n"
+        )
+
+
 class SupplyProductItem(BaseItem):
     """Объект записи продукта в поставке"""
     def __init__(
@@ -222,6 +360,7 @@ class SupplyProductItem(BaseItem):
         supply_id: int,
         product_version_id: int,
         quantity: int,
+        product_id: Optional[int] = None,
         id: Optional[int] = None,
         model: Optional[Type[Model]] = None
     ):
@@ -229,6 +368,7 @@ class SupplyProductItem(BaseItem):
         
         self.supply_id = supply_id
         self.product_version_id = product_version_id
+        self.product_id = product_id
         self.quantity = quantity
 
 
@@ -250,6 +390,7 @@ def get_supply_item_by_supply_create_item(supply: SupplyCreateItem) -> SupplyIte
 
 def get_supply_product_items(
         supply_id: int,
+        products_ids: Iterable[int],
         products_version_ids: Iterable[int],
         quantities: Iterable[int],
 ):
@@ -258,17 +399,19 @@ def get_supply_product_items(
         SupplyProductItem(
             supply_id=supply_id,
             product_version_id=product_version_id,
+            product_id=product_id,
             quantity=quantity
         )
-        for product_version_id, quantity in zip(products_version_ids, quantities)
+        for product_id, product_version_id, quantity in zip(
+            products_ids, products_version_ids, quantities
+        )
     ]
 
 
-def parse_supplies_rows(rows, limit: int) -> List[Dict]:
+def parse_supplies_rows(rows) -> List[Dict]:
     """Парсинг данных из запроса к БД"""
     # В дальнейшем сделать структурой класса
     supplies_dict = {}
-    count_supply_record = 0
 
     for row in rows:
 
@@ -292,7 +435,9 @@ def parse_supplies_rows(rows, limit: int) -> List[Dict]:
                 "status": row["status"],
             }
 
-            count_supply_record += 1
+        # у поставки без строк продуктов единственная строка запроса без продукта
+        if row["product_version_id"] is None:
+            continue
 
         # Добавляем продукт в supply_products
         supplies_dict[supply_id]["supply_products"].append({
@@ -305,7 +450,54 @@ def parse_supplies_rows(rows, limit: int) -> List[Dict]:
             },
             "quantity": row["quantity"]
         })
+    return list(supplies_dict.values())
+
+
+# колонки выгрузки истории поставок: одна строка на продукт поставки
+SUPPLY_EXPORT_COLUMNS = (
+    "supply_id",
+    "article",
+    "created_at",
+    "status",
+    "is_wait_confirm",
+    "supplier_id",
+    "supplier_name",
+    "company_id",
+    "company_name",
+    "delivery_address",
+    "total_price",
+    "product_id",
+    "product_article",
+    "product_name",
+    "product_category",
+    "product_price",
+    "quantity",
+)
+
+
+def get_supply_export_csv_header() -> bytes:
+    """Заголовок CSV выгрузки поставок (с BOM для корректного открытия в Excel)"""
+    return "\ufeff".encode() + supply_export_rows_to_csv([dict(zip(SUPPLY_EXPORT_COLUMNS, SUPPLY_EXPORT_COLUMNS))])
+
+
+def supply_export_rows_to_csv(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    """Пачка строк выгрузки поставок в CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [row[column] for column in SUPPLY_EXPORT_COLUMNS]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
 
-        if count_supply_record >= limit:
-            break
-    return list(supplies_dict.values())
\ No newline at end of file
+def supply_export_rows_to_ndjson(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    """Пачка строк выгрузки поставок в NDJSON"""
+    return b"".join(
+        orjson.dumps(
+            {column: row[column] for column in SUPPLY_EXPORT_COLUMNS},
+            default=str, # Numeric приходит как Decimal
+            option=orjson.OPT_APPEND_NEWLINE
+        )
+        for row in rows
+    )
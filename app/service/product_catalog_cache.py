@@ -0,0 +1,267 @@
+import hashlib
+import json
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import settings
+from service.redis_service import RedisBase
+from service.items_services.product import (
+    AvailableProductForCompany,
+    ProductCatalogFilter,
+    ProductsPage,
+    ProductFacets,
+    ProductCategoryFacet,
+    ProductSupplierFacet
+)
+from utils.metrics import metrics
+
+from logger import logger
+
+
+class ProductCatalogCache(RedisBase):
+    """
+    Кэш страниц каталога товаров компании и количества товаров
+    по категориям и поставщикам в хранилище Redis.
+    Запись хранит версии поставщиков, из товаров которых она собрана.
+    Изменение товаров поставщика увеличивает его версию, изменение контрактов
+    компании - версию компании, которая входит в ключ записи.
+    Запись с устаревшей версией любого поставщика считается промахом.
+    Версии увеличиваются только после фиксации транзакции: иначе промах кэша
+    между увеличением версии и фиксацией сохранит старые данные под новой версией
+    """
+    prefix = "catalog"
+    _changed_suppliers_key = "catalog_changed_suppliers"
+    _changed_companies_key = "catalog_changed_companies"
+
+    async def set_data(
+            self,
+            key: str,
+            data: dict,
+            expire_seconds: int = 300
+    ) -> None:
+        await self.redis.set(key, json.dumps(data), ex=expire_seconds)
+
+    async def get_data(self, key: str) -> Optional[dict]:
+        data = await self.redis.get(key)
+        return json.loads(data) if data else None
+
+    async def delete_data(self, key: str) -> None:
+        await self.redis.delete(key)
+
+    async def get_company_version(self, company_id: int) -> Optional[int]:
+        """
+        Получить версию каталога компании, None - если Redis недоступен.
+        Читается до запроса к БД и передается в get_page/set_page: запись,
+        собранная до изменения контрактов, не попадет под новую версию
+        """
+        try:
+            return await self._get_version(self._company_version_key(company_id))
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+            return None
+
+    async def get_page(
+            self,
+            company_id: int,
+            company_version: int,
+            params: Dict[str, Any]
+    ) -> Optional[ProductsPage]:
+        """Получить страницу каталога, если она есть и не устарела"""
+        try:
+            entry = await self._get_actual_entry(self._page_key(company_id, company_version, params))
+            if entry is not None:
+                metrics.inc("product_catalog_cache_hits")
+                return ProductsPage(
+                    products=[
+                        AvailableProductForCompany(**product)
+                        for product in entry["products"]
+                    ],
+                    next_cursor=entry["next_cursor"],
+                    versions=get_catalog_versions(company_version, entry["suppliers"])
+                )
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+        metrics.inc("product_catalog_cache_misses")
+        return None
+
+    async def set_page(
+            self,
+            company_id: int,
+            company_version: int,
+            params: Dict[str, Any],
+            supplier_versions: Optional[Dict[str, int]],
+            page: ProductsPage
+    ) -> None:
+        """
+        Сохранить страницу каталога.
+        Версии компании и поставщиков должны быть прочитаны до запроса к БД,
+        иначе изменение во время запроса не сделает запись устаревшей
+        """
+        if supplier_versions is None:
+            return
+        try:
+            await self.set_data(
+                key=self._page_key(company_id, company_version, params),
+                data={
+                    "suppliers": supplier_versions,
+                    "products": [
+                        {**product.dict, "id": product.id, "price": float(product.price)}
+                        for product in page.products
+                    ],
+                    "next_cursor": page.next_cursor,
+                },
+                expire_seconds=settings.catalog.cache_ttl_seconds
+            )
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+
+    async def get_facets(self, company_id: int, company_version: int) -> Optional[ProductFacets]:
+        """Получить количество товаров каталога по категориям и поставщикам"""
+        try:
+            entry = await self._get_actual_entry(self._facets_key(company_id, company_version))
+            if entry is not None:
+                metrics.inc("product_facets_cache_hits")
+                return ProductFacets(
+                    categories=[ProductCategoryFacet(**facet) for facet in entry["categories"]],
+                    suppliers=[ProductSupplierFacet(**facet) for facet in entry["suppliers_facets"]]
+                )
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+        metrics.inc("product_facets_cache_misses")
+        return None
+
+    async def set_facets(
+            self,
+            company_id: int,
+            company_version: int,
+            supplier_versions: Optional[Dict[str, int]],
+            facets: ProductFacets
+    ) -> None:
+        """
+        Сохранить количество товаров каталога.
+        Названия поставщиков не входят в версии, поэтому время жизни записи короткое
+        """
+        if supplier_versions is None:
+            return
+        try:
+            await self.set_data(
+                key=self._facets_key(company_id, company_version),
+                data={
+                    "suppliers": supplier_versions,
+                    "categories": [asdict(facet) for facet in facets.categories],
+                    "suppliers_facets": [asdict(facet) for facet in facets.suppliers],
+                },
+                expire_seconds=settings.catalog.facets_cache_ttl_seconds
+            )
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+
+    async def get_supplier_versions(self, supplier_ids: Iterable[Any]) -> Optional[Dict[str, int]]:
+        """Получить текущие версии каталогов поставщиков, None - если Redis недоступен"""
+        supplier_ids = [str(supplier_id) for supplier_id in supplier_ids]
+        if not supplier_ids:
+            return dict()
+        try:
+            versions = await self.redis.mget(
+                [self._supplier_version_key(supplier_id) for supplier_id in supplier_ids]
+            )
+        except RedisError as e:
+            logger.warning(f"product catalog cache is unavailable: {e}")
+            return None
+        return {
+            supplier_id: int(version or 0)
+            for supplier_id, version in zip(supplier_ids, versions)
+        }
+
+    def mark_supplier_changed(self, session: AsyncSession, supplier_id: int) -> None:
+        """Отметить изменение товаров поставщика в транзакции сессии"""
+        session.info.setdefault(self._changed_suppliers_key, set()).add(supplier_id)
+
+    def mark_company_changed(self, session: AsyncSession, company_id: int) -> None:
+        """Отметить изменение контрактов компании в транзакции сессии"""
+        session.info.setdefault(self._changed_companies_key, set()).add(company_id)
+
+    async def bump_committed_versions(self, session: AsyncSession) -> None:
+        """
+        Увеличить версии поставщиков и компаний, изменённых в сессии.
+        Вызывается после session.commit()
+        """
+        for supplier_id in session.info.pop(self._changed_suppliers_key, set()):
+            await self.bump_supplier_version(supplier_id)
+        for company_id in session.info.pop(self._changed_companies_key, set()):
+            await self.bump_company_version(company_id)
+
+    async def bump_supplier_version(self, supplier_id: int) -> None:
+        """Сделать устаревшими страницы каталогов с товарами поставщика"""
+        await self._bump(self._supplier_version_key(supplier_id))
+
+    async def bump_company_version(self, company_id: int) -> None:
+        """Сделать устаревшими все страницы каталога компании"""
+        await self._bump(self._company_version_key(company_id))
+
+    async def _bump(self, key: str) -> None:
+        try:
+            await self.redis.incr(key)
+        except RedisError as e:
+            # без увеличения версии страницы устареют только по времени жизни записи
+            logger.warning(f"product catalog cache version {key} is not bumped: {e}")
+
+    async def _get_actual_entry(self, key: str) -> Optional[dict]:
+        """Получить запись, если версии всех её поставщиков не изменились"""
+        entry = await self.get_data(key)
+        if entry is None:
+            return None
+        suppliers: Dict[str, int] = entry["suppliers"]
+        if suppliers != await self.get_supplier_versions(suppliers.keys()):
+            return None
+        return entry
+
+    async def _get_version(self, key: str) -> int:
+        return int(await self.redis.get(key) or 0)
+
+    def _page_key(self, company_id: int, company_version: int, params: Dict[str, Any]) -> str:
+        params_hash = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        # v2 - next_cursor только при наличии следующей страницы, записи прежнего формата не читаются
+        return f"{self.prefix}:page:v2:{company_id}:{company_version}:{params_hash}"
+
+    def _facets_key(self, company_id: int, company_version: int) -> str:
+        return f"{self.prefix}:facets:{company_id}:{company_version}"
+
+    def _supplier_version_key(self, supplier_id: Any) -> str:
+        return f"{self.prefix}:version:supplier:{supplier_id}"
+
+    def _company_version_key(self, company_id: int) -> str:
+        return f"{self.prefix}:version:company:{company_id}"
+
+
+def get_catalog_versions(
+        company_version: int,
+        supplier_versions: Optional[Dict[str, int]]
+) -> Optional[Dict[str, Any]]:
+    """Версии кэша каталога, из которых собрана страница, - основа её ETag"""
+    if supplier_versions is None:
+        return None
+    return {"company": company_version, "suppliers": supplier_versions}
+
+
+def get_catalog_cache_params(
+        filters: ProductCatalogFilter,
+        limit: int,
+        cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Параметры запроса каталога, от которых зависит содержимое страницы"""
+    return {
+        "supplier_id": filters.supplier_id,
+        "category": filters.category,
+        "sort": filters.sort.value,
+        "limit": limit,
+        "cursor": cursor,
+    }
+
+
+product_catalog_cache = ProductCatalogCache()
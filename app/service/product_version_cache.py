@@ -0,0 +1,78 @@
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from core import settings
+from service.items_services.product import ProductVersionItem
+from utils.metrics import metrics
+
+
+class ProductVersionCache:
+    """
+    LRU кэш версий продуктов в памяти воркера.
+    Версия не меняется после создания (изменение продукта создает новую версию),
+    поэтому записи не инвалидируются и вытесняются только по размеру.
+    Объекты кэша общие для всех запросов - изменять их нельзя
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._versions: "OrderedDict[int, ProductVersionItem]" = OrderedDict()
+        self._sizes: Dict[int, int] = dict()
+        self._size_bytes = 0
+
+        metrics.register_gauge("product_version_cache_entries", lambda: len(self._versions))
+        metrics.register_gauge("product_version_cache_bytes", lambda: self._size_bytes)
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, ProductVersionItem]:
+        """Получить версии, которые есть в кэше"""
+        versions = dict()
+        for version_id in ids:
+            version = self._versions.get(version_id)
+            if version is None:
+                metrics.inc("product_version_cache_misses")
+                continue
+            self._versions.move_to_end(version_id)
+            versions[version_id] = version
+            metrics.inc("product_version_cache_hits")
+        return versions
+
+    def put_many(self, versions: Iterable[ProductVersionItem]) -> None:
+        """Добавить версии, вытесняя давно не использованные сверх max_entries"""
+        for version in versions:
+            if version.id in self._versions:
+                self._versions.move_to_end(version.id)
+                continue
+            self._versions[version.id] = version
+            self._sizes[version.id] = self._get_size(version)
+            self._size_bytes += self._sizes[version.id]
+        while len(self._versions) > self.max_entries:
+            version_id, _ = self._versions.popitem(last=False)
+            self._size_bytes -= self._sizes.pop(version_id)
+            metrics.inc("product_version_cache_evictions")
+
+    def clear(self) -> None:
+        self._versions.clear()
+        self._sizes.clear()
+        self._size_bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Примерный объем памяти, занятый версиями в кэше"""
+        return self._size_bytes
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    @staticmethod
+    def _get_size(version: ProductVersionItem) -> int:
+        """Примерный размер версии: объект, его атрибуты и значения"""
+        return (
+            sys.getsizeof(version)
+            + sys.getsizeof(version.__dict__)
+            + sum(sys.getsizeof(value) for value in version.__dict__.values())
+        )
+
+
+product_version_cache = ProductVersionCache(
+    max_entries=settings.product_version_cache.max_entries
+)
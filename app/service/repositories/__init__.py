@@ -5,9 +5,11 @@ from .user_company import UserCompanyRepository
 from .link_code import LinkCodeRepository
 from .product import ProductRepository
 from .product_version import ProductVersionRepository
+from .product_import import ProductImportRepository
 from .supply import SupplyRepository
 from .supply_product import SupplyProductRepository
 from .expense_company import ExpenseCompanyRepository
 from .expense_supplier import ExpenseSupplierRepository
 
 from .statistic import StatisticRepository
+from .supply_archive import SupplyArchiveRepository
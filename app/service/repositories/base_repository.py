@@ -9,10 +9,11 @@ from typing import (
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
+from sqlalchemy import update, delete, func, Select
 
 from core.db import Base 
 from service.items_services.base import BaseItem
+from utils import ResultSetValidator
 
 
 Model = TypeVar("Model", bound=Base)  # Тип данных для моделей
@@ -83,3 +84,19 @@ class BaseRepository(Generic[Model]):
         result = await self.session.execute(query)
         model = result.scalar_one_or_none()
         return self.item(**model.dict, model=model) if model is not None else None
+
+
+    async def _get_result_set_validator(self, rows: Select) -> ResultSetValidator:
+        """
+        Получить валидатор выборки одним агрегатным запросом.
+        rows - запрос выборки с колонками id и updated_at
+        """
+        rows = rows.subquery("rows")
+        result = await self.session.execute(
+            select(
+                func.count(),
+                func.max(rows.c.updated_at),
+                func.coalesce(func.sum(rows.c.id), 0)
+            )
+        )
+        return ResultSetValidator(*result.one())
@@ -44,6 +44,15 @@ class ContactRepository(BaseRepository[ContractModel]):
         # рассмотреть перенос данного метода в логику организации
         return [OrganizerItem(**supplier.dict, model=supplier) for supplier in suppliers]
 
+    async def get_supplier_ids_by_company_id(self, company_id: int) -> List[int]:
+        """Получить id поставщиков с которыми у компании заключены контракты"""
+        stmt = (
+            select(self.model.supplier_id)
+            .where(self.model.company_id == company_id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
     async def delete(self, supplier_id: int, company_id: int) -> bool:
         """Удалить контракт по id поставщика"""
         stmt = (
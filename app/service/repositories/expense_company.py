@@ -1,21 +1,24 @@
-from typing import Optional, List
+from typing import Optional, List, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import(
     Organizer as OrganizerModel,
     Product as ProductModel,
-    ProductVersion as ProductVersionModel,
     ExpenseCompany as ExpenseCompanyModel,
 
 )
 from service.repositories.base_repository import BaseRepository
+from service.repositories.product_version import ProductVersionRepository
 
+from service.items_services.product import with_product_version_fields
 from service.items_services.expense import (
     ExpenseWithInfoProductItem,
     ExpenseCompanyItem
 )
+from utils import ResultSetValidator
 
 
 class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
@@ -38,12 +41,9 @@ class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
                 self.model.product_version_id.label("product_id"),
                 self.model.quantity,
                 ProductModel.article,
-                ProductVersionModel.name.label("product_name"),
-                ProductVersionModel.category,
                 OrganizerModel.name.label("supplier_name")
             )
-            .join(ProductVersionModel, self.model.product_version_id == ProductVersionModel.id)
-            .join(ProductModel, ProductVersionModel.id == ProductModel.product_version_id)
+            .join(ProductModel, self.model.product_version_id == ProductModel.product_version_id)
             .join(OrganizerModel, ProductModel.supplier_id == OrganizerModel.id)
             .where(self.model.company_id == company_id)
         )
@@ -51,11 +51,38 @@ class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
         expenses = result.mappings().all()
         if expenses is None:
             return None
+        # product_id в строке - id версии продукта на складе компании
+        versions = await ProductVersionRepository(self.session).get_by_ids_cached(
+            expense["product_id"] for expense in expenses
+        )
         expenses_items = [
-            ExpenseWithInfoProductItem(**dict(expense)) for expense in expenses
+            ExpenseWithInfoProductItem(**with_product_version_fields(
+                expense,
+                versions[expense["product_id"]],
+                product_name="name",
+                category="category"
+            ))
+            for expense in expenses
         ]
         return expenses_items
 
+    async def get_all_expense_response_items_validator(self, company_id: int) -> ResultSetValidator:
+        """Получить валидатор всех расходов по company_id"""
+        stmt = (
+            select(
+                self.model.id,
+                func.greatest(
+                    self.model.updated_at,
+                    ProductModel.updated_at,
+                    OrganizerModel.updated_at
+                ).label("updated_at")
+            )
+            .join(ProductModel, self.model.product_version_id == ProductModel.product_version_id)
+            .join(OrganizerModel, ProductModel.supplier_id == OrganizerModel.id)
+            .where(self.model.company_id == company_id)
+        )
+        return await self._get_result_set_validator(stmt)
+
     async def get_expense_response_items(
             self,
             company_id: int,
@@ -68,13 +95,9 @@ class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
                 self.model.product_version_id.label("product_id"),
                 self.model.quantity,
                 ProductModel.article,
-                ProductVersionModel.name.label("product_name"),
-                ProductVersionModel.category,
-                ProductVersionModel.description,
                 OrganizerModel.name.label("supplier_name")
             )
-            .join(ProductVersionModel, self.model.product_version_id == ProductVersionModel.id)
-            .join(ProductModel, ProductVersionModel.id == ProductModel.product_version_id)
+            .join(ProductModel, self.model.product_version_id == ProductModel.product_version_id)
             .join(OrganizerModel, ProductModel.supplier_id == OrganizerModel.id)
             .where(
                 self.model.company_id == company_id,
@@ -83,7 +106,16 @@ class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
         )
         result = await self.session.execute(stmt)
         expense = result.mappings().first()
-        return ExpenseWithInfoProductItem(**dict(expense)) if expense is not None else None
+        if expense is None:
+            return None
+        versions = await ProductVersionRepository(self.session).get_by_ids_cached([product_version_id])
+        return ExpenseWithInfoProductItem(**with_product_version_fields(
+            expense,
+            versions[product_version_id],
+            product_name="name",
+            category="category",
+            description="description"
+        ))
 
     async def get_by_expense_and_company_id(
             self,
@@ -101,3 +133,28 @@ class ExpenseCompanyRepository(BaseRepository[ExpenseCompanyModel]):
         result = await self.session.execute(stmt)
         expense = result.scalar_one_or_none()
         return ExpenseCompanyItem(**expense.dict) if expense is not None else None
+
+    async def add_quantities(
+            self,
+            expenses: Iterable[ExpenseCompanyItem]
+    ) -> List[ExpenseCompanyItem]:
+        """Добавить товары на склад компании одним запросом INSERT ... ON CONFLICT DO UPDATE
+
+        Для существующих записей количество увеличивается на переданное
+        """
+        values = [expense.dict for expense in expenses]
+        if not values:
+            return []
+        stmt = insert(self.model).values(values)
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=[self.model.company_id, self.model.product_version_id],
+                set_={
+                    "quantity": self.model.quantity + stmt.excluded.quantity,
+                    "updated_at": func.now()
+                }
+            )
+            .returning(self.model)
+        )
+        result = await self.session.execute(stmt)
+        return [ExpenseCompanyItem(**expense.dict) for expense in result.scalars().all()]
@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, update, values, column, func, and_, Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import(
@@ -8,6 +8,7 @@ from models import(
     Product as ProductModel,
     ProductVersion as ProductVersionModel,
     ExpenseSupplier as ExpenseSupplierModel,
+    SupplyProduct as SupplyProductModel,
 )
 from service.repositories.base_repository import(
      BaseRepository,
@@ -17,6 +18,7 @@ from service.items_services.expense import (
     ExpenseWithInfoProductItem,
     ExpenseSupplierItem,
 )
+from utils import ResultSetValidator
 
 
 class ExpenseSupplierRepository(BaseRepository[ExpenseSupplierModel]):
@@ -57,6 +59,23 @@ class ExpenseSupplierRepository(BaseRepository[ExpenseSupplierModel]):
         ]
         return expenses_items
 
+    async def get_all_expense_response_items_validator(self, supplier_id: int) -> ResultSetValidator:
+        """Получить валидатор всех расходов по supplier_id"""
+        stmt = (
+            select(
+                self.model.id,
+                func.greatest(
+                    self.model.updated_at,
+                    ProductModel.updated_at,
+                    OrganizerModel.updated_at
+                ).label("updated_at")
+            )
+            .join(OrganizerModel, self.model.supplier_id == OrganizerModel.id)
+            .join(ProductModel, self.model.product_id == ProductModel.id)
+            .where(self.model.supplier_id == supplier_id)
+        )
+        return await self._get_result_set_validator(stmt)
+
     async def get_expense_response_items(
             self,
             supplier_id: int,
@@ -119,3 +138,94 @@ class ExpenseSupplierRepository(BaseRepository[ExpenseSupplierModel]):
         result = await self.session.execute(stmt)
         expense = result.scalar_one_or_none()
         return ExpenseSupplierItem(**expense.dict) if expense is not None else None
+
+    async def add_reserved_by_products_ids(
+            self,
+            supplier_id: int,
+            reserved_by_product_id: Dict[int, int]
+    ) -> List[ExpenseSupplierItem]:
+        """Увеличить резерв расходов поставщика одним запросом UPDATE ... FROM (VALUES ...)
+
+        Обновляются только расходы, у которых резерв не превысит количество
+        """
+        reserved_values = (
+            values(
+                column("product_id", Integer),
+                column("reserved", Integer),
+                name="reserved_values"
+            )
+            .data(list(reserved_by_product_id.items()))
+        )
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.supplier_id == supplier_id,
+                self.model.product_id == reserved_values.c.product_id,
+                self.model.reserved + reserved_values.c.reserved <= self.model.quantity
+            )
+            .values(reserved=self.model.reserved + reserved_values.c.reserved)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return [ExpenseSupplierItem(**expense.dict) for expense in result.scalars().all()]
+
+    async def release_reserved_by_supply_id(
+            self,
+            supplier_id: int,
+            supply_id: int,
+            write_off_quantity: bool = False
+    ) -> Tuple[List[ExpenseSupplierItem], int]:
+        """Снять резерв по всем продуктам поставки одним запросом UPDATE ... FROM
+
+        При write_off_quantity количество на складе также уменьшается.
+        Обновляются только расходы, у которых резерв и количество не станут отрицательными.
+        Вторым значением возвращается число продуктов поставки, включая строки
+        без найденного продукта, - если оно больше числа расходов, резерв снят не полностью
+        """
+        # продукт строки сохранен при создании поставки, у строк до появления product_id
+        # он ищется по текущей версии продукта
+        product_id = func.coalesce(SupplyProductModel.product_id, ProductModel.id)
+        supply_quantities = (
+            select(
+                product_id.label("product_id"),
+                func.sum(SupplyProductModel.quantity).label("quantity")
+            )
+            .outerjoin(
+                ProductModel,
+                and_(
+                    SupplyProductModel.product_id.is_(None),
+                    ProductModel.product_version_id == SupplyProductModel.product_version_id
+                )
+            )
+            .where(SupplyProductModel.supply_id == supply_id)
+            .group_by(product_id)
+            .cte("supply_quantities")
+        )
+        products_count = (
+            select(func.count())
+            .select_from(supply_quantities)
+            .scalar_subquery()
+            .label("products_count")
+        )
+        conditions = [self.model.reserved >= supply_quantities.c.quantity]
+        new_values = {"reserved": self.model.reserved - supply_quantities.c.quantity}
+        if write_off_quantity:
+            conditions.append(self.model.quantity >= supply_quantities.c.quantity)
+            new_values["quantity"] = self.model.quantity - supply_quantities.c.quantity
+
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.supplier_id == supplier_id,
+                self.model.product_id == supply_quantities.c.product_id,
+                *conditions
+            )
+            .values(**new_values)
+            .returning(self.model, products_count)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        rows = result.all()
+        expenses = [ExpenseSupplierItem(**expense.dict) for expense, _ in rows]
+        return expenses, rows[0].products_count if rows else 0
@@ -1,23 +1,35 @@
-from typing import Optional, List, Iterable
+from typing import Optional, List, Iterable, Dict, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, exists, tuple_, and_, func, union, cast, Integer, Select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
 from models import(
     Organizer as OrganizerModel,
     Contract as ContractModel,
     Product as ProductModel,
     ProductVersion as ProductVersionModel,
+    ExpenseSupplier as ExpenseSupplierModel,
 )
 from service.repositories.base_repository import(
      BaseRepository,
 )
+from service.repositories.product_version import ProductVersionRepository
 
 from service.items_services.product import (
     ProductItem,
     ProductFullItem,
-    AvailableProductForCompany
+    AvailableProductForCompany,
+    ProductSearchItem,
+    ProductCatalogFilter,
+    ProductCursor,
+    ProductsPage,
+    ProductFacets,
+    ProductCategoryFacet,
+    ProductSupplierFacet
 )
+from schemas.product import ProductSortOrder
+from utils import ResultSetValidator
 
 
 from service.items_services.supply import SupplyProductItem
@@ -53,6 +65,18 @@ class ProductRepository(BaseRepository[ProductModel]):
         product = result.mappings().first()
         return AvailableProductForCompany(**dict(product)) if product is not None else None
 
+    async def get_by_id_full_product_validator(self, id: int) -> ResultSetValidator:
+        """Получить валидатор товара по ID"""
+        stmt = (
+            select(
+                self.model.id,
+                func.greatest(self.model.updated_at, OrganizerModel.updated_at).label("updated_at")
+            )
+            .join(OrganizerModel, OrganizerModel.id == self.model.supplier_id)
+            .where(self.model.id == id)
+        )
+        return await self._get_result_set_validator(stmt)
+
     async def get_by_product_version_id(self, product_version_id: int) -> ProductItem:
         """Получить продукт по id версии"""
         stmt = (
@@ -65,6 +89,22 @@ class ProductRepository(BaseRepository[ProductModel]):
         product = result.scalar_one_or_none()
         return ProductItem(**product.dict)
 
+    async def get_versions_ids_by_products_ids(
+            self,
+            supplier_id: int,
+            products_ids: Iterable[int]
+    ) -> Dict[int, int]:
+        """Получить id текущих версий продуктов поставщика по id продуктов"""
+        stmt = (
+            select(self.model.id, self.model.product_version_id)
+            .where(
+                self.model.id.in_(products_ids),
+                self.model.supplier_id == supplier_id
+            )
+        )
+        result = await self.session.execute(stmt)
+        return {product_id: version_id for product_id, version_id in result.all()}
+
     async def get_all_products(
             self,
             supplier_id: int,
@@ -75,32 +115,125 @@ class ProductRepository(BaseRepository[ProductModel]):
             select(
                 self.model.id,
                 self.model.article,
-                ProductVersionModel.name,
-                ProductVersionModel.category,
-                ProductVersionModel.price,
-                ProductVersionModel.img_path
+                self.model.product_version_id
             )
-            .join(ProductVersionModel, self.model.product_version_id == ProductVersionModel.id)
             .where(self.model.supplier_id == supplier_id)
             .limit(limit)
         )
         result = await self.session.execute(stmt)
-        products = result.mappings().all()
+        products = result.all()
 
         if products is None:
             return None
 
-        products = [ProductFullItem(**dict(p)) for p in products]
+        versions = await ProductVersionRepository(self.session).get_by_ids_cached(
+            p.product_version_id for p in products
+        )
+        products = [
+            ProductFullItem(
+                id=p.id,
+                article=p.article,
+                name=versions[p.product_version_id].name,
+                category=versions[p.product_version_id].category,
+                price=versions[p.product_version_id].price,
+                img_path=versions[p.product_version_id].img_path
+            )
+            for p in products
+        ]
 
         return products
 
     async def get_available_products_for_company(
             self,
             company_id: int,
-            supplier_id: Optional[int] = None,
-            limit: int = 100
-    ) -> Optional[List[AvailableProductForCompany]]:
-        """Получить все доступные товары для компании по её ID"""
+            limit: int = 100,
+            filters: Optional[ProductCatalogFilter] = None,
+            cursor: Optional[ProductCursor] = None,
+            with_quantity: bool = False
+    ) -> ProductsPage:
+        """
+        Получить страницу доступных товаров для компании по её ID.
+        Остаток (количество за вычетом резерва) считается в том же запросе
+        через left join на склад поставщика
+        """
+        filters = filters or ProductCatalogFilter()
+        sort_column, _ = self._get_sort_column(filters.sort)
+        stmt = self._get_available_products_stmt(
+            company_id=company_id,
+            limit=limit,
+            filters=filters,
+            cursor=cursor,
+            with_quantity=with_quantity
+        )
+
+        result = await self.session.execute(stmt)
+        products = result.mappings().all()
+
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            last = products[-1]
+            sort_key = sort_column.key
+            next_cursor = ProductCursor(
+                sort=filters.sort,
+                value=last[sort_key],
+                id=last["id"]
+            ).encode()
+
+        return ProductsPage(
+            products=[AvailableProductForCompany(**dict(p)) for p in products],
+            next_cursor=next_cursor
+        )
+
+    async def get_available_products_validator(
+            self,
+            company_id: int,
+            limit: int = 100,
+            filters: Optional[ProductCatalogFilter] = None,
+            cursor: Optional[ProductCursor] = None,
+            with_quantity: bool = False
+    ) -> ResultSetValidator:
+        """
+        Получить валидатор страницы доступных товаров для компании.
+        Время изменения строки - последнее из времени изменения товара,
+        поставщика и, если в ответе есть остаток, склада поставщика.
+        Товар следующей страницы тоже входит в валидатор - от него зависит next_cursor
+        """
+        filters = filters or ProductCatalogFilter()
+        updated_at = [self.model.updated_at, OrganizerModel.updated_at]
+        if with_quantity:
+            updated_at.append(ExpenseSupplierModel.updated_at)
+        stmt = self._get_available_products_stmt(
+            company_id=company_id,
+            limit=limit,
+            filters=filters,
+            cursor=cursor,
+            with_quantity=with_quantity
+        )
+        return await self._get_result_set_validator(
+            stmt.with_only_columns(
+                self.model.id,
+                func.greatest(*updated_at).label("updated_at")
+            )
+        )
+
+    def _get_available_products_stmt(
+            self,
+            company_id: int,
+            limit: int,
+            filters: ProductCatalogFilter,
+            cursor: Optional[ProductCursor],
+            with_quantity: bool
+    ) -> Select:
+        """
+        Запрос страницы доступных товаров для компании.
+        Выбирается на один товар больше limit - по нему видно, есть ли следующая страница
+        """
+        sort_column, is_desc = self._get_sort_column(filters.sort)
+        available_quantity = func.coalesce(
+            ExpenseSupplierModel.quantity - ExpenseSupplierModel.reserved, 0
+        )
+
         stmt = (
             select(
                 self.model.id,
@@ -114,26 +247,168 @@ class ProductRepository(BaseRepository[ProductModel]):
             )
             .join(ProductVersionModel, ProductVersionModel.id == self.model.product_version_id )
             .join(OrganizerModel, OrganizerModel.id == self.model.supplier_id)
-            .join(ContractModel, ContractModel.supplier_id == self.model.supplier_id)
-            .where(ContractModel.company_id == company_id ,)
+            .where(self._get_contract_clause(company_id))
+            .order_by(
+                *((sort_column.desc(), self.model.id.desc()) if is_desc
+                  else (sort_column.asc(), self.model.id.asc()))
+            )
+            .limit(limit + 1)
+        )
+
+        # filters
+        if filters.supplier_id:
+            stmt = stmt.where(self.model.supplier_id == filters.supplier_id)
+        if filters.category:
+            stmt = stmt.where(ProductVersionModel.category == filters.category)
+        if with_quantity or filters.in_stock_only:
+            stmt = stmt.outerjoin(
+                ExpenseSupplierModel,
+                and_(
+                    ExpenseSupplierModel.product_id == self.model.id,
+                    ExpenseSupplierModel.supplier_id == self.model.supplier_id
+                )
+            )
+        if with_quantity:
+            stmt = stmt.add_columns(available_quantity.label("quantity"))
+        if filters.in_stock_only:
+            stmt = stmt.where(available_quantity > 0)
+        if cursor is not None:
+            key = tuple_(sort_column, self.model.id)
+            cursor_key = tuple_(cursor.value, cursor.id)
+            stmt = stmt.where(key < cursor_key if is_desc else key > cursor_key)
+        return stmt
+
+    async def get_product_facets_for_company(self, company_id: int) -> ProductFacets:
+        """
+        Получить количество доступных компании товаров по категориям и поставщикам.
+        Обе группировки считаются одним проходом через GROUPING SETS
+        """
+        is_supplier_facet = func.grouping(ProductVersionModel.category).label("is_supplier_facet")
+        stmt = (
+            select(
+                ProductVersionModel.category,
+                self.model.supplier_id,
+                OrganizerModel.name.label("supplier_name"),
+                func.count().label("count"),
+                is_supplier_facet
+            )
+            .join(ProductVersionModel, ProductVersionModel.id == self.model.product_version_id)
+            .join(OrganizerModel, OrganizerModel.id == self.model.supplier_id)
+            .where(self._get_contract_clause(company_id))
+            .group_by(
+                func.grouping_sets(
+                    tuple_(ProductVersionModel.category),
+                    tuple_(self.model.supplier_id, OrganizerModel.name)
+                )
+            )
+        )
+        result = await self.session.execute(stmt)
+
+        facets = ProductFacets()
+        for row in result.mappings().all():
+            if row["is_supplier_facet"]:
+                facets.suppliers.append(ProductSupplierFacet(
+                    supplier_id=row["supplier_id"],
+                    supplier_name=row["supplier_name"],
+                    count=row["count"]
+                ))
+            else:
+                facets.categories.append(ProductCategoryFacet(
+                    category=row["category"],
+                    count=row["count"]
+                ))
+        facets.categories.sort(key=lambda facet: (-facet.count, facet.category))
+        facets.suppliers.sort(key=lambda facet: (facet.supplier_name, facet.supplier_id))
+        return facets
+
+    async def search_available_products_for_company(
+            self,
+            company_id: int,
+            query: str,
+            limit: int = 20,
+            similarity_threshold: float = 0.4
+    ) -> List[ProductSearchItem]:
+        """
+        Найти доступные компании товары по названию, описанию и артикулу.
+        Релевантность - сумма ранга полнотекстового поиска и сходства триграмм
+        с названием, точное совпадение артикула поднимает товар в начало
+        """
+        ts_query = func.websearch_to_tsquery("russian", query)
+        article = int(query) if query.isdigit() and len(query) <= 18 else None
+
+        # кандидаты отбираются отдельно по каждому индексу
+        matches = [
+            select(ProductVersionModel.id.label("product_version_id"))
+            .where(ProductVersionModel.search_vector.op("@@")(ts_query)),
+            select(ProductVersionModel.id)
+            .where(ProductVersionModel.name.op("%>")(query)),
+        ]
+        score = (
+            func.ts_rank_cd(ProductVersionModel.search_vector, ts_query)
+            + func.word_similarity(query, ProductVersionModel.name)
+        )
+        if article is not None:
+            matches.append(
+                select(self.model.product_version_id)
+                .where(self.model.article == article)
+            )
+            score = score + cast(self.model.article == article, Integer)
+        candidates = union(*matches).subquery("candidates")
+        score = score.label("score")
+
+        stmt = (
+            select(
+                self.model.id,
+                self.model.article,
+                self.model.supplier_id,
+                ProductVersionModel.name,
+                ProductVersionModel.category,
+                ProductVersionModel.price,
+                ProductVersionModel.img_path,
+                ProductVersionModel.description,
+                OrganizerModel.name.label("organizer_name"),
+                score
+            )
+            .select_from(candidates)
+            .join(ProductVersionModel, ProductVersionModel.id == candidates.c.product_version_id)
+            .join(self.model, self.model.product_version_id == ProductVersionModel.id)
+            .join(OrganizerModel, OrganizerModel.id == self.model.supplier_id)
+            .where(self._get_contract_clause(company_id))
+            .order_by(score.desc(), self.model.id)
             .limit(limit)
         )
+
+        # порог оператора %> действует до конца транзакции
+        await self.session.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.word_similarity_threshold",
+                    str(similarity_threshold),
+                    True
+                )
+            )
+        )
         result = await self.session.execute(stmt)
-        products = result.mappings().all()
+        return [ProductSearchItem(**dict(p)) for p in result.mappings().all()]
 
-        if products is None:
-            return None
-        if supplier_id:
-            products = [
-                AvailableProductForCompany(**dict(p))
-                for p in products if p.get("supplier_id") == supplier_id
-            ]
-        else:
-            products = [
-                AvailableProductForCompany(**dict(p))
-                for p in products
-            ]
-        return products
+    def _get_contract_clause(self, company_id: int):
+        """Условие наличия контракта компании с поставщиком товара"""
+        # exists вместо join не размножает строки при нескольких контрактах
+        return exists().where(
+            ContractModel.supplier_id == self.model.supplier_id,
+            ContractModel.company_id == company_id
+        )
+
+    @staticmethod
+    def _get_sort_column(sort: ProductSortOrder) -> Tuple[InstrumentedAttribute, bool]:
+        """Колонка и направление сортировки каталога"""
+        columns = {
+            ProductSortOrder.name_asc: (ProductVersionModel.name, False),
+            ProductSortOrder.name_desc: (ProductVersionModel.name, True),
+            ProductSortOrder.price_asc: (ProductVersionModel.price, False),
+            ProductSortOrder.price_desc: (ProductVersionModel.price, True),
+        }
+        return columns[sort]
 
     async def get_products_by_supplies_products(
             self,
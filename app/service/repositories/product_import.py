@@ -0,0 +1,166 @@
+from typing import Iterable, Tuple
+
+from sqlalchemy import (
+    MetaData,
+    Table,
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Float,
+    Text,
+    select,
+    update,
+    exists,
+    func,
+    literal,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import (
+    Product as ProductModel,
+    ProductVersion as ProductVersionModel,
+    ExpenseSupplier as ExpenseSupplierModel,
+)
+
+
+# временная таблица импорта живет до конца транзакции и не входит в метаданные моделей
+product_import_staging = Table(
+    "product_import_staging",
+    MetaData(),
+    Column("row_number", Integer, nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("category", String(255), nullable=False),
+    Column("price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("description", Text),
+    Column("article", BigInteger, nullable=False),
+    Column("content_hash", String(64), nullable=False),
+    Column("product_version_id", Integer),
+    Column("product_id", Integer),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+PRODUCT_IMPORT_STAGING_COLUMNS = (
+    "row_number", "name", "category", "price", "quantity", "description", "article", "content_hash"
+)
+
+# диапазон артикулов utils.generate_unique_code
+ARTICLE_MIN = 1_000_000_000
+ARTICLE_RANGE = 9_000_000_000
+
+
+class ProductImportRepository:
+    """Репозиторий массового импорта товаров через COPY во временную таблицу"""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_staging(self) -> None:
+        """Создать временную таблицу импорта в текущей транзакции"""
+        await self.session.execute(CreateTable(product_import_staging))
+
+    async def copy_to_staging(self, rows: Iterable[Tuple]) -> None:
+        """
+        Загрузить строки во временную таблицу через COPY.
+        Порядок значений строки - PRODUCT_IMPORT_STAGING_COLUMNS
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        # COPY идет через то же соединение asyncpg и в той же транзакции, что и сессия
+        await raw_connection.driver_connection.copy_records_to_table(
+            product_import_staging.name,
+            records=rows,
+            columns=PRODUCT_IMPORT_STAGING_COLUMNS,
+        )
+
+    async def create_products_from_staging(self, supplier_id: int) -> int:
+        """
+        Создать версии товаров, товары и остатки поставщика из временной таблицы.
+        Id заранее берутся из последовательностей, чтобы связать строки без построчных вставок
+        """
+        staging = product_import_staging
+        await self.session.execute(
+            update(staging)
+            .values(
+                product_version_id=func.nextval(
+                    func.pg_get_serial_sequence(ProductVersionModel.__tablename__, "id")
+                ),
+                product_id=func.nextval(
+                    func.pg_get_serial_sequence(ProductModel.__tablename__, "id")
+                ),
+            )
+        )
+        await self.session.execute(
+            insert(ProductVersionModel)
+            .from_select(
+                ["id", "name", "category", "price", "description", "content_hash"],
+                select(
+                    staging.c.product_version_id,
+                    staging.c.name,
+                    staging.c.category,
+                    staging.c.price,
+                    staging.c.description,
+                    staging.c.content_hash,
+                )
+                .order_by(staging.c.row_number)
+            )
+        )
+        await self._insert_products(supplier_id)
+        result = await self.session.execute(
+            insert(ExpenseSupplierModel)
+            .from_select(
+                ["supplier_id", "product_id", "quantity", "reserved"],
+                select(
+                    literal(supplier_id),
+                    staging.c.product_id,
+                    staging.c.quantity,
+                    literal(0),
+                )
+                .order_by(staging.c.row_number)
+            )
+        )
+        return result.rowcount
+
+    async def _insert_products(self, supplier_id: int) -> None:
+        """
+        Создать товары из временной таблицы.
+        Строки, артикул которых уже занят существующим товаром или строкой этого импорта,
+        не вставляются - им выдаются новые артикулы и вставка повторяется
+        """
+        staging = product_import_staging
+        remaining = (
+            await self.session.execute(select(func.count()).select_from(staging))
+        ).scalar_one()
+        not_created = ~exists().where(ProductModel.id == staging.c.product_id)
+        while remaining:
+            result = await self.session.execute(
+                insert(ProductModel)
+                .from_select(
+                    ["id", "article", "product_version_id", "supplier_id"],
+                    select(
+                        staging.c.product_id,
+                        staging.c.article,
+                        staging.c.product_version_id,
+                        literal(supplier_id),
+                    )
+                    .where(not_created)
+                    .order_by(staging.c.row_number)
+                )
+                .on_conflict_do_nothing(index_elements=[ProductModel.article])
+                .returning(ProductModel.id)
+            )
+            remaining -= len(result.all())
+            if remaining:
+                await self.session.execute(
+                    update(staging)
+                    .where(not_created)
+                    .values(
+                        article=ARTICLE_MIN + func.floor(func.random() * ARTICLE_RANGE).cast(BigInteger)
+                    )
+                )
@@ -1,16 +1,20 @@
-from typing import Optional, List, Iterable
+from typing import Optional, List, Iterable, Dict
 
-from sqlalchemy import select
+from sqlalchemy import select, delete, exists, union
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import(
     Product as ProductModel,
     ProductVersion as ProductVersionModel,
+    SupplyProduct as SupplyProductModel,
+    SupplyProductArchive as SupplyProductArchiveModel,
+    ExpenseCompany as ExpenseCompanyModel,
 )
 from service.repositories.base_repository import(
      BaseRepository,
 )
 from service.items_services.product import ProductVersionItem
+from service.product_version_cache import product_version_cache
 
 
 class ProductVersionRepository(BaseRepository[ProductVersionModel]):
@@ -37,16 +41,70 @@ class ProductVersionRepository(BaseRepository[ProductVersionModel]):
         products_version: Iterable[ProductVersionModel] = result.scalars().all()
         return [self.item(**p.dict) for p in products_version]
 
-    # временно эта функция нужна для логики формирования поставки
-    async def get_by_product_id(self, product_id: int) -> Optional[ProductVersionItem]:
-        """Получить версию продукта по id продукта"""
-        stmt = (
+    async def get_by_ids_cached(self, ids: Iterable[int]) -> Dict[int, ProductVersionItem]:
+        """
+        Получить версии по id через кэш воркера.
+        Отсутствующие в кэше загружаются одним запросом и кэшируются
+        """
+        ids = set(ids)
+        versions = product_version_cache.get_many(ids)
+        if missing := ids - versions.keys():
+            result = await self.session.execute(
+                select(self.model).where(self.model.id.in_(missing))
+            )
+            loaded = [self.item(**model.dict) for model in result.scalars()]
+            product_version_cache.put_many(loaded)
+            versions.update((version.id, version) for version in loaded)
+        return versions
+
+    async def get_recently_referenced(self, limit: int) -> List[ProductVersionItem]:
+        """Получить версии последних измененных товаров и последних продуктов поставок"""
+        recent_products = (
+            select(ProductModel.product_version_id)
+            .order_by(ProductModel.updated_at.desc())
+            .limit(limit)
+            .subquery()
+        )
+        recent_supply_products = (
+            select(SupplyProductModel.product_version_id)
+            .order_by(SupplyProductModel.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        recent = union(
+            select(recent_products.c.product_version_id),
+            select(recent_supply_products.c.product_version_id),
+        ).subquery()
+        result = await self.session.execute(
             select(self.model)
+            .where(self.model.id.in_(select(recent.c.product_version_id)))
+            .order_by(self.model.id.desc())
+            .limit(limit)
+        )
+        return [self.item(**model.dict) for model in result.scalars()]
+
+    async def delete_orphaned_batch(self, batch_size: int) -> int:
+        """
+        Удалить пачку версий, на которые не ссылаются товары, продукты поставок
+        (в том числе архивных) и склады компаний.
+        Строки пачки блокируются с SKIP LOCKED - параллельные запуски не пересекаются,
+        а вставка ссылки на версию во время удаления дождется его и получит ошибку внешнего ключа
+        """
+        batch = (
+            select(self.model.id)
             .where(
-                ProductModel.id == product_id,
-                self.model.id == ProductModel.product_version_id
+                ~exists().where(ProductModel.product_version_id == self.model.id),
+                ~exists().where(SupplyProductModel.product_version_id == self.model.id),
+                ~exists().where(SupplyProductArchiveModel.product_version_id == self.model.id),
+                ~exists().where(ExpenseCompanyModel.product_version_id == self.model.id),
             )
+            .order_by(self.model.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("batch")
         )
-        result = await self.session.execute(stmt)
-        products_version = result.scalar_one_or_none()
-        return ProductVersionItem(**products_version.dict) if products_version else None
\ No newline at end of file
+        result = await self.session.execute(
+            delete(self.model)
+            .where(self.model.id.in_(select(batch.c.id)))
+        )
+        return result.rowcount
@@ -10,6 +10,7 @@ from models import(
     ExpenseCompany as ExpenseCompanyModel,
 )
 
+from service.repositories.supply import get_supply_sources
 from service.items_services.dashboard.statistic_map_item import (
     SuppliesStatisticOfMonthItem,
     GeneralStatisticCompany,
@@ -28,22 +29,23 @@ class StatisticRepository:
             organizer: FilterForGettingGraphStatistic
     ) -> Optional[List[dict]]:
         """Получить статистику поставок по компании за месяц"""
+        supply_table, _ = get_supply_sources(organizer.include_archive)
         select_query = select(
-            func.date_trunc("month", SupplyModel.created_at).label("month"),
-            func.count(SupplyModel.id).label("count")
+            func.date_trunc("month", supply_table.c.created_at).label("month"),
+            func.count(supply_table.c.id).label("count")
         )
 
         if organizer.organizer_role == "supplier":
             stmt = (
                 select_query
-                .where(SupplyModel.supplier_id == organizer.organization_id)
+                .where(supply_table.c.supplier_id == organizer.organization_id)
                 .group_by("month")
                 .order_by("month")
             )
         elif organizer.organizer_role == "company":
             stmt = (
                 select_query
-                .where(SupplyModel.company_id == organizer.organization_id)
+                .where(supply_table.c.company_id == organizer.organization_id)
                 .group_by("month")
                 .order_by("month")
             )
@@ -58,13 +60,15 @@ class StatisticRepository:
 
     async def get_general_statistics_by_company_id(
             self,
-            company_id: int
+            company_id: int,
+            include_archive: bool = False
     ) -> Optional[GeneralStatisticCompany]:
         """Получить общую статистику по компании"""
+        supply_table, _ = get_supply_sources(include_archive)
         stmt = (
             select(
-                select(func.count(SupplyModel.id))
-                .where(SupplyModel.company_id == company_id).label("all_supplies_count"),
+                select(func.count(supply_table.c.id))
+                .where(supply_table.c.company_id == company_id).label("all_supplies_count"),
                 # TODO: Оптимизировать
                 select(func.count(SupplyModel.id))
                 .where(
@@ -84,13 +88,15 @@ class StatisticRepository:
 
     async def get_general_statistics_by_supplier_id(
             self,
-            supplier_id: int
+            supplier_id: int,
+            include_archive: bool = False
     ) -> Optional[GeneralStatisticSupplier]:
         """Получить общую статистику по поставщику"""
+        supply_table, _ = get_supply_sources(include_archive)
         stmt = (
             select(
-                select(func.count(SupplyModel.id))
-                .where(SupplyModel.supplier_id == supplier_id).label("all_supplies_count"),
+                select(func.count(supply_table.c.id))
+                .where(supply_table.c.supplier_id == supplier_id).label("all_supplies_count"),
                 # TODO: Оптимизировать
                 select(func.count(SupplyModel.id))
                 .where(
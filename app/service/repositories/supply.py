@@ -1,6 +1,26 @@
-from typing import Optional, List
+from typing import Optional, List, Iterable, Tuple, AsyncIterator, Sequence
+from datetime import datetime, timedelta
 
-from sqlalchemy import select, update
+from sqlalchemy import (
+    select,
+    update,
+    exists,
+    tuple_,
+    and_,
+    or_,
+    func,
+    cast,
+    literal_column,
+    table,
+    column,
+    Text,
+    CTE,
+    ColumnElement,
+    RowMapping,
+    FromClause,
+    union_all
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
@@ -10,18 +30,95 @@ from models import(
     Supply as SupplyModel,
     Product as ProductModel,
     ProductVersion as ProductVersionModel,
+    SupplyArchive as SupplyArchiveModel,
+    SupplyProductArchive as SupplyProductArchiveModel,
 )
+from utils import escape_like
 from service.repositories.base_repository import(
      BaseRepository,
 )
+from service.repositories.product_version import ProductVersionRepository
+from service.items_services.product import with_product_version_fields
 from service.items_services.supply import (
     SupplyProductItem,
     SupplyResponseItem,
     SupplyItem,
+    SupplyCursor,
+    SupplyFilter,
+    SuppliesPage,
+    SuppliesPageJson,
     parse_supplies_rows
 )
 
 
+# общие колонки горячих и архивных таблиц для чтения истории
+SUPPLY_ARCHIVE_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "article",
+    "supplier_id",
+    "company_id",
+    "status",
+    "is_wait_confirm",
+    "delivery_address",
+    "total_price",
+)
+SUPPLY_PRODUCT_ARCHIVE_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "supply_id",
+    "product_version_id",
+    "product_id",
+    "quantity",
+)
+
+
+def get_supply_sources(include_archive: bool = False) -> Tuple[FromClause, FromClause]:
+    """
+    Источники поставок и продуктов поставок.
+    Без истории - только горячие таблицы, с историей - их объединение с архивом
+    """
+    supply_table: FromClause = SupplyModel.__table__
+    supply_products_table: FromClause = SupplyProductModel.__table__
+    if not include_archive:
+        return supply_table, supply_products_table
+
+    supply_archive_table = SupplyArchiveModel.__table__
+    supply_products_archive_table = SupplyProductArchiveModel.__table__
+    supplies = union_all(
+        select(*(supply_table.c[name] for name in SUPPLY_ARCHIVE_COLUMNS)),
+        select(*(supply_archive_table.c[name] for name in SUPPLY_ARCHIVE_COLUMNS)),
+    ).subquery("supplys")
+    supply_products = union_all(
+        select(*(supply_products_table.c[name] for name in SUPPLY_PRODUCT_ARCHIVE_COLUMNS)),
+        select(*(supply_products_archive_table.c[name] for name in SUPPLY_PRODUCT_ARCHIVE_COLUMNS)),
+    ).subquery("supply_products")
+    return supplies, supply_products
+
+
+def get_line_product_joins(
+        supply_products_table: FromClause
+) -> Tuple[Tuple[FromClause, ColumnElement[bool]], Tuple[FromClause, ColumnElement[bool]]]:
+    """
+    Продукт строки поставки для outer join: по сохраненному product_id,
+    у строк, созданных до его сохранения, - по текущей версии продукта
+    """
+    product = aliased(ProductModel)
+    legacy_product = aliased(ProductModel)
+    return (
+        (product, product.id == supply_products_table.c.product_id),
+        (
+            legacy_product,
+            and_(
+                supply_products_table.c.product_id.is_(None),
+                legacy_product.product_version_id == supply_products_table.c.product_version_id
+            )
+        ),
+    )
+
+
 class SupplyRepository(BaseRepository[SupplyModel]):
     """Репозиторий бизнес логики работы с поставкой"""
 
@@ -41,25 +138,241 @@ class SupplyRepository(BaseRepository[SupplyModel]):
         model = result.scalar_one_or_none()
         return self.item(**model.dict, model=model) if model is not None else None
 
-    async def get_all_by_organizer_id(
+    async def get_by_id_for_confirm(
+            self,
+            supply_id: int,
+            supplier_id: int,
+            user_company_id: int
+    ) -> Tuple[Optional[SupplyItem], bool]:
+        """Заблокировать поставку поставщика на время подтверждения (SELECT ... FOR UPDATE)
+
+        Вторым значением возвращается признак закрепления поставки
+        за другим сотрудником с неистекшей арендой
+        """
+        stmt = (
+            select(
+                self.model,
+                and_(
+                    self.model.claimed_by.is_not(None),
+                    self.model.claimed_by != user_company_id,
+                    self.model.claimed_until > func.now()
+                ).label("is_claimed_by_other")
+            )
+            .where(
+                self.model.id == supply_id,
+                self.model.supplier_id == supplier_id
+            )
+            .with_for_update(of=self.model)
+        )
+        result = await self.session.execute(stmt)
+        if (row := result.first()) is None:
+            return None, False
+        model, is_claimed_by_other = row
+        return self.item(**model.dict, model=model), bool(is_claimed_by_other)
+
+    async def claim_wait_confirm(
+            self,
+            supplier_id: int,
+            user_company_id: int,
+            limit: int,
+            lease_seconds: int
+    ) -> List[int]:
+        """Закрепить за сотрудником следующие поставки из очереди подтверждения
+
+        Строки, заблокированные параллельными запросами, пропускаются (FOR UPDATE SKIP LOCKED),
+        поэтому несколько сотрудников разбирают очередь без конфликтов
+        """
+        pending = (
+            select(self.model.id)
+            .where(
+                self.model.supplier_id == supplier_id,
+                self.model.is_wait_confirm,
+                or_(
+                    self.model.claimed_until.is_(None),
+                    self.model.claimed_until < func.now(),
+                    self.model.claimed_by == user_company_id
+                )
+            )
+            .order_by(self.model.created_at, self.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id.in_(pending.scalar_subquery()))
+            .values(
+                claimed_by=user_company_id,
+                claimed_until=func.now() + timedelta(seconds=lease_seconds)
+            )
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def release_claim(
+            self,
+            supply_id: int,
+            supplier_id: int,
+            user_company_id: int
+    ) -> bool:
+        """Вернуть поставку в очередь подтверждения"""
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == supply_id,
+                self.model.supplier_id == supplier_id,
+                self.model.claimed_by == user_company_id
+            )
+            .values(claimed_by=None, claimed_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount != 0
+
+    def _get_page_subquery(
             self,
             limit: int,
             supplier_id: Optional[int] = None,
             company_id: Optional[int] = None,
+            is_wait_confirm: bool = False,
+            cursor: Optional[SupplyCursor] = None,
+            supplies_ids: Optional[Iterable[int]] = None,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False
+    ) -> CTE:
+        """CTE id поставок страницы в порядке (created_at, id)"""
+        supply_table, supply_products_table = get_supply_sources(include_archive)
+        # limit применяется к поставкам, а не к строкам с продуктами
+        page = (
+            select(supply_table.c.id, supply_table.c.created_at)
+            .order_by(supply_table.c.created_at.desc(), supply_table.c.id.desc())
+            .limit(limit)
+        )
+
+        # filters
+        page = page.where(
+            *self._get_organizer_clauses(supply_table, supplier_id, company_id, is_wait_confirm)
+        )
+        if cursor is not None:
+            page = page.where(
+                # отдельное условие по created_at дает отсечение секций,
+                # сравнение кортежей планировщик для этого не использует
+                supply_table.c.created_at <= cursor.created_at,
+                tuple_(supply_table.c.created_at, supply_table.c.id) < tuple_(cursor.created_at, cursor.id)
+            )
+        if supplies_ids is not None:
+            page = page.where(supply_table.c.id.in_(supplies_ids))
+        if filters is not None:
+            page = page.where(*self._get_filters_clauses(
+                supply_table, supply_products_table, filters, supplier_id=supplier_id
+            ))
+        return page.cte("page")
+
+    @staticmethod
+    def _get_organizer_clauses(
+            supply_table: FromClause,
+            supplier_id: Optional[int] = None,
+            company_id: Optional[int] = None,
             is_wait_confirm: bool = False
-    ) -> Optional[List[SupplyResponseItem]]:
-        """Получить все поставки по id поставщика"""
+    ) -> List[ColumnElement[bool]]:
+        """Условия поставок организации"""
+        clauses = []
+        if company_id:
+            clauses.append(supply_table.c.company_id == company_id)
+        if supplier_id:
+            clauses.extend((
+                supply_table.c.supplier_id == supplier_id,
+                supply_table.c.is_wait_confirm == is_wait_confirm
+            ))
+        return clauses
+
+    @staticmethod
+    def _get_filters_clauses(
+            supply_table: FromClause,
+            supply_products_table: FromClause,
+            filters: SupplyFilter,
+            supplier_id: Optional[int] = None
+    ) -> List[ColumnElement[bool]]:
+        """Условия фильтров списка поставок"""
+        clauses = []
+        if filters.statuses:
+            clauses.append(supply_table.c.status.in_(filters.statuses))
+        if filters.created_from is not None:
+            clauses.append(supply_table.c.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            clauses.append(supply_table.c.created_at < filters.created_to)
+        if filters.counterparty_id is not None:
+            # контрагент поставщика - компания, контрагент компании - поставщик
+            counterparty = supply_table.c.company_id if supplier_id else supply_table.c.supplier_id
+            clauses.append(counterparty == filters.counterparty_id)
+        if filters.article is not None:
+            clauses.append(supply_table.c.article == filters.article)
+        if filters.delivery_address:
+            # ILIKE по подстроке обслуживается trigram-индексом
+            clauses.append(
+                supply_table.c.delivery_address.ilike(
+                    f"%{escape_like(filters.delivery_address)}%", escape="\\"
+                )
+            )
+        if filters.product_id is not None:
+            # строки, созданные до сохранения product_id, связаны с продуктом только текущей версией
+            legacy_line = and_(
+                supply_products_table.c.product_id.is_(None),
+                exists().where(
+                    ProductModel.id == filters.product_id,
+                    ProductModel.product_version_id == supply_products_table.c.product_version_id
+                )
+            )
+            clauses.append(
+                exists()
+                .where(
+                    supply_products_table.c.supply_id == supply_table.c.id,
+                    or_(supply_products_table.c.product_id == filters.product_id, legacy_line)
+                )
+            )
+        return clauses
+
+    async def get_all_by_organizer_id(
+            self,
+            limit: int,
+            supplier_id: Optional[int] = None,
+            company_id: Optional[int] = None,
+            is_wait_confirm: bool = False,
+            cursor: Optional[SupplyCursor] = None,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False
+    ) -> SuppliesPage:
+        """Получить страницу поставок по id организации"""
         supplier = aliased(OrganizerModel)
         company = aliased(OrganizerModel)
+        supply_table, supply_products_table = get_supply_sources(include_archive)
+        (product, product_on), (legacy_product, legacy_product_on) = get_line_product_joins(
+            supply_products_table
+        )
+
+        # на одну поставку больше страницы - по ней видно, есть ли следующая страница
+        page = self._get_page_subquery(
+            limit=limit + 1,
+            supplier_id=supplier_id,
+            company_id=company_id,
+            is_wait_confirm=is_wait_confirm,
+            cursor=cursor,
+            filters=filters,
+            include_archive=include_archive
+        )
 
+        # outer join - каждая поставка страницы дает хотя бы одну строку,
+        # даже если продукты ее строк обновлены или удалены
         stmt = (
             select(
-                self.model.id,
-                self.model.article,
-                self.model.delivery_address,
-                self.model.total_price,
-                self.model.status,
-                self.model.is_wait_confirm,
+                page.c.id,
+                page.c.created_at,
+                supply_table.c.article,
+                supply_table.c.delivery_address,
+                supply_table.c.total_price,
+                supply_table.c.status,
+                supply_table.c.is_wait_confirm,
 
                 supplier.id.label("supplier_id"),
                 supplier.name.label("supplier_name"),
@@ -67,46 +380,271 @@ class SupplyRepository(BaseRepository[SupplyModel]):
                 company.id.label("company_id"),
                 company.name.label("company_name"),
 
-                SupplyProductModel.quantity,
+                supply_products_table.c.quantity,
 
-                ProductModel.id.label("product_id"),
-                ProductModel.article.label("product_article"),
+                supply_products_table.c.product_version_id,
+                func.coalesce(product.id, legacy_product.id).label("product_id"),
+                func.coalesce(product.article, legacy_product.article).label("product_article"),
+            )
+            .select_from(page)
+            .join(supply_table, supply_table.c.id == page.c.id)
+            .join(supplier, supplier.id == supply_table.c.supplier_id)
+            .join(company, company.id == supply_table.c.company_id)
+            .outerjoin(supply_products_table, supply_table.c.id == supply_products_table.c.supply_id)
+            .outerjoin(product, product_on)
+            .outerjoin(legacy_product, legacy_product_on)
+            .order_by(page.c.created_at.desc(), page.c.id.desc(), supply_products_table.c.id)
+        )
+
+        result = await self.session.execute(stmt)
+        supplies = result.mappings().all()
+        if not supplies:
+            return SuppliesPage()
+
+        # следующая страница и ключ курсора - по поставкам страницы, а не по строкам продуктов
+        next_cursor = None
+        page_keys = list(dict.fromkeys((supply["created_at"], supply["id"]) for supply in supplies))
+        if len(page_keys) > limit:
+            extra_id = page_keys[limit][1]
+            supplies = [supply for supply in supplies if supply["id"] != extra_id]
+            created_at, last_id = page_keys[limit - 1]
+            next_cursor = SupplyCursor(created_at=created_at, id=last_id).encode()
+
+        # название, категория и цена версий берутся из кэша вместо join на product_versions
+        versions = await ProductVersionRepository(self.session).get_by_ids_cached(
+            supply["product_version_id"] for supply in supplies
+            if supply["product_version_id"] is not None
+        )
+        supplies = [
+            with_product_version_fields(
+                supply,
+                versions[supply["product_version_id"]],
+                product_name="name",
+                product_category="category",
+                product_price="price"
+            )
+            if supply["product_version_id"] is not None else supply
+            for supply in supplies
+        ]
+        # парсим полученые объекты rows в словарь
+        supplies_dict_list = parse_supplies_rows(supplies)
+
+        return SuppliesPage(
+            supplies=[SupplyResponseItem.get_from_dict(dict(supply)) for supply in supplies_dict_list],
+            next_cursor=next_cursor
+        )
+
+    async def stream_export_rows(
+            self,
+            supplier_id: Optional[int] = None,
+            company_id: Optional[int] = None,
+            is_wait_confirm: bool = False,
+            filters: Optional[SupplyFilter] = None,
+            batch_size: int = 1000,
+            include_archive: bool = False
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """
+        Построчная выгрузка поставок с продуктами через серверный курсор.
+        Строки читаются пачками по batch_size и не накапливаются в памяти.
+        Название, категория и цена берутся из версии продукта строки поставки,
+        артикул - из продукта, если он не удален
+        """
+        supplier = aliased(OrganizerModel)
+        company = aliased(OrganizerModel)
+        supply_table, supply_products_table = get_supply_sources(include_archive)
+        (product, product_on), (legacy_product, legacy_product_on) = get_line_product_joins(
+            supply_products_table
+        )
+
+        stmt = (
+            select(
+                supply_table.c.id.label("supply_id"),
+                supply_table.c.article,
+                supply_table.c.created_at,
+                supply_table.c.status,
+                supply_table.c.is_wait_confirm,
+                supplier.id.label("supplier_id"),
+                supplier.name.label("supplier_name"),
+                company.id.label("company_id"),
+                company.name.label("company_name"),
+                supply_table.c.delivery_address,
+                supply_table.c.total_price,
+                func.coalesce(product.id, legacy_product.id).label("product_id"),
+                func.coalesce(product.article, legacy_product.article).label("product_article"),
                 ProductVersionModel.name.label("product_name"),
                 ProductVersionModel.category.label("product_category"),
-                ProductVersionModel.price.label("product_price")
+                ProductVersionModel.price.label("product_price"),
+                supply_products_table.c.quantity,
             )
+            .join(supplier, supplier.id == supply_table.c.supplier_id)
+            .join(company, company.id == supply_table.c.company_id)
+            .join(supply_products_table, supply_products_table.c.supply_id == supply_table.c.id)
+            .join(ProductVersionModel, supply_products_table.c.product_version_id == ProductVersionModel.id)
+            .outerjoin(product, product_on)
+            .outerjoin(legacy_product, legacy_product_on)
+            .where(*self._get_organizer_clauses(supply_table, supplier_id, company_id, is_wait_confirm))
+            .order_by(supply_table.c.created_at, supply_table.c.id, supply_products_table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if filters is not None:
+            stmt = stmt.where(*self._get_filters_clauses(
+                supply_table, supply_products_table, filters, supplier_id=supplier_id
+            ))
 
-            .join(supplier, supplier.id == self.model.supplier_id)
-            .join(company, company.id == self.model.company_id)
-            .join(SupplyProductModel, self.model.id == SupplyProductModel.supply_id)
-            .join(ProductVersionModel, SupplyProductModel.product_version_id == ProductVersionModel.id)
-            .join(ProductModel, ProductVersionModel.id == ProductModel.product_version_id)
+        result = await self.session.stream(stmt)
+        async for partition in result.mappings().partitions():
+            yield partition
 
+    async def get_all_json_by_organizer_id(
+            self,
+            limit: int,
+            supplier_id: Optional[int] = None,
+            company_id: Optional[int] = None,
+            is_wait_confirm: bool = False,
+            cursor: Optional[SupplyCursor] = None,
+            supplies_ids: Optional[Iterable[int]] = None,
+            filters: Optional[SupplyFilter] = None,
+            include_archive: bool = False
+    ) -> SuppliesPageJson:
+        """Получить страницу поставок по id организации в виде JSON,
+        собранного на стороне БД через json_build_object/json_agg"""
+        supplier = aliased(OrganizerModel)
+        company = aliased(OrganizerModel)
+        supply_table, supply_products_table = get_supply_sources(include_archive)
+        (product, product_on), (legacy_product, legacy_product_on) = get_line_product_joins(
+            supply_products_table
         )
 
-        # filters
-        if company_id:
-            stmt = (
-                stmt.where(self.model.company_id == company_id)
+        # на одну поставку больше страницы - по ней видно, есть ли следующая страница
+        page_with_next = self._get_page_subquery(
+            limit=limit + 1,
+            supplier_id=supplier_id,
+            company_id=company_id,
+            is_wait_confirm=is_wait_confirm,
+            cursor=cursor,
+            supplies_ids=supplies_ids,
+            filters=filters,
+            include_archive=include_archive
+        )
+        page = (
+            select(page_with_next.c.id, page_with_next.c.created_at)
+            .order_by(page_with_next.c.created_at.desc(), page_with_next.c.id.desc())
+            .limit(limit)
+            .cte("visible_page")
+        )
 
-                .order_by(self.model.created_at.desc())
+        products = (
+            select(
+                supply_products_table.c.supply_id,
+                func.json_agg(
+                    func.json_build_object(
+                        "product", func.json_build_object(
+                            "id", func.coalesce(product.id, legacy_product.id),
+                            "name", ProductVersionModel.name,
+                            "category", ProductVersionModel.category,
+                            "price", ProductVersionModel.price,
+                            "article", func.coalesce(product.article, legacy_product.article)
+                        ),
+                        "quantity", supply_products_table.c.quantity
+                    )
+                ).label("supply_products")
             )
-        if supplier_id:
-            stmt = (
-                stmt.where(
-                    self.model.supplier_id == supplier_id,
-                    self.model.is_wait_confirm == is_wait_confirm
-                )
-                .order_by(self.model.created_at.desc())
+            .join(ProductVersionModel, supply_products_table.c.product_version_id == ProductVersionModel.id)
+            .outerjoin(product, product_on)
+            .outerjoin(legacy_product, legacy_product_on)
+            .where(supply_products_table.c.supply_id.in_(select(page.c.id)))
+            .group_by(supply_products_table.c.supply_id)
+            .subquery("products")
+        )
+
+        supplies = (
+            select(
+                page.c.id,
+                page.c.created_at,
+                func.json_build_object(
+                    "article", supply_table.c.article,
+                    "supplier", func.json_build_object("id", supplier.id, "name", supplier.name),
+                    "company", func.json_build_object("id", company.id, "name", company.name),
+                    "supply_products", func.coalesce(
+                        products.c.supply_products, literal_column("'[]'::json")
+                    ),
+                    "status", supply_table.c.status,
+                    "delivery_address", supply_table.c.delivery_address,
+                    "total_price", supply_table.c.total_price,
+                    "id", supply_table.c.id
+                ).label("supply")
             )
+            .select_from(page)
+            .join(supply_table, supply_table.c.id == page.c.id)
+            .join(supplier, supplier.id == supply_table.c.supplier_id)
+            .join(company, company.id == supply_table.c.company_id)
+            # outer join - поставка остается на странице при любом составе строк
+            .outerjoin(products, products.c.supply_id == page.c.id)
+            .subquery("supplies")
+        )
+
+        order = (supplies.c.created_at.desc(), supplies.c.id.desc())
+        # последняя поставка страницы - ключ курсора следующей страницы,
+        # берется из самой страницы, а не из собранных строк
+        last = (
+            select(page.c.created_at, page.c.id)
+            .order_by(page.c.created_at.asc(), page.c.id.asc())
+            .limit(1)
+            .subquery("last_supply")
+        )
+        stmt = select(
+            cast(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(supplies.c.supply, *order)),
+                    literal_column("'[]'::json")
+                ),
+                Text
+            ).label("supplies"),
+            func.count().label("count"),
+            select(last.c.created_at).scalar_subquery().label("last_created_at"),
+            select(last.c.id).scalar_subquery().label("last_id"),
+            (
+                select(func.count()).select_from(page_with_next).scalar_subquery() > limit
+            ).label("has_next"),
+        ).select_from(supplies)
 
         result = await self.session.execute(stmt)
-        if (supplies := result.mappings().all()) is None:
-            return None
-        # парсим полученые объекты rows в словарь
-        # TODO: исправить временную реализацию с limit
-        supplies_dict_list = parse_supplies_rows(supplies, limit)
-        return [SupplyResponseItem.get_from_dict(dict(supply)) for supply in supplies_dict_list]
+        row = result.mappings().one()
+
+        next_cursor = None
+        if row["has_next"]:
+            next_cursor = SupplyCursor(
+                created_at=row["last_created_at"],
+                id=row["last_id"]
+            ).encode()
+
+        return SuppliesPageJson(
+            supplies=row["supplies"].encode(),
+            count=row["count"],
+            next_cursor=next_cursor
+        )
+
+    async def ensure_partitions(self, months_ahead: int) -> int:
+        """Создать недостающие месячные секции поставок с текущего месяца вперед"""
+        result = await self.session.execute(
+            select(func.ensure_supplys_partitions(func.current_date(), months_ahead))
+        )
+        return result.scalar_one()
+
+    async def get_default_partition_months(self) -> List[datetime]:
+        """
+        Месяцы поставок, попавших в секцию supplys_default.
+        Секцию месяца, строки которого лежат в supplys_default, создать нельзя
+        """
+        created_at = column("created_at")
+        month = func.date_trunc("month", created_at)
+        result = await self.session.execute(
+            select(month)
+            .select_from(table("supplys_default", created_at))
+            .group_by(month)
+            .order_by(month)
+        )
+        return list(result.scalars().all())
 
     async def get_supply_products_by_supply_id(
             self,
@@ -0,0 +1,76 @@
+from typing import Iterable
+from datetime import timedelta
+
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import (
+    Supply as SupplyModel,
+    SupplyProduct as SupplyProductModel,
+    SupplyArchive as SupplyArchiveModel,
+    SupplyProductArchive as SupplyProductArchiveModel,
+)
+from service.repositories.supply import (
+    SUPPLY_ARCHIVE_COLUMNS,
+    SUPPLY_PRODUCT_ARCHIVE_COLUMNS,
+)
+
+
+class SupplyArchiveRepository:
+    """Репозиторий переноса закрытых поставок в архивные таблицы"""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def archive_closed_batch(
+            self,
+            closed_statuses: Iterable[str],
+            older_than: timedelta,
+            batch_size: int
+    ) -> int:
+        """
+        Перенести пачку закрытых поставок с продуктами в архив одним запросом.
+        Строки пачки блокируются с SKIP LOCKED - параллельные запуски не пересекаются,
+        продукты горячей таблицы удаляет триггер на удаление поставки
+        """
+        supply_table = SupplyModel.__table__
+        supply_products_table = SupplyProductModel.__table__
+
+        batch = (
+            select(SupplyModel.id)
+            .where(
+                SupplyModel.status.in_(closed_statuses),
+                SupplyModel.is_wait_confirm.is_(False),
+                SupplyModel.updated_at < func.now() - older_than
+            )
+            .order_by(SupplyModel.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("batch")
+        )
+        archived_supplies = (
+            insert(SupplyArchiveModel.__table__)
+            .from_select(
+                SUPPLY_ARCHIVE_COLUMNS,
+                select(*(supply_table.c[name] for name in SUPPLY_ARCHIVE_COLUMNS))
+                .where(supply_table.c.id.in_(select(batch.c.id)))
+            )
+            .cte("archived_supplies")
+        )
+        archived_products = (
+            insert(SupplyProductArchiveModel.__table__)
+            .from_select(
+                SUPPLY_PRODUCT_ARCHIVE_COLUMNS,
+                select(*(supply_products_table.c[name] for name in SUPPLY_PRODUCT_ARCHIVE_COLUMNS))
+                .where(supply_products_table.c.supply_id.in_(select(batch.c.id)))
+            )
+            .cte("archived_products")
+        )
+        stmt = (
+            delete(SupplyModel)
+            .where(SupplyModel.id.in_(select(batch.c.id)))
+            .returning(SupplyModel.id)
+            .add_cte(archived_supplies, archived_products)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return len(result.scalars().all())
@@ -1,6 +1,6 @@
 from typing import Optional, List, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import SupplyProduct as SupplyProductModel
@@ -22,9 +22,11 @@ class SupplyProductRepository(BaseRepository[SupplyProductModel]):
             self,
             products: Iterable[SupplyProductItem]
     ) -> None:
-        """Создать объекты"""
-        models = [self.model(**product.dict) for product in products]
-        self.session.add_all(models)
+        """Создать объекты одним запросом INSERT"""
+        values = [product.dict for product in products]
+        if not values:
+            return
+        await self.session.execute(insert(self.model), values)
 
     async def get_by_supply_id(
             self,
@@ -0,0 +1,178 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import settings
+from service.items_services.supply import SupplyEvent
+
+from logger import logger
+
+
+# события могли быть потеряны - клиент должен заново запросить список поставок
+RESYNC_MESSAGE = b"event: resync\ndata: {}\n\n"
+
+
+class SupplyEventsBroker:
+    """
+    Рассылка событий поставок клиентам SSE.
+    Воркер держит одно выделенное соединение с LISTEN на канал событий
+    и раздает полученные уведомления очередям подписчиков по id организатора.
+    Потерянное соединение переоткрывается, пока есть подписчики,
+    после этого и при переполнении очереди клиент получает событие resync
+    """
+    def __init__(
+            self,
+            dsn: str,
+            channel: str,
+            queue_size: int,
+            reconnect_delay_seconds: float = 1.0,
+            reconnect_max_delay_seconds: float = 30.0
+    ):
+        self._dsn = dsn
+        self._channel = channel
+        self._queue_size = queue_size
+        self._reconnect_delay_seconds = reconnect_delay_seconds
+        self._reconnect_max_delay_seconds = reconnect_max_delay_seconds
+        self._connection: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def publish(self, session: AsyncSession, event: SupplyEvent) -> None:
+        """
+        Отправить событие в канал.
+        NOTIFY транзакционный - подписчики получат событие только после commit сессии
+        """
+        await session.execute(
+            select(func.pg_notify(self._channel, event.payload))
+        )
+
+    async def start(self) -> None:
+        """Открыть соединение-слушатель, если оно еще не открыто"""
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(self._dsn)
+            self._connection.add_termination_listener(self._on_terminate)
+            await self._connection.add_listener(self._channel, self._on_notify)
+            logger.info(f"listen supply events on channel {self._channel}")
+
+    async def stop(self) -> None:
+        """Закрыть соединение-слушатель"""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        async with self._lock:
+            if self._connection is None:
+                return
+            connection, self._connection = self._connection, None
+            if not connection.is_closed():
+                await connection.close()
+
+    @asynccontextmanager
+    async def subscribe(self, organizer_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Подписаться на события поставок организатора, очередь содержит сообщения SSE"""
+        await self.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[organizer_id].add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(organizer_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[organizer_id]
+
+    async def stream(self, organizer_id: int) -> AsyncIterator[bytes]:
+        """Поток сообщений text/event-stream с keepalive-комментариями"""
+        keepalive_seconds = settings.supply_events.keepalive_seconds
+        async with self.subscribe(organizer_id) as queue:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    message: bytes = await asyncio.wait_for(
+                        queue.get(), timeout=keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield message
+
+    def _on_notify(
+            self,
+            connection: asyncpg.Connection,
+            pid: int,
+            channel: str,
+            payload: str
+    ) -> None:
+        """Разослать событие подписчикам поставщика и компании поставки"""
+        try:
+            event = SupplyEvent.from_payload(payload)
+        except (ValueError, TypeError):
+            logger.warning(f"invalid supply event payload: {payload}")
+            return
+        message = event.sse
+        for organizer_id in {event.supplier_id, event.company_id}:
+            for queue in self._subscribers.get(organizer_id, ()):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # медленный клиент не должен задерживать остальных: его события
+                    # отбрасываются, а клиент получает resync
+                    logger.warning(f"supply events queue is full for organizer {organizer_id}")
+                    self._resync(queue)
+
+    def _on_terminate(self, connection: asyncpg.Connection) -> None:
+        """Переоткрыть потерянное соединение, если есть подписчики"""
+        if self._connection is not connection:
+            return
+        self._connection = None
+        logger.warning("supply events listener connection is lost")
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Переподключение с экспоненциальной задержкой, пока есть подписчики"""
+        delay = self._reconnect_delay_seconds
+        while self._subscribers:
+            await asyncio.sleep(delay)
+            try:
+                await self.start()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning(f"supply events listener reconnect failed: {e}")
+                delay = min(delay * 2, self._reconnect_max_delay_seconds)
+                continue
+            # события, отправленные без соединения, потеряны
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    self._resync(queue)
+            return
+
+    @staticmethod
+    def _resync(queue: asyncio.Queue) -> None:
+        """Заменить события в очереди клиента сообщением resync"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC_MESSAGE)
+
+
+def get_listen_dsn() -> str:
+    """Получить dsn для asyncpg из url подключения SQLAlchemy"""
+    url = make_url(str(settings.database.url)).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+supply_events = SupplyEventsBroker(
+    dsn=get_listen_dsn(),
+    channel=settings.supply_events.channel,
+    queue_size=settings.supply_events.queue_size,
+    reconnect_delay_seconds=settings.supply_events.reconnect_delay_seconds,
+    reconnect_max_delay_seconds=settings.supply_events.reconnect_max_delay_seconds,
+)
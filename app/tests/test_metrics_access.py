@@ -0,0 +1,41 @@
+from typing import Optional
+
+import pytest
+from starlette.requests import Request
+
+from api.dependencies import check_is_internal_network
+from core import settings
+
+from exceptions.exceptions import ForbidenError
+
+
+def make_request(host: Optional[str]) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": settings.api.metrics.prefix,
+        "headers": [],
+        "client": (host, 50000) if host is not None else None,
+    })
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("host", ["127.0.0.1", "::1"])
+async def test_metrics_allowed_from_loopback(host):
+    await check_is_internal_network(make_request(host))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("host", ["203.0.113.10", "testclient", None])
+async def test_metrics_forbidden_outside_allowed_networks(host):
+    with pytest.raises(ForbidenError):
+        await check_is_internal_network(make_request(host))
+
+
+@pytest.mark.anyio
+async def test_metrics_allowed_networks_come_from_settings(monkeypatch):
+    monkeypatch.setattr(settings.metrics, "allowed_networks", ["10.0.0.0/8"])
+
+    await check_is_internal_network(make_request("10.1.2.3"))
+    with pytest.raises(ForbidenError):
+        await check_is_internal_network(make_request("127.0.0.1"))
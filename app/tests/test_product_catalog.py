@@ -0,0 +1,29 @@
+import pytest
+
+from schemas.product import ProductSortOrder
+from service.items_services.product import ProductCursor
+from service.repositories import ProductRepository
+
+from tests.conftest import create_product
+
+
+@pytest.mark.anyio
+async def test_catalog_last_page_has_no_next_cursor(session, supplier, company):
+    products_ids = [
+        await create_product(session, supplier, name=f"product {number}")
+        for number in range(3)
+    ]
+    repository = ProductRepository(session)
+
+    first = await repository.get_available_products_for_company(company.organizer_id, limit=2)
+    second = await repository.get_available_products_for_company(
+        company.organizer_id,
+        limit=2,
+        cursor=ProductCursor.decode(first.next_cursor, ProductSortOrder.name_asc)
+    )
+    whole = await repository.get_available_products_for_company(company.organizer_id, limit=3)
+
+    assert [product.id for product in first.products + second.products] == products_ids
+    assert first.next_cursor is not None
+    assert second.next_cursor is None
+    assert whole.next_cursor is None
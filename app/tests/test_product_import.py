@@ -0,0 +1,123 @@
+from typing import AsyncIterator, List
+
+import pytest
+
+from schemas.product import ProductImportFormat
+from service.items_services.product import ProductImportRecord, iter_product_import_batches
+
+from exceptions.exceptions import BadRequestError
+
+
+async def iter_chunks(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def read_batches(
+        data: bytes,
+        import_format: ProductImportFormat = ProductImportFormat.csv,
+        batch_size: int = 1,
+        chunk_size: int = 7,
+        max_rows: int = None
+) -> List[List[ProductImportRecord]]:
+    return [
+        batch async for batch in iter_product_import_batches(
+            iter_chunks(data, chunk_size), import_format, batch_size, max_rows
+        )
+    ]
+
+
+def flatten(batches: List[List[ProductImportRecord]]) -> List[ProductImportRecord]:
+    return [record for batch in batches for record in batch]
+
+
+@pytest.mark.anyio
+async def test_multiline_quoted_value_is_not_split_between_batches():
+    data = (
+        'name,category,price,quantity,description\n'
+        'shampoo,hair_care,10,1,"first line\n'
+        'second, with ""quotes""\n'
+        'third line"\n'
+        'soap,body_care,5,2,\n'
+    ).encode()
+
+    records = flatten(await read_batches(data))
+
+    assert [record.row for record in records] == [1, 2]
+    assert records[0].data["description"] == 'first line\nsecond, with "quotes"\nthird line'
+    assert records[1].data == {"name": "soap", "category": "body_care", "price": "5", "quantity": "2"}
+
+
+@pytest.mark.anyio
+async def test_quote_inside_unquoted_value_does_not_open_quoted_value():
+    data = (
+        'name,category,price,quantity,description\n'
+        'tv 5" screen,electronics,10,1,x\n'
+        'soap,body_care,5,2,y\n'
+    ).encode()
+
+    batches = await read_batches(data, batch_size=2)
+
+    assert [len(batch) for batch in batches] == [1, 1]
+    assert batches[0][0].data["name"] == 'tv 5" screen'
+
+
+@pytest.mark.anyio
+async def test_bom_is_stripped_from_header():
+    data = "﻿name,category,price,quantity\r\nsoap,body_care,5,2\r\n".encode("utf-8")
+
+    records = flatten(await read_batches(data, chunk_size=2))
+
+    assert records[0].data == {"name": "soap", "category": "body_care", "price": "5", "quantity": "2"}
+
+
+@pytest.mark.anyio
+async def test_wrong_column_count_is_reported_for_row():
+    data = (
+        'name,category,price,quantity\n'
+        'soap,body_care,5\n'
+        'soap,body_care,5,2,extra\n'
+        'soap,body_care,5,2\n'
+    ).encode()
+
+    records = flatten(await read_batches(data, batch_size=10))
+
+    assert [(record.row, record.error) for record in records] == [
+        (1, "expected 4 columns, got 3"),
+        (2, "expected 4 columns, got 5"),
+        (3, None),
+    ]
+
+
+@pytest.mark.anyio
+async def test_missing_required_column_is_rejected():
+    with pytest.raises(BadRequestError):
+        await read_batches(b"name,price,quantity\nsoap,5,2\n")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("import_format", "data"),
+    [
+        (ProductImportFormat.csv, b"name,category,price,quantity\n" + b"soap,body_care,5,2\n" * 3),
+        (ProductImportFormat.ndjson, b'{"name": "soap"}\n' * 3),
+    ]
+)
+async def test_rows_over_max_rows_are_rejected(import_format, data):
+    assert len(flatten(await read_batches(data, import_format, max_rows=3))) == 3
+    with pytest.raises(BadRequestError):
+        await read_batches(data, import_format, max_rows=2)
+
+
+@pytest.mark.anyio
+async def test_ndjson_errors_keep_row_numbers():
+    data = b'{"name": "soap"}\n\nnot json\n[1]\n{"name": "gel"}'
+
+    records = flatten(await read_batches(data, ProductImportFormat.ndjson))
+
+    assert [(record.row, record.error) for record in records] == [
+        (1, None),
+        (2, "invalid json"),
+        (3, "expected json object"),
+        (4, None),
+    ]
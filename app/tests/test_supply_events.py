@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from service import supply_events as supply_events_module
+from service.items_services.supply import SupplyEvent
+from service.supply_events import SupplyEventsBroker, RESYNC_MESSAGE
+
+
+class FakeConnection:
+    """Соединение-слушатель asyncpg без сервера"""
+    def __init__(self):
+        self.closed = False
+        self.notify_listener = None
+        self.termination_listener = None
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def add_termination_listener(self, callback) -> None:
+        self.termination_listener = callback
+
+    async def add_listener(self, channel, callback) -> None:
+        self.notify_listener = callback
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def notify(self, event: SupplyEvent) -> None:
+        self.notify_listener(self, 1, "supply_events", event.payload)
+
+    def terminate(self) -> None:
+        self.closed = True
+        self.termination_listener(self)
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(supply_events_module.asyncpg, "connect", connect)
+    return connections
+
+
+def make_event(supply_id: int) -> SupplyEvent:
+    return SupplyEvent(
+        event="supply_created",
+        supply_id=supply_id,
+        supplier_id=1,
+        company_id=2,
+        status="in_processing",
+        is_wait_confirm=True
+    )
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_replaced_with_resync(connections):
+    broker = SupplyEventsBroker(dsn="", channel="supply_events", queue_size=2)
+    async with broker.subscribe(organizer_id=2) as queue:
+        for supply_id in range(3):
+            connections[0].notify(make_event(supply_id))
+
+        assert queue.get_nowait() == RESYNC_MESSAGE
+        assert queue.empty()
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_lost_connection_is_reopened_while_subscribed(connections):
+    broker = SupplyEventsBroker(
+        dsn="",
+        channel="supply_events",
+        queue_size=10,
+        reconnect_delay_seconds=0.01
+    )
+    async with broker.subscribe(organizer_id=2) as queue:
+        connections[0].terminate()
+
+        assert await asyncio.wait_for(queue.get(), timeout=1) == RESYNC_MESSAGE
+        assert len(connections) == 2
+        connections[1].notify(make_event(1))
+        assert await asyncio.wait_for(queue.get(), timeout=1) == make_event(1).sse
+    await broker.stop()
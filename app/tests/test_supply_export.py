@@ -0,0 +1,28 @@
+import pytest
+
+from service.items_services.product import ProductVersionItem
+from service.repositories import SupplyRepository
+from service.bussines_services.product import ProductService
+
+from tests.conftest import create_product, create_supply
+
+
+@pytest.mark.anyio
+async def test_export_keeps_lines_of_updated_products(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10, name="first name")
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+    await ProductService(session).update_product(
+        product_id,
+        ProductVersionItem(name="second name", category="hair_care", price=120.0)
+    )
+
+    rows = [
+        row
+        async for batch in SupplyRepository(session).stream_export_rows(company_id=company.organizer_id)
+        for row in batch
+    ]
+
+    assert [(row["supply_id"], row["product_id"], row["product_name"]) for row in rows] == [
+        (supply_id, product_id, "first name")
+    ]
+    assert rows[0]["product_article"] is not None
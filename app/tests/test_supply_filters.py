@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from models import Supply as SupplyModel, SupplyProduct as SupplyProductModel
+from schemas.supply import CancelledAssembleStatus, SupplyStatusName
+from service.items_services.product import ProductVersionItem
+from service.items_services.supply import SupplyFilter, SupplyStatus
+from service.repositories import SupplyRepository
+from service.bussines_services.product import ProductService
+from service.bussines_services.supply import SupplyService
+
+from tests.conftest import create_product, create_supply
+
+
+@pytest.mark.parametrize(
+    ("statuses", "expected"),
+    [
+        (["canceled"], ["canceled", "cancelled"]),
+        (["cancelled"], ["canceled", "cancelled"]),
+        (["assembled"], ["assembled", "assemble"]),
+        (["adopted", "canceled", "cancelled"], ["adopted", "canceled", "cancelled"]),
+        (["in_processing"], ["in_processing"]),
+    ]
+)
+def test_status_filter_includes_every_spelling(statuses, expected):
+    assert SupplyFilter(statuses=statuses).statuses == expected
+
+
+def test_status_filter_clause_matches_stored_spellings():
+    clauses = SupplyRepository._get_filters_clauses(
+        SupplyModel.__table__,
+        SupplyProductModel.__table__,
+        SupplyFilter(statuses=[SupplyStatusName.canceled.value])
+    )
+    sql = str(clauses[0].compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True}
+    ))
+    assert "'canceled'" in sql
+    assert "'cancelled'" in sql
+
+
+@pytest.mark.anyio
+async def test_filter_finds_supply_cancelled_through_api(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+    service = SupplyService(session)
+    # PATCH /supplies/{id} записывает статус в написании "cancelled"
+    await service.assemble_or_cancel_supply(
+        supplier_id=supplier.organizer_id,
+        status=SupplyStatus(id=supply_id, status=CancelledAssembleStatus.cancelled.value)
+    )
+
+    page = await service.get_all_supplies_by_user_data(
+        user_data=company,
+        filters=SupplyFilter(statuses=[SupplyStatusName.canceled.value])
+    )
+
+    assert [supply.id for supply in page.supplies] == [supply_id]
+
+
+@pytest.mark.anyio
+async def test_product_filter_finds_supply_of_updated_product(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+    await ProductService(session).update_product(
+        product_id,
+        ProductVersionItem(name="renamed product", category="hair_care", price=120.0)
+    )
+
+    page = await SupplyService(session).get_all_supplies_by_user_data(
+        user_data=company,
+        filters=SupplyFilter(product_id=product_id)
+    )
+
+    assert [supply.id for supply in page.supplies] == [supply_id]
@@ -0,0 +1,126 @@
+import orjson
+import pytest
+from sqlalchemy import select
+
+from models import Supply as SupplyModel
+from service.items_services.product import ProductVersionItem
+from service.items_services.supply import SupplyCursor
+from service.bussines_services.product import ProductService
+from service.bussines_services.supply import SupplyService
+
+from tests.conftest import create_product, create_supply
+
+
+@pytest.mark.anyio
+async def test_last_page_has_no_next_cursor(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supplies_ids = [
+        await create_supply(session, supplier, company, product_id, quantity=1)
+        for _ in range(2)
+    ]
+    service = SupplyService(session)
+
+    first = await service.get_all_supplies_by_user_data(user_data=company, limit=1)
+    second = await service.get_all_supplies_by_user_data(
+        user_data=company, limit=1, cursor=first.next_cursor
+    )
+    whole = await service.get_all_supplies_by_user_data(user_data=company, limit=2)
+
+    assert [supply.id for supply in first.supplies + second.supplies] == supplies_ids[::-1]
+    assert first.next_cursor is not None
+    assert second.next_cursor is None
+    assert whole.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_json_last_page_has_no_next_cursor(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supplies_ids = [
+        await create_supply(session, supplier, company, product_id, quantity=1)
+        for _ in range(2)
+    ]
+    service = SupplyService(session)
+
+    first = await service.get_supplies_json_by_user_data(user_data=company, limit=1)
+    second = await service.get_supplies_json_by_user_data(
+        user_data=company, limit=1, cursor=first.next_cursor
+    )
+
+    assert [
+        supply["id"]
+        for page in (first, second)
+        for supply in orjson.loads(page.content)["supplies"]
+    ] == supplies_ids[::-1]
+    assert first.next_cursor is not None
+    assert second.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_cursor_past_last_supply_returns_empty_page(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=1)
+    created_at = await session.scalar(
+        select(SupplyModel.created_at).where(SupplyModel.id == supply_id)
+    )
+    # курсор, указывающий на последнюю поставку списка
+    cursor = SupplyCursor(created_at=created_at, id=supply_id).encode()
+    service = SupplyService(session)
+
+    page = await service.get_all_supplies_by_user_data(user_data=company, cursor=cursor)
+    page_json = await service.get_supplies_json_by_user_data(user_data=company, cursor=cursor)
+
+    assert (page.supplies, page.next_cursor) == ([], None)
+    assert (page_json.count, page_json.next_cursor) == (0, None)
+
+
+@pytest.mark.anyio
+async def test_page_keeps_supplies_of_updated_products(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supplies_ids = [
+        await create_supply(session, supplier, company, product_id, quantity=1)
+        for _ in range(3)
+    ]
+    # новая версия продукта после создания всех поставок
+    await ProductService(session).update_product(
+        product_id,
+        ProductVersionItem(name="renamed product", category="hair_care", price=120.0)
+    )
+    service = SupplyService(session)
+
+    first = await service.get_all_supplies_by_user_data(user_data=company, limit=2)
+    second = await service.get_all_supplies_by_user_data(
+        user_data=company, limit=2, cursor=first.next_cursor
+    )
+
+    assert [supply.id for supply in first.supplies + second.supplies] == supplies_ids[::-1]
+    assert second.next_cursor is None
+    assert first.supplies[0].supply_products[0].product.id == product_id
+
+
+@pytest.mark.anyio
+async def test_json_page_keeps_supplies_of_updated_products(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supplies_ids = [
+        await create_supply(session, supplier, company, product_id, quantity=1)
+        for _ in range(2)
+    ]
+    await ProductService(session).update_product(
+        product_id,
+        ProductVersionItem(name="renamed product", category="hair_care", price=120.0)
+    )
+    service = SupplyService(session)
+
+    page = await service.get_supplies_json_by_user_data(user_data=company, limit=1)
+    # ответ очереди подтверждения собирается тем же запросом по id закрепленных поставок
+    claimed = await service.supply_repo.get_all_json_by_organizer_id(
+        limit=2,
+        supplier_id=supplier.organizer_id,
+        is_wait_confirm=True,
+        supplies_ids=supplies_ids
+    )
+
+    supplies = orjson.loads(page.content)["supplies"]
+    assert [supply["id"] for supply in supplies] == [supplies_ids[-1]]
+    assert supplies[0]["supply_products"][0]["product"]["id"] == product_id
+    assert page.next_cursor is not None
+    assert claimed.count == 2
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import update
+
+from models import ExpenseSupplier as ExpenseSupplierModel
+from schemas.supply import CancelledAssembleStatus
+from service.items_services.product import ProductVersionItem
+from service.items_services.supply import SupplyStatus
+from service.bussines_services.product import ProductService
+from service.bussines_services.supply import SupplyService
+from service.bussines_services.expense.expense_supplier import ExpenseSupplierService
+
+from exceptions.exceptions import BadRequestError
+
+from tests.conftest import create_product, create_supply
+
+
+async def get_expense(session, supplier, product_id):
+    return await ExpenseSupplierService(session).get_expense_by_id_supplier_and_product(
+        supplier_id=supplier.organizer_id,
+        product_id=product_id
+    )
+
+
+@pytest.mark.anyio
+async def test_cancel_releases_reserve_of_updated_product(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+    # новая версия продукта после создания поставки
+    await ProductService(session).update_product(
+        product_id,
+        ProductVersionItem(name="renamed product", category="hair_care", price=120.0)
+    )
+
+    await SupplyService(session).assemble_or_cancel_supply(
+        supplier_id=supplier.organizer_id,
+        status=SupplyStatus(id=supply_id, status=CancelledAssembleStatus.cancelled.value)
+    )
+
+    expense = await get_expense(session, supplier, product_id)
+    assert (expense.quantity, expense.reserved) == (10, 0)
+
+
+@pytest.mark.anyio
+async def test_assemble_writes_off_quantity(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+
+    await SupplyService(session).assemble_or_cancel_supply(
+        supplier_id=supplier.organizer_id,
+        status=SupplyStatus(id=supply_id, status=CancelledAssembleStatus.assemble.value)
+    )
+
+    expense = await get_expense(session, supplier, product_id)
+    assert (expense.quantity, expense.reserved) == (7, 0)
+
+
+@pytest.mark.anyio
+async def test_release_fails_when_reserve_is_less_than_supply(session, supplier, company):
+    product_id = await create_product(session, supplier, quantity=10)
+    supply_id = await create_supply(session, supplier, company, product_id, quantity=3)
+    await session.execute(
+        update(ExpenseSupplierModel)
+        .where(ExpenseSupplierModel.product_id == product_id)
+        .values(reserved=1)
+    )
+
+    with pytest.raises(BadRequestError):
+        await SupplyService(session).assemble_or_cancel_supply(
+            supplier_id=supplier.organizer_id,
+            status=SupplyStatus(id=supply_id, status=CancelledAssembleStatus.cancelled.value)
+        )
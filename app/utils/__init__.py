@@ -1,2 +1,5 @@
 from .camel_case_to_snake_case import camel_case_to_snake_case
 from .generate_nums import generate_unique_code
+from .cursor import encode_cursor, decode_cursor
+from .escape_like import escape_like
+from .etag import ResultSetValidator, make_etag, make_versions_etag, is_etag_matched
@@ -0,0 +1,23 @@
+import base64
+import json
+from typing import Any, List
+
+from exceptions.exceptions import BadRequestError
+
+
+def encode_cursor(*values: Any) -> str:
+    """Закодировать значения ключа keyset-пагинации в непрозрачную строку"""
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Раскодировать непрозрачный курсор в список значений ключа"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise BadRequestError("Invalid cursor")
+    if not isinstance(values, list):
+        raise BadRequestError("Invalid cursor")
+    return values
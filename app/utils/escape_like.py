@@ -0,0 +1,8 @@
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Экранировать спецсимволы шаблона LIKE в пользовательской строке"""
+    return (
+        value
+        .replace(escape, escape * 2)
+        .replace("%", f"{escape}%")
+        .replace("_", f"{escape}_")
+    )
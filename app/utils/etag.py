@@ -0,0 +1,43 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Mapping, NamedTuple, Optional
+
+
+class ResultSetValidator(NamedTuple):
+    """
+    Валидатор выборки: число строк, время последнего изменения и сумма id строк.
+    Удаление строки не меняет время изменения оставшихся, поэтому учитывается
+    число строк, а сдвиг страницы после удаления - сумма id
+    """
+    count: int
+    updated_at: Optional[datetime]
+    ids_sum: int
+
+
+def make_etag(validator: ResultSetValidator, *parts: Any) -> str:
+    """Слабый ETag выборки, parts - параметры запроса, от которых зависит ответ"""
+    return _hash_etag(*parts, *validator)
+
+
+def make_versions_etag(versions: Mapping[str, Any], *parts: Any) -> str:
+    """Слабый ETag ответа из кэша по версиям данных, из которых собран ответ"""
+    return _hash_etag(*parts, versions)
+
+
+def _hash_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, default=str, separators=(",", ":"), sort_keys=True)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def is_etag_matched(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверить заголовок If-None-Match (слабое сравнение по RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag
+        for tag in if_none_match.split(",")
+    )
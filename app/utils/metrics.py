@@ -0,0 +1,36 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Callable, Dict, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """
+    Счетчики и показатели воркера приложения.
+    Значения локальны для процесса - при нескольких воркерах каждый отдает свои
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: Dict[str, Number] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], Number]] = dict()
+
+    def inc(self, name: str, value: Number = 1) -> None:
+        """Увеличить счетчик"""
+        with self._lock:
+            self._counters[name] += value
+
+    def register_gauge(self, name: str, getter: Callable[[], Number]) -> None:
+        """Зарегистрировать показатель, значение которого читается при снятии метрик"""
+        self._gauges[name] = getter
+
+    def snapshot(self) -> Dict[str, Number]:
+        """Текущие значения всех счетчиков и показателей"""
+        with self._lock:
+            values = dict(self._counters)
+        for name, getter in self._gauges.items():
+            values[name] = getter()
+        return values
+
+
+metrics = Metrics()